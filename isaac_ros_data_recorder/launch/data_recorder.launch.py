@@ -20,12 +20,50 @@ import os
 from ament_index_python.packages import get_package_share_directory
 
 from launch import LaunchDescription
-from launch.actions import IncludeLaunchDescription, Shutdown
+from launch.actions import DeclareLaunchArgument, IncludeLaunchDescription, Shutdown
 from launch.launch_description_sources import PythonLaunchDescriptionSource
+from launch.substitutions import LaunchConfiguration
 from launch_ros.actions import Node
 
 
 def generate_launch_description():
+    enable_monitor_arg = DeclareLaunchArgument(
+        'enable_monitor',
+        description='Flag to run the live recording health monitor',
+        default_value='False'
+    )
+
+    enable_resource_sampler_arg = DeclareLaunchArgument(
+        'enable_resource_sampler',
+        description='Flag to sample host CPU, memory and disk usage into the recording',
+        default_value='True'
+    )
+
+    resource_sample_rate_arg = DeclareLaunchArgument(
+        'resource_sample_rate',
+        description='Resource samples per second',
+        default_value='10.0'
+    )
+
+    use_fake_sensors_arg = DeclareLaunchArgument(
+        'use_fake_sensors',
+        description='Flag to record fake sensor drivers instead of the hardware, '
+                    'e.g. to load test the recorder on a workstation',
+        default_value='False'
+    )
+
+    fake_sensor_jitter_us_arg = DeclareLaunchArgument(
+        'fake_sensor_jitter_us',
+        description='Standard deviation of the fake sensor stamps in microseconds',
+        default_value='0.0'
+    )
+
+    fake_sensor_drop_rate_arg = DeclareLaunchArgument(
+        'fake_sensor_drop_rate',
+        description='Fraction of the fake sensor messages that are dropped',
+        default_value='0.0'
+    )
+
     container = Node(
         name='data_recorder',
         package='rclcpp_components',
@@ -41,7 +79,12 @@ def generate_launch_description():
         PythonLaunchDescriptionSource([
             isaac_ros_data_recorder_launch_include_dir,
             '/recorder.launch.py'
-        ])
+        ]),
+        launch_arguments={
+            'enable_monitor': LaunchConfiguration('enable_monitor'),
+            'enable_resource_sampler': LaunchConfiguration('enable_resource_sampler'),
+            'resource_sample_rate': LaunchConfiguration('resource_sample_rate'),
+        }.items(),
     )
 
     sensors_launch = IncludeLaunchDescription(
@@ -51,7 +94,13 @@ def generate_launch_description():
         ]),
         launch_arguments={
             'target_container': 'data_recorder',
+            'use_fake_sensors': LaunchConfiguration('use_fake_sensors'),
+            'fake_sensor_jitter_us': LaunchConfiguration('fake_sensor_jitter_us'),
+            'fake_sensor_drop_rate': LaunchConfiguration('fake_sensor_drop_rate'),
         }.items(),
     )
 
-    return LaunchDescription([container, recorder_launch, sensors_launch])
+    return LaunchDescription([enable_monitor_arg, enable_resource_sampler_arg,
+                              resource_sample_rate_arg, use_fake_sensors_arg,
+                              fake_sensor_jitter_us_arg, fake_sensor_drop_rate_arg, container,
+                              recorder_launch, sensors_launch])
@@ -19,7 +19,47 @@ from datetime import datetime
 
 from launch import LaunchDescription
 from launch.actions import ExecuteProcess, DeclareLaunchArgument, LogInfo, Shutdown, TimerAction
+from launch.conditions import IfCondition
 from launch.substitutions import LaunchConfiguration, PythonExpression
+from launch_ros.actions import Node
+
+RECORDED_TOPICS = [
+    '/rosout',
+    '/tf',
+    '/tf_static',
+    '/front_stereo_camera/left/image_compressed',
+    '/front_stereo_camera/left/camera_info',
+    '/front_stereo_camera/right/image_compressed',
+    '/front_stereo_camera/right/camera_info',
+    '/back_stereo_camera/left/image_compressed',
+    '/back_stereo_camera/left/camera_info',
+    '/back_stereo_camera/right/image_compressed',
+    '/back_stereo_camera/right/camera_info',
+    '/left_stereo_camera/left/image_compressed',
+    '/left_stereo_camera/left/camera_info',
+    '/left_stereo_camera/right/image_compressed',
+    '/left_stereo_camera/right/camera_info',
+    '/right_stereo_camera/left/image_compressed',
+    '/right_stereo_camera/left/camera_info',
+    '/right_stereo_camera/right/image_compressed',
+    '/right_stereo_camera/right/camera_info',
+    '/front_fisheye_camera/left/image_compressed',
+    '/front_fisheye_camera/left/camera_info',
+    '/back_fisheye_camera/left/image_compressed',
+    '/back_fisheye_camera/left/camera_info',
+    '/left_fisheye_camera/left/image_compressed',
+    '/left_fisheye_camera/left/camera_info',
+    '/right_fisheye_camera/left/image_compressed',
+    '/right_fisheye_camera/left/camera_info',
+    '/front_2d_lidar/scan',
+    '/back_2d_lidar/scan',
+    '/front_3d_lidar/lidar_packets',
+    '/front_stereo_imu/imu',
+    '/chassis/imu',
+    '/chassis/ticks',
+    '/chassis/odom',
+    '/chassis/battery_state',
+]
 
 
 def generate_launch_description():
@@ -44,6 +84,24 @@ def generate_launch_description():
         default_value='True'  # or 'False' depending on your default preference
     )
 
+    enable_monitor_arg = DeclareLaunchArgument(
+        'enable_monitor',
+        description='Flag to run the live recording health monitor',
+        default_value='False'
+    )
+
+    enable_resource_sampler_arg = DeclareLaunchArgument(
+        'enable_resource_sampler',
+        description='Flag to sample host CPU, memory and disk usage into the recording',
+        default_value='True'
+    )
+
+    resource_sample_rate_arg = DeclareLaunchArgument(
+        'resource_sample_rate',
+        description='Resource samples per second',
+        default_value='10.0'
+    )
+
     rosbag_name = PythonExpression([
         "'", LaunchConfiguration('rosbag_name'), "' + (", datetime_str, " if ",
         LaunchConfiguration('append_datetime'), " else '')"
@@ -58,41 +116,7 @@ def generate_launch_description():
         actions=[
             ExecuteProcess(
                 cmd=['ros2', 'bag', 'record', '--storage', 'mcap', '--output', output_path,
-                     '/rosout',
-                     '/tf',
-                     '/tf_static',
-                     '/front_stereo_camera/left/image_compressed',
-                     '/front_stereo_camera/left/camera_info',
-                     '/front_stereo_camera/right/image_compressed',
-                     '/front_stereo_camera/right/camera_info',
-                     '/back_stereo_camera/left/image_compressed',
-                     '/back_stereo_camera/left/camera_info',
-                     '/back_stereo_camera/right/image_compressed',
-                     '/back_stereo_camera/right/camera_info',
-                     '/left_stereo_camera/left/image_compressed',
-                     '/left_stereo_camera/left/camera_info',
-                     '/left_stereo_camera/right/image_compressed',
-                     '/left_stereo_camera/right/camera_info',
-                     '/right_stereo_camera/left/image_compressed',
-                     '/right_stereo_camera/left/camera_info',
-                     '/right_stereo_camera/right/image_compressed',
-                     '/right_stereo_camera/right/camera_info',
-                     '/front_fisheye_camera/left/image_compressed',
-                     '/front_fisheye_camera/left/camera_info',
-                     '/back_fisheye_camera/left/image_compressed',
-                     '/back_fisheye_camera/left/camera_info',
-                     '/left_fisheye_camera/left/image_compressed',
-                     '/left_fisheye_camera/left/camera_info',
-                     '/right_fisheye_camera/left/image_compressed',
-                     '/right_fisheye_camera/left/camera_info',
-                     '/front_2d_lidar/scan',
-                     '/back_2d_lidar/scan',
-                     '/front_3d_lidar/lidar_packets',
-                     '/front_stereo_imu/imu',
-                     '/chassis/imu',
-                     '/chassis/ticks',
-                     '/chassis/odom',
-                     '/chassis/battery_state'],
+                     *RECORDED_TOPICS],
                 output='screen',
                 on_exit=Shutdown(),
             ),
@@ -100,6 +124,14 @@ def generate_launch_description():
                 actions=[
                     ExecuteProcess(cmd=['cp', '-r', '/etc/nova', output_path]),
                     ExecuteProcess(cmd=['cp', '-r', '/tmp/hesai', output_path]),
+                    # Writes resources.bin into the recording, for summarize_bag
+                    ExecuteProcess(
+                        cmd=['ros2', 'run', 'isaac_ros_data_validation', 'resource_sampler',
+                             '--output-dir', output_path,
+                             '--rate-hz', LaunchConfiguration('resource_sample_rate')],
+                        output='screen',
+                        condition=IfCondition(LaunchConfiguration('enable_resource_sampler')),
+                    ),
                 ],
                 period=1.0,
             ),
@@ -113,5 +145,19 @@ def generate_launch_description():
         period=15.0,
     )
 
-    return LaunchDescription([recording_dir_arg, rosbag_name_arg, append_datetime_arg, rosbag_node])
+    # Publishes /diagnostics and a live drop table for the recorded topics
+    monitor_node = Node(
+        name='recording_monitor',
+        package='isaac_ros_data_validation',
+        executable='recording_monitor',
+        parameters=[{
+            'topics': RECORDED_TOPICS,
+        }],
+        output='screen',
+        condition=IfCondition(LaunchConfiguration('enable_monitor')),
+    )
+
+    return LaunchDescription([recording_dir_arg, rosbag_name_arg, append_datetime_arg,
+                              enable_monitor_arg, enable_resource_sampler_arg,
+                              resource_sample_rate_arg, rosbag_node, monitor_node])
 
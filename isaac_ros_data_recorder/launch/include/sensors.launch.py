@@ -22,13 +22,74 @@ from ament_index_python.packages import get_package_share_directory
 
 from launch import LaunchContext, LaunchDescription
 from launch.actions import DeclareLaunchArgument, IncludeLaunchDescription, OpaqueFunction, Shutdown
-from launch.conditions import LaunchConfigurationEquals
+from launch.conditions import IfCondition, LaunchConfigurationEquals, UnlessCondition
 from launch.launch_description_sources import PythonLaunchDescriptionSource
 from launch.substitutions import LaunchConfiguration
 from launch_ros.actions import Node
 
 import isaac_ros_launch_utils as lu
 
+# Sensor type by the suffix of the sensor name, for fake sensors on machines without
+# /etc/nova/systeminfo.yaml
+FAKE_SENSOR_TYPES = {
+    'stereo_camera': 'hawk',
+    'fisheye_camera': 'owl',
+    'stereo_imu': 'bmi088',
+    '2d_lidar': 'rplidar',
+    '3d_lidar': 'hesai',
+}
+
+
+def fake_sensor_type(sensor, sensor_config):
+    if sensor_config is not None:
+        if sensor_config['type'] == 'hawk' and 'module_id' not in sensor_config:
+            # remove after nova-init updates type 'front_stereo_imu'
+            return 'bmi088'
+        return sensor_config['type']
+    for suffix, sensor_type in FAKE_SENSOR_TYPES.items():
+        if sensor.endswith(suffix):
+            return sensor_type
+    return None
+
+
+def load_fake_sensors(context: LaunchContext,
+                      config: LaunchConfiguration,
+                      jitter_us: LaunchConfiguration,
+                      drop_rate: LaunchConfiguration):
+    # Fake drivers publish the same topics, without the robot description and the
+    # correlated timestamp driver, which both need the hardware
+    system_config = {'sensors': {}}
+    if os.path.isfile('/etc/nova/systeminfo.yaml'):
+        with open('/etc/nova/systeminfo.yaml', 'r') as systeminfo:
+            system_config = yaml.safe_load(systeminfo)
+
+    actions = []
+    with open(context.perform_substitution(config), 'r') as file:
+        app_config = yaml.safe_load(file)
+
+        for seed, sensor in enumerate(app_config['sensors']):
+            sensor_type = fake_sensor_type(sensor, system_config['sensors'].get(sensor))
+            if sensor_type is None:
+                actions.append(lu.log_info(['No fake sensor for ', sensor, ', skipping it']))
+                continue
+            actions.append(
+                Node(
+                    name='fake_sensor',
+                    package='isaac_ros_data_validation',
+                    executable='fake_sensor',
+                    namespace=sensor,
+                    parameters=[{
+                        'sensor_type': sensor_type,
+                        'jitter_us': float(context.perform_substitution(jitter_us)),
+                        'drop_rate': float(context.perform_substitution(drop_rate)),
+                        'seed': seed,
+                    }],
+                    output='screen',
+                    on_exit=Shutdown(),
+                ))
+
+    return [LaunchDescription(actions)]
+
 
 def load_config(context: LaunchContext,
                 target_container: LaunchConfiguration,
@@ -192,11 +253,39 @@ def generate_launch_description():
         default_value='/etc/nova/systeminfo.yaml',
     )
 
+    use_fake_sensors = LaunchConfiguration('use_fake_sensors')
+    use_fake_sensors_launch_arg = DeclareLaunchArgument(
+        'use_fake_sensors',
+        description='Publish the sensor topics from fake drivers instead of the hardware',
+        default_value='False',
+    )
+
+    fake_sensor_jitter_us = LaunchConfiguration('fake_sensor_jitter_us')
+    fake_sensor_jitter_us_launch_arg = DeclareLaunchArgument(
+        'fake_sensor_jitter_us',
+        description='Standard deviation of the fake sensor stamps in microseconds',
+        default_value='0.0',
+    )
+
+    fake_sensor_drop_rate = LaunchConfiguration('fake_sensor_drop_rate')
+    fake_sensor_drop_rate_launch_arg = DeclareLaunchArgument(
+        'fake_sensor_drop_rate',
+        description='Fraction of the fake sensor messages that are dropped',
+        default_value='0.0',
+    )
+
     launch_args = [
         target_container_launch_arg,
         config_launch_arg,
+        use_fake_sensors_launch_arg,
+        fake_sensor_jitter_us_launch_arg,
+        fake_sensor_drop_rate_launch_arg,
     ]
 
     return LaunchDescription(launch_args + [
-        OpaqueFunction(function=load_config, args=[target_container, config]),
+        OpaqueFunction(function=load_config, args=[target_container, config],
+                       condition=UnlessCondition(use_fake_sensors)),
+        OpaqueFunction(function=load_fake_sensors,
+                       args=[config, fake_sensor_jitter_us, fake_sensor_drop_rate],
+                       condition=IfCondition(use_fake_sensors)),
     ])
@@ -32,6 +32,8 @@ app_config="nova-carter_hawk-4.yaml"
 bag_file_base="rosbag2"
 override_name=false
 skip_validation=false
+enable_monitor=false
+validation_budget=""
 
 show_help() {
     echo "Usage: $0 [options]"
@@ -42,6 +44,9 @@ show_help() {
     echo "  -o | --output STRING String to prefix the output bag file. If not provided, defaults to '$bag_file_base'."
     echo "  --override_name       When present, will not prepend RECORDING_DIR or append datetime to --output."
     echo "  --skip_validation    Skip the validation process."
+    echo "  --monitor            Run the live recording health monitor while recording."
+    echo "  --validation_budget SECONDS"
+    echo "                       Run the tiered validation, going only as deep as SECONDS allow."
     echo
     echo "Example:"
     echo "  $0 -y /path/to/yaml_file.yaml -o unique_name"
@@ -132,6 +137,15 @@ while [[ $# -gt 0 ]]; do
             skip_validation=true
             shift # past argument
             ;;
+        --monitor)
+            enable_monitor=true
+            shift # past argument
+            ;;
+        --validation_budget)
+            validation_budget="$2"
+            shift # past argument
+            shift # past value
+            ;;
         *)
             # Unknown option
             echo "Unknown option: $1"
@@ -177,7 +191,8 @@ config_arg="config:=${app_config}"
 rosbag_arg="rosbag_name:=${rosbag_name}"
 datetime_arg="append_datetime:=False"
 recording_dir_arg="recording_dir:=${RECORDING_DIR}"
-ros2_launch_command="ros2 launch isaac_ros_data_recorder data_recorder.launch.py $config_arg $rosbag_arg $recording_dir_arg $datetime_arg"
+monitor_arg="enable_monitor:=$( [ "$enable_monitor" = true ] && echo True || echo False )"
+ros2_launch_command="ros2 launch isaac_ros_data_recorder data_recorder.launch.py $config_arg $rosbag_arg $recording_dir_arg $datetime_arg $monitor_arg"
 echo $ros2_launch_command
 
 # Run the data recorder and grab the output
@@ -191,6 +206,10 @@ ros2 bag info $output_dir
 if [ "$skip_validation" = false ]; then
     SECONDS=0
     bag_check_command="python -m isaac_ros_data_validation.summarize_bag $output_dir"
+    if [ -n "$validation_budget" ]; then
+        # Also writes data_validation.json after every tier
+        bag_check_command="$bag_check_command --budget-s $validation_budget"
+    fi
     echo $bag_check_command
     eval $bag_check_command | tee "${output_dir}/data_validation.txt"
     bag_check_duration=$SECONDS
@@ -18,7 +18,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Restarts the dev container, retarts argus, runs record_data.sh, saves the output and extra logs
-# from argus and the kernel. Meant to be run outside of the dev container
+# from argus and the kernel (and optionally tegrastats), then merges them with the drops found in
+# the bag into timeline.csv. Meant to be run outside of the dev container
 
 
 RECORDING_DIR="/mnt/nova_ssd/recordings"
@@ -36,6 +37,7 @@ show_help() {
     echo "  -y | --yaml PATH     Path to the YAML spec file. If not provided, 4-hawk.yaml is used."
     echo "  -o | --output STRING String to prefix the output bag file. If not provided, defaults to 'rosbag2'."
     echo "  --skip_validation    Skip the validation process."
+    echo "  --tegrastats         Capture tegrastats during the recording."
     echo
     echo "Example:"
     echo "  $0 -y /path/to/yaml_file.yaml -o unique_name"
@@ -48,6 +50,8 @@ restart_and_run_recorder() {
     local config_file="$1"
     local bag_base_name="$2"
     local skip_validation="$3"
+    local capture_tegrastats="$4"
+    local tegrastats_file="/tmp/tegrastats_$$.txt"
 
     current_date_time=$(date +"%Y_%m_%d-%H_%M_%S")
     bag_file_name="${bag_base_name}_${current_date_time}"
@@ -60,6 +64,12 @@ restart_and_run_recorder() {
 
     systemctl restart nvargus-daemon.service
 
+    if [ "$capture_tegrastats" = "true" ]; then
+        rm -f "$tegrastats_file"
+        tegrastats --interval 1000 --logfile "$tegrastats_file" &
+        tegrastats_pid=$!
+    fi
+
     # Taken from carter_dev's run_dev.sh
     docker run -d --rm \
            --privileged \
@@ -79,8 +89,20 @@ restart_and_run_recorder() {
                                                              /workspaces/isaac_ros-dev/ros_ws/src/isaac_ros_data_recorder/isaac_ros_data_recorder/scripts/record_data.sh -y ${config_file} -o ${bag_file_name} --override_name$( [ "$skip_validation" = "true" ] && echo ' --skip_validation')"
 
 
-    journalctl -u nvargus-daemon.service --since "$start_time"  > "${output_dir}/argus_log.txt"
-    dmesg > "${output_dir}/dmesg.txt"
+    if [ "$capture_tegrastats" = "true" ]; then
+        kill "$tegrastats_pid"
+        wait "$tegrastats_pid"
+        mv "$tegrastats_file" "${output_dir}/tegrastats.txt"
+    fi
+
+    # Wall clock timestamps, so the logs can be aligned with the bag
+    journalctl -u nvargus-daemon.service --since "$start_time" -o short-iso-precise > "${output_dir}/argus_log.txt"
+    dmesg --time-format iso > "${output_dir}/dmesg.txt"
+
+    if [ "$skip_validation" = "false" ]; then
+        docker exec isaac_ros_dev-aarch64-container bash -c "source ros_ws/install/setup.bash &&
+                                                          python -m isaac_ros_data_validation.summarize_timeline ${output_dir}" | tee "${output_dir}/timeline.txt"
+    fi
 
 }
 
@@ -89,6 +111,7 @@ restart_and_run_recorder() {
 app_config="/mnt/nova_ssd/workspaces/carter-dev/ros_ws/src/isaac_ros_data_recorder/isaac_ros_data_recorder/config/nova-carter_hawk-4.yaml"
 bag_base_name="rosbag2"
 skip_validation=false
+capture_tegrastats=false
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -110,6 +133,10 @@ while [[ $# -gt 0 ]]; do
             skip_validation=true
             shift # past argument
             ;;
+        --tegrastats)
+            capture_tegrastats=true
+            shift # past argument
+            ;;
         *)
             # Unknown option
             echo "Unknown option: $1"
@@ -127,5 +154,5 @@ app_config="${app_config/$old_root/$new_root}"
 
 echo $app_config
 
-restart_and_run_recorder "${app_config}" "${bag_base_name}" "${skip_validation}"
+restart_and_run_recorder "${app_config}" "${bag_base_name}" "${skip_validation}" "${capture_tegrastats}"
 
@@ -18,86 +18,323 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from argparse import ArgumentParser
+import fnmatch
+import os
+import queue
 import subprocess
-from tempfile import TemporaryDirectory
-from typing import List
+import threading
+from typing import Dict, List, Union
 
-import cv2
 import cv_bridge
+from isaac_ros_data_validation.cdr import compressed_image_payload, header_stamp_ns
+import numpy as np
 from rclpy.serialization import deserialize_message
-from rosbag2_py import ConverterOptions, SequentialReader, StorageOptions
+from rosbag2_py import ConverterOptions, SequentialReader, StorageFilter, StorageOptions
 from sensor_msgs.msg import Image
 
+# ffmpeg rawvideo pixel format and bytes per pixel by sensor_msgs/Image encoding. Frames in
+# other encodings are converted to bgr8 with cv_bridge first.
+RAW_PIXEL_FORMATS = {
+    'rgb8': ('rgb24', 3),
+    'bgr8': ('bgr24', 3),
+    'rgba8': ('rgba', 4),
+    'bgra8': ('bgra', 4),
+    'mono8': ('gray', 1),
+    'mono16': ('gray16le', 2),
+    'yuv422': ('uyvy422', 2),
+    'uyvy': ('uyvy422', 2),
+    'yuv422_yuy2': ('yuyv422', 2),
+    'yuyv': ('yuyv422', 2),
+}
+# Frames buffered between the bag reader and each encoder
+QUEUE_SIZE = 32
+COMPRESSED_IMAGE_TYPE = 'sensor_msgs/msg/CompressedImage'
+IMAGE_TYPE = 'sensor_msgs/msg/Image'
 
-def ffmpeg(args: List[str]):
-    return subprocess.run(['ffmpeg'] + args, check=True)
 
+class FfmpegWriter:
+    """Feed an ffmpeg process on stdin through a bounded queue drained by a writer thread."""
 
-def convert(rosbag: str, camera: str, output: str):
-    if not camera.startswith('/'):
-        camera = '/' + camera
+    def __init__(self, input_args: List[str], output: str, output_args: List[str],
+                 queue_size: int = QUEUE_SIZE):
+        self.process = subprocess.Popen(
+            ['ffmpeg'] + input_args + ['-i', '-'] + output_args
+            + [output, '-y', '-loglevel', 'panic'],
+            stdin=subprocess.PIPE)
+        # Bounded, so reading the bag can never run far ahead of the encoder
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._write, daemon=True)
+        self.thread.start()
 
-    directory = TemporaryDirectory()
+    def _write(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            if self.error is None:
+                try:
+                    self.process.stdin.write(frame)
+                except OSError as e:
+                    # Keep draining the queue so write() never blocks on a dead encoder
+                    self.error = e
+
+    def write(self, frame: bytes, repeat: int = 1):
+        if self.error is not None:
+            raise self.error
+        for _ in range(repeat):
+            self.queue.put(frame)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        returncode = self.process.wait()
+        if self.error is not None or returncode != 0:
+            raise subprocess.CalledProcessError(returncode, 'ffmpeg')
+
+
+class RawVideoWriter(FfmpegWriter):
+    """Encode raw frames with libx264."""
+
+    def __init__(self, output: str, width: int, height: int, pixel_format: str, fps: float,
+                 queue_size: int = QUEUE_SIZE):
+        super().__init__(
+            ['-f', 'rawvideo', '-pix_fmt', pixel_format, '-s', f'{width}x{height}',
+             '-framerate', str(fps)],
+            output, ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'], queue_size)
+
+
+def raw_frame(msg: Image, bridge: cv_bridge.CvBridge):
+    """Return the pixel format and the unpadded pixels of a sensor_msgs/Image."""
+    pixel_format, bytes_per_pixel = RAW_PIXEL_FORMATS.get(msg.encoding, (None, 0))
+    if pixel_format is None:
+        return 'bgr24', bridge.imgmsg_to_cv2(msg, 'bgr8').tobytes()
+    if msg.encoding == 'mono16' and msg.is_bigendian:
+        pixel_format = 'gray16be'
+    row_bytes = msg.width * bytes_per_pixel
+    if msg.step == row_bytes:
+        return pixel_format, memoryview(msg.data)[:msg.height * row_bytes]
+    pixels = np.frombuffer(msg.data, dtype=np.uint8).reshape(msg.height, msg.step)
+    return pixel_format, pixels[:, :row_bytes].tobytes()
+
+
+def timestamps_path(output: str):
+    return os.path.splitext(output)[0] + '.timestamps.csv'
+
+
+class _TimestampsFile:
+    # The <output>.timestamps.csv sidecar, the header stamp shown in every video frame
+
+    def __init__(self, output: str):
+        self.file = open(timestamps_path(output), 'w')
+        self.file.write('video_frame,source_frame,header_stamp_ns\n')
+
+    def write(self, video_frame: int, source_frame: int, stamp: int):
+        self.file.write(f'{video_frame},{source_frame},{stamp}\n')
+
+    def close(self):
+        self.file.close()
+
+
+class H264Sink:
+    """
+    Remux the H.264 frames of a CompressedImage topic without reencoding.
+
+    Only the data field of every message is passed on, one video frame per message.
+    """
+
+    def __init__(self, topic: str, output: str, fps: float):
+        self.writer = FfmpegWriter(['-f', 'h264', '-framerate', str(fps)], output,
+                                   ['-c', 'copy'])
+        self.timestamps = _TimestampsFile(output)
+        self.count = 0
+
+    def add(self, rawdata: bytes):
+        self.writer.write(compressed_image_payload(rawdata))
+        self.timestamps.write(self.count, self.count, header_stamp_ns(rawdata))
+        self.count += 1
+
+    def close(self):
+        self.timestamps.close()
+        self.writer.close()
+
+
+class RawSink:
+    """
+    Encode the frames of an Image topic on a constant frame rate grid.
+
+    The grid starts at the first header stamp: slots of dropped frames repeat the previous
+    frame, frames that land on an already filled slot are skipped, so the video plays back in
+    capture time.
+    """
+
+    def __init__(self, topic: str, output: str, fps: float):
+        self.topic = topic
+        self.output = output
+        self.fps = fps
+        self.period_ns = 1e9 / fps
+        self.bridge = cv_bridge.CvBridge()
+        self.writer = None
+        self.timestamps = _TimestampsFile(output)
+        self.source_frame = -1
+        self.first_stamp = None
+        self.next_slot = 0
+        self.last = None
+
+    def add(self, rawdata: bytes):
+        self.source_frame += 1
+        msg = deserialize_message(rawdata, Image)
+        stamp = msg.header.stamp.sec * 10**9 + msg.header.stamp.nanosec
+        if self.first_stamp is None:
+            self.first_stamp = stamp
+        slot = round((stamp - self.first_stamp) / self.period_ns)
+        if slot < self.next_slot:
+            return
+
+        pixel_format, frame = raw_frame(msg, self.bridge)
+        if self.writer is None:
+            self.size = (msg.width, msg.height, pixel_format)
+            self.writer = RawVideoWriter(self.output, *self.size, self.fps)
+        elif (msg.width, msg.height, pixel_format) != self.size:
+            raise ValueError(f'{self.topic} changes its frame size or encoding at frame '
+                             f'{self.source_frame}')
+
+        # Hold the last frame over the slots of dropped frames
+        if slot > self.next_slot:
+            last_frame, last_source_frame, last_stamp = self.last
+            self.writer.write(last_frame, slot - self.next_slot)
+            for video_frame in range(self.next_slot, slot):
+                self.timestamps.write(video_frame, last_source_frame, last_stamp)
+        self.writer.write(frame)
+        self.timestamps.write(slot, self.source_frame, stamp)
+        self.last = (frame, self.source_frame, stamp)
+        self.next_slot = slot + 1
+
+    def close(self):
+        self.timestamps.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def match_topics(patterns: List[str], topic_types: Dict[str, str]):
+    """Return the camera topics matching any of the patterns, e.g. '*/image_compressed'."""
+    topics = []
+    for pattern in patterns:
+        if not pattern.startswith('/') and not pattern.startswith('*'):
+            pattern = '/' + pattern
+        matches = sorted(topic for topic, topic_type in topic_types.items()
+                         if fnmatch.fnmatchcase(topic, pattern)
+                         and topic_type in (COMPRESSED_IMAGE_TYPE, IMAGE_TYPE))
+        if not matches:
+            raise ValueError(f'No camera topic matches {pattern}')
+        topics += [topic for topic in matches if topic not in topics]
+    return topics
+
+
+def output_names(topics: List[str]):
+    """Name the video of every topic after its camera, e.g. front_stereo_camera_left."""
+    names = {topic: '_'.join(topic.strip('/').split('/')[:-1]) for topic in topics}
+    if len(set(names.values())) < len(topics) or not all(names.values()):
+        # Several image topics of the same camera
+        names = {topic: topic.strip('/').replace('/', '_') for topic in topics}
+    return names
+
+
+def convert(rosbag: str, camera: Union[str, List[str]], output: str, fps: float = 30.0):
+    """
+    Convert camera topics of a rosbag to video files in a single pass over the bag.
+
+    image_compressed topics are remuxed without reencoding, raw images are piped into libx264
+    as they are read, see RawSink. Every topic gets its own ffmpeg process fed by its own
+    writer thread, so the encoders run concurrently with reading the bag and nothing is
+    written to temporary files. The header stamp of every video frame is written to
+    <video>.timestamps.csv.
+
+    rosbag: path of the bag
+    camera: a topic, a glob like '*/image_compressed', or a list of them
+    output: the video file for a single topic without wildcards, otherwise a directory that
+        gets one <camera>_<side>.mp4 per topic
+    fps: frame rate of the videos
+
+    Returns a dict of the video file by topic.
+    """
+    patterns = [camera] if isinstance(camera, str) else list(camera)
 
     reader = SequentialReader()
     reader.open(
         StorageOptions(uri=rosbag, storage_id='mcap'),
         ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
     )
+    topic_types = {topic.name: topic.type for topic in reader.get_all_topics_and_types()}
+    topics = match_topics(patterns, topic_types)
 
-    if camera.endswith('image_compressed'):
-        filename = camera.replace('/', '', 1).replace('/', '_')
-        filename = filename.replace('_image_compressed', '.h264')
-        file = open(directory.name + '/' + filename, 'wb')
-
-        while reader.has_next():
-            topic, data, timestamp = reader.read_next()
-            if camera == topic:
-                file.write(data)
-
-        ffmpeg(['-i', file.name, '-c', 'copy', output, '-y', '-loglevel', 'panic'])
-
-        file.close()
+    single_file = (len(patterns) == 1 and not any(char in patterns[0] for char in '*?[')
+                   and os.path.splitext(output)[1] != '' and not os.path.isdir(output))
+    if single_file:
+        outputs = {topics[0]: output}
     else:
-        bridge = cv_bridge.CvBridge()
-        count = 0
+        os.makedirs(output, exist_ok=True)
+        outputs = {topic: os.path.join(output, name + '.mp4')
+                   for topic, name in output_names(topics).items()}
+
+    reader.set_filter(StorageFilter(topics=topics))
+    sinks = {}
+    try:
+        for topic in topics:
+            sink_type = H264Sink if topic_types[topic] == COMPRESSED_IMAGE_TYPE else RawSink
+            sinks[topic] = sink_type(topic, outputs[topic], fps)
 
         while reader.has_next():
             topic, data, timestamp = reader.read_next()
-            if camera == topic:
-                count += 1
-                msg = deserialize_message(data, Image)
-                image = bridge.imgmsg_to_cv2(msg, 'bgr8')
-                path = directory.name + '/' + str(count).zfill(5) + '.png'
-                cv2.imwrite(path, image)
-
-        ffmpeg(['-framerate', '30', '-pattern_type', 'glob', '-i',
-                directory.name + '/*.png', '-c:v', 'libx264', '-r', '30',
-                output, '-y', '-loglevel', 'panic'])
+            sink = sinks.get(topic)
+            if sink is not None:
+                sink.add(data)
+    finally:
+        errors = []
+        for sink in sinks.values():
+            try:
+                sink.close()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
 
-    directory.cleanup()
+    return outputs
 
 
 def main():
     parser = ArgumentParser(
         prog='camera_converter.py',
-        description='converts a camera stream in a rosbag to a video file',
+        description='converts camera streams in a rosbag to video files in one pass',
     )
     parser.add_argument('-i', '--input',
                         help='input rosbag path',
                         type=str,
                         required=True)
     parser.add_argument('-t', '--topic',
-                        help="camera topic to convert i.e. 'front_stereo_camera/left/image_raw'",
+                        help="camera topic to convert i.e. 'front_stereo_camera/left/image_raw', "
+                             "or a glob i.e. '*/image_compressed', can be given multiple times",
                         type=str,
+                        action='append',
                         required=True)
     parser.add_argument('-o', '--output',
-                        help="output video path i.e '/tmp/front_stereo_camera.mp4",
+                        help="output video path i.e '/tmp/front_stereo_camera.mp4', or output "
+                             'directory when converting multiple topics',
                         type=str,
                         required=True)
+    parser.add_argument('--fps',
+                        help='frame rate of the videos (default: 30)',
+                        type=float,
+                        default=30.0)
     args = parser.parse_args()
 
-    convert(rosbag=args.input, camera=args.topic, output=args.output)
+    outputs = convert(rosbag=args.input, camera=args.topic, output=args.output, fps=args.fps)
+    for topic, output in outputs.items():
+        print(f'{topic} -> {output}')
 
 
 if __name__ == '__main__':
@@ -70,11 +70,9 @@ def parse_args():
     return parser.parse_args()
 
 
-def main():
-    args = parse_args()
-
-    reader = rosbag_reader(args.input)
-    writer = rosbag_writer(args.output)
+def convert(input_uri, output_uri):
+    reader = rosbag_reader(input_uri)
+    writer = rosbag_writer(output_uri)
 
     topics = reader.get_all_topics_and_types()
     for topic in topics:
@@ -98,5 +96,10 @@ def main():
         writer.write(topic, data, timestamp)
 
 
+def main():
+    args = parse_args()
+    convert(args.input, args.output)
+
+
 if __name__ == '__main__':
     main()
@@ -15,39 +15,53 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
 import io
 import os
-
-import matplotlib.pyplot as plt
-import nav_msgs
-import nav_msgs.msg
+import time
+
+from isaac_ros_data_validation import frozen_frames, h264, incidents, rosout
+from isaac_ros_data_validation.cdr import header_stamp_ns
+from isaac_ros_data_validation.profiling import NULL_PROFILER
+from isaac_ros_data_validation.resource_sampler import read_resource_samples, RESOURCE_FILE
+from isaac_ros_data_validation.streaming_stats import (
+    nominal_rate,
+    NOMINAL_RATES,
+    StreamingHistogram,
+)
+from isaac_ros_data_validation.topics import pair_stereo_topics, sensor_name, stereo_sync_name
+from isaac_ros_data_validation.verbosity import (  # noqa: F401
+    VERBOSE_COMPACT,
+    VERBOSE_DUMP,
+    VERBOSE_ERROR,
+    VERBOSE_INFO,
+    VERBOSE_WARNING,
+    VERBOSITY_MAP,
+)
 import numpy as np
 import pandas as pd
-from rclpy.serialization import deserialize_message
-import rosbag2_py
-from rosbags.rosbag2 import Reader
-from rosbags.serde import deserialize_cdr
-from rosidl_runtime_py.utilities import get_message
-import sensor_msgs
-import sensor_msgs.msg
-
-VERBOSE_DUMP = 5
-VERBOSE_INFO = 4
-VERBOSE_WARNING = 3
-VERBOSE_COMPACT = 2
-VERBOSE_ERROR = 1
-
-NUM_BINS = 64
-VERBOSITY_MAP = {
-    'dump': VERBOSE_DUMP,
-    'error': VERBOSE_ERROR,
-    'info': VERBOSE_INFO,
-    'compact': VERBOSE_COMPACT,
-    'warning': VERBOSE_WARNING,
-}
 
+# matplotlib, rclpy, rosbag2_py, rosbags and the message packages take seconds to import, so
+# they are imported by the functions that use them, and the command line tools start quickly
 
-def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagtype='mcap'):
+NUM_BINS = 64
+# Log lines printed per incident in the report
+MAX_INCIDENT_LOGS = 5
+# Duration of tiered validation tier 2 (payload passes) relative to tier 1 (header stamps)
+TIER_2_COST_FACTOR = 3.0
+# Share of the remaining time budget that tier 1 keeps for the analysis after reading
+TIER_1_ANALYSIS_SHARE = 0.2
+
+# If the median log time - header time difference of a topic is larger than this, the header
+# stamps are not on the recorder clock (e.g. sensor time since boot), and only latency relative
+# to the best observed latency is meaningful
+MAX_CLOCK_OFFSET_NS = 10e9
+# Messages per slice in analyze_latency, bounds its temporary arrays for long recordings
+LATENCY_CHUNK_SIZE = 1 << 16
+
+
+def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagtype='mcap',
+                passes=None, profiler=None):
     """
     Read an arbitrary ROSbag into a dictionary of pandas data frames.
 
@@ -57,13 +71,35 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
         verbose (int, optional): Verbosity level. Defaults to VERBOSE_WARNING.
         store_data (bool, optional): Flag to indicate whether to store data in memory.
         bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+        passes([MessagePass], optional): Passes that get to see every serialized message of
+            the topics they accept, before deserialization. Results are read from the passes
+            after the call.
+        profiler(Profiler, optional): Records the open, read and data frame stages, and the
+            decode and pass time per topic
 
     Returns
     -------
         {str: pd.DataFrame} : A dictionary mapping topic names to a DataFrame containing the
-            extracted data.
+            extracted data: log timestamp, header acqtime and serialized size in bytes.
 
     """
+    from rclpy.serialization import deserialize_message
+    import rosbag2_py
+    from rosbags.rosbag2 import Reader
+    from rosbags.serde import deserialize_cdr
+    from rosidl_runtime_py.utilities import get_message
+
+    passes = passes or []
+    passes_by_topic = {}
+    profiler = profiler or NULL_PROFILER
+    # Checked per message, so the clock is only read when profiling
+    timed = profiler.enabled
+
+    def _run_passes(topic, msgtype, timestamp, rawdata):
+        if topic not in passes_by_topic:
+            passes_by_topic[topic] = [p for p in passes if p.accepts(topic, msgtype)]
+        for message_pass in passes_by_topic[topic]:
+            message_pass.process(topic, timestamp, rawdata)
 
     def _read_mcap_file(mcapfile: str, store_data=False):
         # Reads an mcap file, we can actually use this for db3 files as well but for some reason
@@ -71,56 +107,70 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
         data_by_topic = {}
         fails_by_topic = {}
 
-        reader = rosbag2_py.SequentialReader()
-        reader.open(
-            rosbag2_py.StorageOptions(uri=mcapfile, storage_id='mcap'),
-            rosbag2_py.ConverterOptions(
-                input_serialization_format='cdr', output_serialization_format='cdr'
-            ),
-        )
+        with profiler.stage('open_bag'):
+            reader = rosbag2_py.SequentialReader()
+            reader.open(
+                rosbag2_py.StorageOptions(uri=mcapfile, storage_id='mcap'),
+                rosbag2_py.ConverterOptions(
+                    input_serialization_format='cdr', output_serialization_format='cdr'
+                ),
+            )
 
-        topic_types = reader.get_all_topics_and_types()
+        topic_types = {
+            topic_type.name: topic_type.type for topic_type in reader.get_all_topics_and_types()
+        }
 
-        def typename(topic_name):
-            for topic_type in topic_types:
-                if topic_type.name == topic_name:
-                    return topic_type.type
-            raise ValueError(f'topic {topic_name} not in bag')
+        num_messages = 0
+        with profiler.stage('read_messages') as read_stage:
+            while reader.has_next():
+                topic, data, timestamp = reader.read_next()
+                num_messages += 1
+                msgtype = topic_types[topic]
+                if timed:
+                    decode_start_ns = time.perf_counter_ns()
+                if passes:
+                    _run_passes(topic, msgtype, timestamp, data)
+                    if timed:
+                        passes_end_ns = time.perf_counter_ns()
+                        profiler.topic_time(topic, 'passes', passes_end_ns - decode_start_ns)
+                        decode_start_ns = passes_end_ns
+                try:
+                    msg_type = get_message(msgtype)
+                    # TODO sgillen - this is the bottleneck, for quick tests we don't actually need
+                    # The full message, just the timestamp, but at least for now we still parse the
+                    # whole thing. There are some short term gains we can get for free, like just
+                    # distributing this over X cores ...
+                    msg = deserialize_message(data, msg_type)
+                except Exception as e:
+                    if topic not in fails_by_topic:
+                        fails_by_topic[topic] = True
+                        if verbose >= VERBOSE_ERROR:
+                            print(f'Error deserializing {topic}: {e}. Skipping.')
+                    continue
+                if timed:
+                    profiler.topic_time(topic, 'decode', time.perf_counter_ns() - decode_start_ns)
 
-        while reader.has_next():
-            topic, data, timestamp = reader.read_next()
-            try:
-                msg_type = get_message(typename(topic))
-                # TODO sgillen - this is the bottleneck, for quick tests we don't actually need
-                # The full message, just the timestamp, but at least for now we still parse the
-                # whole thing. There are some short term gains we can get for free, like just
-                # distributing this over X cores ...
-                msg = deserialize_message(data, msg_type)
-            except Exception as e:
-                if topic not in fails_by_topic:
-                    fails_by_topic[topic] = True
-                    if verbose >= VERBOSE_ERROR:
-                        print(f'Error deserializing {topic}: {e}. Skipping.')
-                continue
+                if hasattr(msg, 'header'):
+                    if topic not in data_by_topic:
+                        data_by_topic[topic] = {
+                            'timestamps': [], 'data': [], 'acqtime': [], 'sizes': []}
+                        data_by_topic[topic]['data_type'] = type(msg)
+                    data_by_topic[topic]['timestamps'].append(timestamp)
+                    data_by_topic[topic]['sizes'].append(len(data))
 
-            if hasattr(msg, 'header'):
-                if topic not in data_by_topic:
-                    data_by_topic[topic] = {'timestamps': [], 'data': [], 'acqtime': []}
-                    data_by_topic[topic]['data_type'] = type(msg)
-                data_by_topic[topic]['timestamps'].append(timestamp)
-
-                # TODO (sgillen) if we need to eventually work with larger (10s++ of GB files)
-                # we may need to look into replacing pandas with dask.
-                if store_data:
-                    data_by_topic[topic]['data'].append(msg)
-                if hasattr(msg.header, 'stamp'):
-                    acqtime = msg.header.stamp.nanosec + msg.header.stamp.sec * 1e9
-                    data_by_topic[topic]['acqtime'].append(acqtime)
+                    # TODO (sgillen) if we need to eventually work with larger (10s++ of GB files)
+                    # we may need to look into replacing pandas with dask.
+                    if store_data:
+                        data_by_topic[topic]['data'].append(msg)
+                    if hasattr(msg.header, 'stamp'):
+                        acqtime = msg.header.stamp.nanosec + msg.header.stamp.sec * 1e9
+                        data_by_topic[topic]['acqtime'].append(acqtime)
+                    else:
+                        data_by_topic[topic]['acqtime'].append(None)
                 else:
-                    data_by_topic[topic]['acqtime'].append(None)
-            else:
-                pass
-                # print(f'{topic} has no header')
+                    pass
+                    # print(f'{topic} has no header')
+            read_stage.messages = num_messages
 
         del reader
         return data_by_topic, fails_by_topic
@@ -130,10 +180,21 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
         data_by_topic = {}
         fails_by_topic = {}
 
-        with Reader(db3_dir) as reader:
+        with profiler.stage('open_bag'):
+            reader = Reader(db3_dir)
+        num_messages = 0
+        with reader, profiler.stage('read_messages') as read_stage:
             # Iterate over messages
             for connection, timestamp, rawdata in reader.messages():
                 topic = connection.topic
+                num_messages += 1
+                if timed:
+                    start_ns = time.perf_counter_ns()
+                if passes:
+                    _run_passes(topic, connection.msgtype, timestamp, rawdata)
+                if timed:
+                    decode_start_ns = time.perf_counter_ns()
+                    profiler.topic_time(topic, 'passes', decode_start_ns - start_ns)
                 try:
                     msg = deserialize_cdr(rawdata, connection.msgtype)
                 except Exception as e:
@@ -141,12 +202,17 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
                         fails_by_topic[topic] = True
                         print(f'Error deserializing {topic}: {e}. Skipping.')
                     continue
+                if timed:
+                    profiler.topic_time(
+                        topic, 'decode', time.perf_counter_ns() - decode_start_ns)
 
                 if hasattr(msg, 'header'):
                     if topic not in data_by_topic:
-                        data_by_topic[topic] = {'timestamps': [], 'data': [], 'acqtime': []}
+                        data_by_topic[topic] = {
+                            'timestamps': [], 'data': [], 'acqtime': [], 'sizes': []}
                         data_by_topic[topic]['data_type'] = type(msg)
                     data_by_topic[topic]['timestamps'].append(timestamp)
+                    data_by_topic[topic]['sizes'].append(len(rawdata))
 
                     # TODO (sgillen) if we need to eventually work with larger (10s++ of GB files)
                     # we may need to look into replacing pandas with dask, or find some other way
@@ -160,6 +226,7 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
                 else:
                     pass
                     print(f'{topic} has no header')
+            read_stage.messages = num_messages
         del reader
         return data_by_topic, fails_by_topic
 
@@ -205,16 +272,18 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
         raise
 
     dfs = {}
-    for topic, values in data_by_topic.items():
-        dfs[topic] = pd.DataFrame(
-            {
-                'timestamp': values['timestamps'],
-                'acqtime': values['acqtime'],
-            }
-        )
-        dfs[topic].data_type = type(values['data_type'])
-        if store_data:
-            dfs[topic]['data'] = values['data']
+    with profiler.stage('build_dataframes'):
+        for topic, values in data_by_topic.items():
+            dfs[topic] = pd.DataFrame(
+                {
+                    'timestamp': values['timestamps'],
+                    'acqtime': values['acqtime'],
+                    'size': values['sizes'],
+                }
+            )
+            dfs[topic].data_type = type(values['data_type'])
+            if store_data:
+                dfs[topic]['data'] = values['data']
 
     if verbose >= VERBOSE_INFO:
         print(f'Found the following topics in file {input_file}')
@@ -224,7 +293,360 @@ def read_rosbag(input_file: str, verbose=VERBOSE_WARNING, store_data=False, bagt
     return dfs
 
 
-def do_validation(input_file, verbose=VERBOSE_WARNING, title=None):
+def iter_raw_messages(input_file: str, bagtype='mcap'):
+    """
+    Iterate over the serialized messages of a bag, without deserializing anything.
+
+    Args
+    ----
+        input_file (str): The path to the rosbag file to be read.
+        bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+
+    Yields
+    ------
+        (str, str, int, bytes): topic, message type, log timestamp and serialized message
+
+    """
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f'The specified bag file does not exist: {input_file}')
+
+    if bagtype == 'mcap':
+        import rosbag2_py
+
+        reader = rosbag2_py.SequentialReader()
+        reader.open(
+            rosbag2_py.StorageOptions(uri=input_file, storage_id='mcap'),
+            rosbag2_py.ConverterOptions(
+                input_serialization_format='cdr', output_serialization_format='cdr'
+            ),
+        )
+        topic_types = {
+            topic_type.name: topic_type.type for topic_type in reader.get_all_topics_and_types()
+        }
+        while reader.has_next():
+            topic, data, timestamp = reader.read_next()
+            yield topic, topic_types[topic], timestamp, data
+        del reader
+    elif bagtype == 'db3':
+        from rosbags.rosbag2 import Reader
+
+        with Reader(input_file) as reader:
+            for connection, timestamp, rawdata in reader.messages():
+                yield connection.topic, connection.msgtype, timestamp, rawdata
+    else:
+        raise NotImplementedError(
+            f'Unsupported bag format {bagtype}, supported options are db3 and mcap'
+        )
+
+
+def run_passes(input_file: str, passes, bagtype='mcap', deadline=None):
+    """
+    Run MessagePasses over a bag without deserializing it.
+
+    Use this instead of read_rosbag when only payload level checks are needed. Results are
+    read from the passes after the call.
+
+    Args
+    ----
+        input_file (str): The path to the rosbag file to be read.
+        passes ([MessagePass]): The passes to run.
+        bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+        deadline(float, optional): time.monotonic() after which reading stops early
+
+    Returns
+    -------
+        int: The number of messages read
+        bool: Whether the whole bag was read
+
+    """
+    passes_by_topic = {}
+    num_messages = 0
+    for topic, msgtype, timestamp, rawdata in iter_raw_messages(input_file, bagtype):
+        if deadline is not None and time.monotonic() > deadline:
+            return num_messages, False
+        topic_passes = passes_by_topic.get(topic)
+        if topic_passes is None:
+            topic_passes = passes_by_topic[topic] = [
+                p for p in passes if p.accepts(topic, msgtype)]
+        for message_pass in topic_passes:
+            message_pass.process(topic, timestamp, rawdata)
+        num_messages += 1
+    return num_messages, True
+
+
+def _header_message_type(msgtype):
+    # The message class of a type whose first field is a std_msgs/Header, or None
+    from rosidl_runtime_py.utilities import get_message
+
+    try:
+        message_class = get_message(msgtype)
+    except Exception:
+        return None
+    fields = message_class.get_fields_and_field_types()
+    if next(iter(fields.items()), (None, None)) != ('header', 'std_msgs/Header'):
+        return None
+    return message_class
+
+
+def read_header_timestamps(input_file: str, bagtype='mcap', passes=None, deadline=None):
+    """
+    Read log and header timestamps of a bag straight from CDR, without deserializing.
+
+    Produces the same data frames as read_rosbag (without store_data) at a fraction of the
+    cost, since only the header stamp at the start of every message is decoded.
+
+    Args
+    ----
+        input_file (str): The path to the rosbag file to be read.
+        bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+        passes([MessagePass], optional): Passes that get to see every serialized message of
+            the topics they accept. Results are read from the passes after the call.
+        deadline(float, optional): time.monotonic() after which reading stops early
+
+    Returns
+    -------
+        {str: pd.DataFrame} : The data frames, as returned by read_rosbag, of the messages
+            read before the deadline
+        bool: Whether the whole bag was read
+
+    """
+    passes = passes or []
+    passes_by_topic = {}
+    columns = {}
+    complete = True
+    for topic, msgtype, timestamp, rawdata in iter_raw_messages(input_file, bagtype):
+        if deadline is not None and time.monotonic() > deadline:
+            complete = False
+            break
+        if topic not in passes_by_topic:
+            passes_by_topic[topic] = [p for p in passes if p.accepts(topic, msgtype)]
+            message_class = _header_message_type(msgtype)
+            if message_class is not None:
+                columns[topic] = ([], [], [], type(message_class))
+        for message_pass in passes_by_topic[topic]:
+            message_pass.process(topic, timestamp, rawdata)
+
+        if topic in columns:
+            timestamps, acqtimes, sizes, _ = columns[topic]
+            timestamps.append(timestamp)
+            acqtimes.append(float(header_stamp_ns(rawdata)))
+            sizes.append(len(rawdata))
+
+    dfs = {}
+    for topic, (timestamps, acqtimes, sizes, data_type) in columns.items():
+        dfs[topic] = pd.DataFrame({'timestamp': timestamps, 'acqtime': acqtimes, 'size': sizes})
+        dfs[topic].data_type = data_type
+    return dfs, complete
+
+
+def read_bag_summary(input_file: str, bagtype='mcap'):
+    """
+    Read the per topic message counts of a bag from its metadata, without reading messages.
+
+    Uses the metadata.yaml ros2 bag record writes next to the bag files, and falls back to
+    rosbag2_py.Info if there is none.
+
+    Args
+    ----
+        input_file (str): The bag directory or bag file
+        bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+
+    Returns
+    -------
+        dict: start_ns, duration_s, message_count, size_bytes and topics, which maps every
+            topic to its type and message_count
+
+    """
+    directory = input_file if os.path.isdir(input_file) else os.path.dirname(input_file)
+    metadata_file = os.path.join(directory, 'metadata.yaml')
+    topics = {}
+    if os.path.isfile(metadata_file):
+        import yaml
+
+        with open(metadata_file) as f:
+            info = yaml.safe_load(f)['rosbag2_bagfile_information']
+        start_ns = int(info['starting_time']['nanoseconds_since_epoch'])
+        duration_ns = int(info['duration']['nanoseconds'])
+        for entry in info['topics_with_message_count']:
+            metadata = entry['topic_metadata']
+            topics[metadata['name']] = {
+                'type': metadata['type'], 'message_count': int(entry['message_count'])}
+        files = [os.path.join(directory, name) for name in info['relative_file_paths']]
+    else:
+        import rosbag2_py
+
+        info = rosbag2_py.Info().read_metadata(input_file, bagtype if bagtype != 'db3'
+                                               else 'sqlite3')
+        start_ns = int(info.starting_time.timestamp() * 1e9)
+        duration_ns = int(info.duration.total_seconds() * 1e9)
+        for entry in info.topics_with_message_count:
+            topics[entry.topic_metadata.name] = {
+                'type': entry.topic_metadata.type, 'message_count': int(entry.message_count)}
+        files = [input_file]
+
+    return {
+        'start_ns': start_ns,
+        'duration_s': duration_ns / 1e9,
+        'message_count': sum(topic['message_count'] for topic in topics.values()),
+        'size_bytes': sum(os.path.getsize(path) for path in files if os.path.isfile(path)),
+        'topics': topics,
+    }
+
+
+def read_message_sizes(input_file: str, bagtype='mcap'):
+    """
+    Read the serialized size of every message in a bag, without deserializing anything.
+
+    Unlike read_rosbag this includes topics without a header (e.g. /tf or lidar packets), so
+    the totals match what the recorder actually wrote to disk.
+
+    Args
+    ----
+        input_file (str): The path to the rosbag file to be read.
+        bagtype(str, optional): Flag indicating bag extensions, options are mcap and db3
+
+    Returns
+    -------
+        {str: pd.DataFrame} : A dictionary mapping topic names to a DataFrame with the log
+            timestamp and serialized size in bytes of every message.
+
+    """
+    timestamps = {}
+    sizes = {}
+    for topic, _, timestamp, rawdata in iter_raw_messages(input_file, bagtype):
+        if topic not in timestamps:
+            timestamps[topic] = []
+            sizes[topic] = []
+        timestamps[topic].append(timestamp)
+        sizes[topic].append(len(rawdata))
+
+    return {
+        topic: pd.DataFrame({
+            'timestamp': np.asarray(timestamps[topic], dtype=np.int64),
+            'size': np.asarray(sizes[topic], dtype=np.int64),
+        })
+        for topic in timestamps
+    }
+
+
+def _summed_windows(bandwidth_stats, sensors=None):
+    # Sum the (aligned) bandwidth windows of all topics, grouped by sensor
+    windows_by_sensor = {}
+    for topic, stats in bandwidth_stats.items():
+        if topic == 'total':
+            continue
+        sensor = sensor_name(topic)
+        if sensors is not None and sensor not in sensors:
+            continue
+        windows = stats['bandwidth_windows']['mb_s']
+        if sensor in windows_by_sensor:
+            windows_by_sensor[sensor] = windows_by_sensor[sensor].add(windows, fill_value=0)
+        else:
+            windows_by_sensor[sensor] = windows
+    return windows_by_sensor
+
+
+def sensor_bandwidth(bandwidth_stats, sensors=None):
+    """
+    Sum the bandwidth of all topics of each sensor.
+
+    Args
+    ----
+        bandwidth_stats: stats returned by BagTester.analyze_bandwidth
+        sensors: optional list of sensor names to restrict the result to, e.g. the sensors of
+            an isaac_ros_data_recorder config file
+
+    Returns
+    -------
+        {str: dict}: For each sensor the mean and peak bandwidth in MB/s. Peaks are taken over
+            the summed windows, not summed over per topic peaks.
+
+    """
+    return {
+        sensor: {
+            'mean_mb_s': float(windows.mean()),
+            'peak_mb_s': float(windows.max()),
+        }
+        for sensor, windows in sorted(_summed_windows(bandwidth_stats, sensors).items())
+    }
+
+
+def load_config_sensors(config_file):
+    """Return the list of sensors enabled in an isaac_ros_data_recorder config file."""
+    import yaml
+
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+    return list((config or {}).get('sensors') or {})
+
+
+def check_disk_throughput(bandwidth_stats, disk_mb_s, sensors=None, headroom=0.8):
+    """
+    Check if the recorded bandwidth can be sustained by a disk.
+
+    The recorder buffers messages before writing them, so short bursts above the disk speed
+    are fine as long as the mean stays below it. A set of topics is considered writable when
+    its mean bandwidth is below headroom * disk_mb_s.
+
+    Args
+    ----
+        bandwidth_stats: stats returned by BagTester.analyze_bandwidth
+        disk_mb_s: sustained write throughput of the disk in MB/s
+        sensors: optional list of sensor names to restrict the check to
+        headroom: fraction of the disk throughput that may be used
+
+    Returns
+    -------
+        dict: required mean and peak MB/s, utilization and whether the set is writable
+
+    """
+    windows_by_sensor = _summed_windows(bandwidth_stats, sensors)
+    total = None
+    for windows in windows_by_sensor.values():
+        total = windows if total is None else total.add(windows, fill_value=0)
+
+    mean_mb_s = float(total.mean()) if total is not None else 0.0
+    peak_mb_s = float(total.max()) if total is not None else 0.0
+    return {
+        'disk_mb_s': disk_mb_s,
+        'required_mean_mb_s': mean_mb_s,
+        'required_peak_mb_s': peak_mb_s,
+        'mean_utilization': mean_mb_s / disk_mb_s,
+        'peak_utilization': peak_mb_s / disk_mb_s,
+        'writable': mean_mb_s <= headroom * disk_mb_s,
+        'missing_sensors': sorted(set(sensors or []) - set(windows_by_sensor)),
+        'sensors': sensor_bandwidth(bandwidth_stats, sensors),
+    }
+
+
+def measure_disk_throughput(directory, size_mb=512, block_mb=8):
+    """
+    Measure sustained sequential write throughput of the disk holding directory.
+
+    Writes size_mb of random data to a temporary file, including the final fsync so the page
+    cache does not hide the real disk speed, then deletes it.
+
+    Returns
+    -------
+        float: Write throughput in MB/s
+
+    """
+    import tempfile
+
+    block = os.urandom(block_mb * 1024 * 1024)
+    num_blocks = max(size_mb // block_mb, 1)
+    with tempfile.NamedTemporaryFile(dir=directory) as f:
+        start = time.monotonic()
+        for _ in range(num_blocks):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+        elapsed = time.monotonic() - start
+    return num_blocks * len(block) / 1e6 / elapsed
+
+
+def do_validation(input_file, verbose=VERBOSE_WARNING, title=None, read_lock=None,
+                  profiler=None):
     """
     Validate a single bag file.
 
@@ -235,6 +657,9 @@ def do_validation(input_file, verbose=VERBOSE_WARNING, title=None):
         input_file (str): The bag file to analyze
         verbose (int): The verbosity level
         title (str): Optional, The title for the report
+        read_lock: Optional, lock or semaphore held while the bag is read, to limit the
+            number of bags read from one disk at the same time
+        profiler (Profiler): Optional, records the time and memory of every stage
 
     Returns
     -------
@@ -243,19 +668,330 @@ def do_validation(input_file, verbose=VERBOSE_WARNING, title=None):
         dfs: A dictionary of dataframes used for the tests
 
     """
-    dfs = read_rosbag(input_file, verbose=verbose)
-    all_stats, all_errors = _analyze_single(dfs, verbose=verbose)
+    profiler = profiler or NULL_PROFILER
+    h264_pass = h264.H264Pass()
+    frozen_pass = frozen_frames.FrozenFramePass()
+    rosout_pass = rosout.RosoutPass()
+    with read_lock or contextlib.nullcontext(), profiler.stage('read_rosbag'):
+        dfs = read_rosbag(
+            input_file, verbose=verbose, passes=[h264_pass, frozen_pass, rosout_pass],
+            profiler=profiler)
+    all_stats, all_errors = _analyze_single(dfs, verbose=verbose, profiler=profiler)
+    with profiler.stage('pass_results'):
+        _merge_pass_results(all_stats, all_errors, 'bitstream', *h264_pass.results())
+        _merge_pass_results(all_stats, all_errors, 'frozen', *frozen_pass.results())
+    with profiler.stage('incidents'):
+        all_stats['incidents'] = _find_incidents(dfs, all_errors, rosout_pass.table())
+    with profiler.stage('resources'):
+        _correlate_resources(input_file, dfs, all_stats, all_errors, verbose)
 
     if title is None:
         title = input_file.split('/')[-1]
-    q_scores = _summarize(all_stats, all_errors, dfs, title, verbose)
+    with profiler.stage('summarize'):
+        q_scores = _summarize(all_stats, all_errors, dfs, title, verbose)
 
     return all_stats, all_errors, dfs, q_scores
 
 
+def _recording_dir(input_file):
+    return input_file if os.path.isdir(input_file) else os.path.dirname(input_file)
+
+
+def _correlate_resources(input_file, dfs, all_stats, all_errors, verbose):
+    # Host resources sampled by resource_sampler during the recording
+    recording_dir = _recording_dir(input_file)
+    if os.path.isfile(os.path.join(recording_dir, RESOURCE_FILE)):
+        system, processes = read_resource_samples(recording_dir)
+        all_stats['resources'] = BagTester(dfs, verbose=verbose).correlate_resources(
+            system, processes, incidents.collect_events(dfs, all_errors))
+
+
+def check_bag_summary(summary):
+    """
+    Estimate missing messages per topic from the message counts in the bag metadata.
+
+    Only topics with a known nominal rate (see streaming_stats.NOMINAL_RATES) are checked.
+
+    Args
+    ----
+        summary (dict): The summary returned by read_bag_summary
+
+    Returns
+    -------
+        {str: dict}: For every topic message_count and frequency_hz, plus expected_count and
+            missing_percent for topics with a known nominal rate
+
+    """
+    duration_s = max(summary['duration_s'], 1e-9)
+    stats = {}
+    for topic, info in sorted(summary['topics'].items()):
+        stats[topic] = {
+            'message_count': info['message_count'],
+            'frequency_hz': info['message_count'] / duration_s,
+        }
+        if any(topic.endswith(suffix) for suffix in NOMINAL_RATES):
+            nominal_freq, _ = nominal_rate(topic)
+            expected = int(round(nominal_freq * duration_s)) + 1
+            stats[topic]['expected_count'] = expected
+            stats[topic]['missing_percent'] = max(
+                0.0, 100.0 * (expected - info['message_count']) / expected)
+    return stats
+
+
+def _jsonable(value):
+    # Convert results to something json.dump takes, data frames and arrays are left out
+    if isinstance(value, dict):
+        items = ((str(key), _jsonable(item)) for key, item in value.items())
+        return {key: item for key, item in items if item is not _OMIT}
+    if hasattr(value, '_asdict'):
+        return _jsonable(value._asdict())
+    if isinstance(value, (list, tuple)):
+        return [item for item in map(_jsonable, value) if item is not _OMIT]
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return _OMIT
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+_OMIT = object()
+
+
+def _write_json(path, content):
+    # Written to a temporary file first, so readers never see a half written file
+    import json
+
+    with open(path + '.tmp', 'w') as f:
+        json.dump(_jsonable(content), f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def do_tiered_validation(input_file, budget_s=None, max_tier=2, verbose=VERBOSE_WARNING,
+                         title=None, bagtype='mcap', json_file=None, profiler=None):
+    """
+    Validate a bag in tiers of increasing cost, going as deep as a time budget allows.
+
+    Tier 0 only reads the bag metadata and estimates missing messages from the message
+    counts. Tier 1 reads the header stamps straight from CDR and runs the timing, sync and
+    latency checks of do_validation. Tier 2 runs the bitstream, frozen frame and /rosout passes
+    over the bag again, keeping the data frames of tier 1. Tier 1 stops reading with
+    TIER_1_ANALYSIS_SHARE of the budget left for its analysis, and skips the analysis stages
+    and plots that would start after the deadline. Tier 2 only starts if the duration of
+    tier 1 suggests that it fits. A tier that hits the deadline reports on the part of the
+    bag it read. The report of every tier is printed as soon as the tier
+    is done, and the JSON file is rewritten after every tier.
+
+    Args
+    ----
+        input_file (str): The bag file to analyze
+        budget_s (float): Time budget in seconds, None for no limit
+        max_tier (int): The deepest tier to run
+        verbose (int): The verbosity level
+        title (str): Optional, The title for the report
+        bagtype (str): Bag storage format, mcap or db3
+        json_file (str): Where to write the JSON results, defaults to data_validation.json
+            in the recording directory
+        profiler (Profiler): Optional, records the time and memory of every stage
+
+    Returns
+    -------
+        stats: A dictionary of statistics from the tests, with the tiers that ran under
+            'tiers'
+        errors: A dictionary of errors from the tests
+        dfs: A dictionary of dataframes used for the tests
+        q_scores: The quality scores from tier 1, empty if it did not run
+
+    """
+    profiler = profiler or NULL_PROFILER
+    start = time.monotonic()
+    deadline = start + budget_s if budget_s is not None else None
+    if title is None:
+        title = input_file.rstrip('/').split('/')[-1]
+    if json_file is None:
+        json_file = os.path.join(_recording_dir(input_file), 'data_validation.json')
+
+    tiers = []
+    all_stats = {'tiers': tiers}
+    all_errors = {}
+    dfs = {}
+    q_scores = {}
+
+    def _finish_tier(tier, name, tier_start, complete):
+        tiers.append({
+            'tier': tier,
+            'name': name,
+            'duration_s': time.monotonic() - tier_start,
+            'complete': complete,
+        })
+        print(f'Tier {tier} ({name}) took {tiers[-1]["duration_s"]:.1f} s'
+              f'{"" if complete else ", stopped early by the time budget"}\n', flush=True)
+        _write_json(json_file, {
+            'bag': input_file,
+            'budget_s': budget_s,
+            'tiers': tiers,
+            'stats': all_stats,
+            'num_errors': {
+                topic: {name: entry['num_errors'] for name, entry in errors.items()
+                        if isinstance(entry, dict) and 'num_errors' in entry}
+                for topic, errors in all_errors.items()
+            },
+            'q_scores': q_scores,
+        })
+
+    def _remaining_s():
+        return float('inf') if deadline is None else deadline - time.monotonic()
+
+    # Tier 0: metadata only
+    tier_start = time.monotonic()
+    with profiler.stage('read_bag_summary'):
+        summary = read_bag_summary(input_file, bagtype)
+    all_stats['bag_summary'] = {
+        key: value for key, value in summary.items() if key != 'topics'}
+    all_stats['message_counts'] = check_bag_summary(summary)
+    print(f'Tier 0: {title}, {summary["duration_s"]:.1f} s, '
+          f'{summary["message_count"]} messages, {summary["size_bytes"] / 1e9:.2f} GB')
+    for topic, stats in all_stats['message_counts'].items():
+        missing = stats.get('missing_percent')
+        if missing is not None and missing > 1.0:
+            print(f'Warning: {topic} has {stats["message_count"]} of an expected '
+                  f'{stats["expected_count"]} messages ({missing:.1f}% missing)')
+        elif verbose >= VERBOSE_INFO:
+            print(f'    {topic}: {stats["message_count"]} messages, '
+                  f'{stats["frequency_hz"]:.1f} Hz')
+    _finish_tier(0, 'metadata', tier_start, True)
+    if max_tier < 1 or _remaining_s() <= 0:
+        return all_stats, all_errors, dfs, q_scores
+
+    # Tier 1: header timestamps. Reading stops early enough to leave time for the analysis,
+    # which is skipped stage by stage once the budget is used up.
+    tier_start = time.monotonic()
+    read_deadline = None
+    if deadline is not None:
+        read_deadline = tier_start + _remaining_s() * (1 - TIER_1_ANALYSIS_SHARE)
+    with profiler.stage('read_header_timestamps') as stage:
+        dfs, complete = read_header_timestamps(input_file, bagtype, deadline=read_deadline)
+        stage.messages = sum(len(df) for df in dfs.values())
+    if _remaining_s() > 0:
+        tier_stats, all_errors = _analyze_single(
+            dfs, verbose=verbose, profiler=profiler, deadline=deadline)
+        all_stats.update(tier_stats)
+    if _remaining_s() > 0:
+        with profiler.stage('incidents'):
+            all_stats['incidents'] = _find_incidents(dfs, all_errors)
+        with profiler.stage('resources'):
+            _correlate_resources(input_file, dfs, all_stats, all_errors, verbose)
+    if _remaining_s() > 0:
+        with profiler.stage('summarize'):
+            q_scores = _summarize(all_stats, all_errors, dfs, title, verbose)
+    else:
+        complete = False
+        print('Time budget used up before the tier 1 analysis finished, no report')
+    _finish_tier(1, 'header timestamps', tier_start, complete)
+
+    # Reading the payloads costs a multiple of reading the headers
+    tier_1_s = tiers[-1]['duration_s']
+    if max_tier < 2 or not complete or tier_1_s * TIER_2_COST_FACTOR > _remaining_s():
+        if max_tier >= 2:
+            print(f'Skipping tier 2, estimated {tier_1_s * TIER_2_COST_FACTOR:.0f} s with '
+                  f'{max(_remaining_s(), 0):.0f} s left')
+        return all_stats, all_errors, dfs, q_scores
+
+    # Tier 2: bitstream and payload passes
+    tier_start = time.monotonic()
+    h264_pass = h264.H264Pass()
+    frozen_pass = frozen_frames.FrozenFramePass()
+    rosout_pass = rosout.RosoutPass()
+    # The data frames of tier 1 are kept, only the passes see the bag again
+    with profiler.stage('read_passes') as stage:
+        stage.messages, complete = run_passes(
+            input_file, [h264_pass, frozen_pass, rosout_pass], bagtype, deadline=deadline)
+    with profiler.stage('pass_results'):
+        _merge_pass_results(all_stats, all_errors, 'bitstream', *h264_pass.results())
+        _merge_pass_results(all_stats, all_errors, 'frozen', *frozen_pass.results())
+    with profiler.stage('incidents'):
+        all_stats['incidents'] = _find_incidents(dfs, all_errors, rosout_pass.table())
+
+    print('Tier 2: bitstream and payload checks')
+    for topic, stats in all_stats.items():
+        if not isinstance(stats, dict) or not {'bitstream', 'frozen'} & stats.keys():
+            continue
+        bitstream = h264.format_bitstream(stats['bitstream'], all_errors[topic]) \
+            if 'bitstream' in stats else 'N/A'
+        frozen = frozen_frames.format_frozen(stats['frozen']) if 'frozen' in stats else 'N/A'
+        print(f'    {topic}\n        - Bitstream: {bitstream}\n'
+              f'        - Frozen Frames: {frozen}')
+    incident_stats = all_stats['incidents']
+    print(f'System Wide Incidents: {incident_stats["num_system_incidents"]} '
+          f'(isolated sensor faults: {incident_stats["num_isolated_faults"]})')
+    _print_incidents(incident_stats['system_incidents'], incident_stats['start_ns'])
+    _finish_tier(2, 'bitstream and payload', tier_start, complete)
+    return all_stats, all_errors, dfs, q_scores
+
+
+def collect_bag_events(dfs, verbose=VERBOSE_ERROR):
+    """
+    Run the timing checks of do_validation and return their errors as events.
+
+    Args
+    ----
+        dfs ({str: pd.DataFrame}): The data frames returned by read_rosbag
+        verbose (int): The verbosity level
+
+    Returns
+    -------
+        [incidents.Event]: Drop, desync and latency events of all topics, unsorted
+
+    """
+    _, all_errors = _analyze_single(dfs, verbose=verbose)
+    return incidents.collect_events(dfs, all_errors)
+
+
+def _merge_pass_results(all_stats, all_errors, name, pass_stats, pass_errors):
+    # Attach the results of a MessagePass to the stats of the topics that were analyzed
+    for topic, stats in pass_stats.items():
+        if topic not in all_stats:
+            continue
+        all_stats[topic][name] = stats
+        all_errors.setdefault(topic, {}).update(pass_errors.get(topic, {}))
+
+
+def _find_incidents(dfs, all_errors, log_table=None):
+    # Correlate the errors of all topics into system wide incidents and isolated faults, and
+    # attach the /rosout lines around each of them
+    system_wide, isolated = incidents.find_incidents(incidents.collect_events(dfs, all_errors))
+    if log_table is not None and not log_table.empty:
+        rosout.attach_logs(system_wide, log_table)
+        rosout.attach_logs(isolated, log_table)
+    start_times = [df['timestamp'].min() for df in dfs.values() if len(df)]
+    return {
+        'start_ns': int(min(start_times)) if start_times else 0,
+        'num_system_incidents': len(system_wide),
+        'num_isolated_faults': len(isolated),
+        'system_incidents': system_wide,
+        'isolated_faults': isolated,
+    }
+
+
+def _print_incidents(incident_list, start_ns):
+    # Print incidents with the log lines attached to them
+    for incident in incident_list:
+        print(f'    - {incidents.format_incident(incident, start_ns)}')
+        logs = incident.get('logs')
+        if logs is None or logs.empty:
+            continue
+        for row in logs.head(MAX_INCIDENT_LOGS).itertuples():
+            print(f'        {rosout.format_log_line(row, start_ns)}')
+        if len(logs) > MAX_INCIDENT_LOGS:
+            print(f'        ... {len(logs) - MAX_INCIDENT_LOGS} more log lines')
+
+
 def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
     # Summarize a single bag file, takes in errors and stats and prints a nice report about them
-    if len(all_errors) == 0:
+    if len(all_errors.keys() - {'recorder_latency'}) == 0:
         print('Warning! No cameras found!')
 
     LINE_LENGTH = NUM_BINS + 50
@@ -283,6 +1019,12 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
             all_captures.append(stats['total_frames_captured'])
             drop_tables.append(stats['ascii_drop_table'])
             print(f'{sensor_key_short:<42} [{stats["ascii_drop_table"]}]', file=table_buffer)
+            bitstream = 'N/A'
+            if 'bitstream' in stats:
+                bitstream = h264.format_bitstream(stats['bitstream'], errors)
+            frozen = 'N/A'
+            if 'frozen' in stats:
+                frozen = frozen_frames.format_frozen(stats['frozen'])
             print(
                 f'{sensor_key_short}:\n'
                 f'    - Percent Dropped: {stats["percent_frames_dropped"]}%\n'
@@ -292,7 +1034,10 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
                 f'    - Frames Captured: {stats["total_frames_captured"]}\n'
                 f'    - Total Jitter: {stats["mean_absolute_error_all_ms"]} ms\n'
                 f'    - Jitter Excluding Drops: {stats["mean_absolute_error_filtered_ms"]} ms\n'
-                f'    - Largest Frame Drop: {stats["largest_drop"]} ms\n',
+                f'    - Largest Frame Drop: {stats["largest_drop"]} ms\n'
+                f'    - Periodic Jitter: {_format_spectrum(stats["jitter_spectrum"])}\n'
+                f'    - Bitstream: {bitstream}\n'
+                f'    - Frozen Frames: {frozen}\n',
                 file=output_buffer,
             )
 
@@ -319,7 +1064,8 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
                 f'    - Drop Table: [{stats["ascii_drop_table"]}]\n'
                 f'    - Frames Captured: {stats["total_frames_captured"]}\n'
                 f'    - Total Jitter: {stats["mean_absolute_error_all_ms"]} ms\n'
-                f'    - Jitter Excluding Drops: {stats["mean_absolute_error_filtered_ms"]} ms\n',
+                f'    - Jitter Excluding Drops: {stats["mean_absolute_error_filtered_ms"]} ms\n'
+                f'    - Periodic Jitter: {_format_spectrum(stats["jitter_spectrum"])}\n',
                 file=output_buffer,
             )
         elif sensor_key in (
@@ -384,7 +1130,7 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
         qscore_inter_sync = (100 - (all_stats['inter_camera_sync']['percent_desynced_frames']))
         qscore_inter_sync = f'{qscore_inter_sync:.1f}'
     except Exception as e:
-        qscore_intra_sync = e
+        qscore_inter_sync = e
 
     try:
         qscore_drops = 100 * (1 - sum(all_drops) / (sum(all_captures) + sum(all_drops)))
@@ -441,9 +1187,58 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
         if 'large_drop' in errors and errors['large_drop']['num_errors'] > 0:
             print(f'Warning: {topic} has {errors["large_drop"]["num_errors"]} large drops, '
                   f'greatest was {max(errors["large_drop"]["acqtimes"]) / 1e6} ms')
+        if 'frozen_frame' in errors and errors['frozen_frame']['num_errors'] > 0:
+            print(f'Warning: {topic} has {errors["frozen_frame"]["num_errors"]} frozen frames')
+        for name in h264.ERROR_NAMES:
+            if name in errors and errors[name]['num_errors'] > 0:
+                print(f'Warning: {topic} has {errors[name]["num_errors"]} {name} errors')
 
     print('\n')
 
+    if 'incidents' in all_stats:
+        incident_stats = all_stats['incidents']
+        print(f'System Wide Incidents: {incident_stats["num_system_incidents"]} '
+              f'(isolated sensor faults: {incident_stats["num_isolated_faults"]})')
+        _print_incidents(incident_stats['system_incidents'], incident_stats['start_ns'])
+        if verbose >= VERBOSE_INFO:
+            print('Isolated Sensor Faults:')
+            _print_incidents(incident_stats['isolated_faults'], incident_stats['start_ns'])
+        print('\n')
+
+    if 'recorder_latency' in all_stats:
+        latency_stats = all_stats['recorder_latency']
+        backpressure = latency_stats['recorder_backpressure']
+        print('Recorder Latency (log time - header time, ms):')
+        print(f'    {"topic":<42} {"p50":>9} {"p99":>9} {"p99.9":>9} {"max":>9}')
+        for topic, stats in sorted(latency_stats.items()):
+            if topic == 'recorder_backpressure':
+                continue
+            relative = '' if stats['clock_aligned'] else ' (relative, header not on log clock)'
+            print(f'    {topic:<42} {stats["latency_p50_ms"]:>9.2f} '
+                  f'{stats["latency_p99_ms"]:>9.2f} {stats["latency_p999_ms"]:>9.2f} '
+                  f'{stats["latency_max_ms"]:>9.2f}{relative}')
+        if backpressure['num_episodes']:
+            print(f'Warning: {backpressure["num_episodes"]} recorder back pressure episodes, '
+                  f'{backpressure["total_duration_s"]:.1f} s total')
+            for episode in backpressure['episodes']:
+                print(f'    - {episode["start_s"]:.1f} s to {episode["end_s"]:.1f} s, '
+                      f'peak {episode["peak_excess_ms"]:.1f} ms above median')
+        print('\n')
+
+    if 'resources' in all_stats:
+        resource_stats = all_stats['resources']
+        print(f'Host Resources ({resource_stats["num_samples"]} samples, '
+              f'{resource_stats["num_event_samples"]} around '
+              f'{resource_stats["num_events"]} events):')
+        print(f'    {"":<42} {"mean":>9} {"max":>9} {"events":>9}')
+        rows = [('system', resource_stats['system'])]
+        rows += sorted(resource_stats['processes'].items())
+        for name, metrics in rows:
+            for metric, values in metrics.items():
+                print(f'    {name + " " + metric:<42} {values["mean"]:>9.1f} '
+                      f'{values["max"]:>9.1f} {values["event_mean"]:>9.1f}')
+        print('\n')
+
     print('Topics:')
     for topic in dfs.keys():
         try:
@@ -459,16 +1254,17 @@ def _summarize(all_stats, all_errors, dfs, title, verbose=VERBOSE_WARNING):
     return q_scores
 
 
-def _analyze_single(dfs, verbose=VERBOSE_WARNING):
-    # Analyzes a single bag file
-    bag_tester = BagTester(dfs, verbose=verbose)
+def _test_config():
+    # Nominal rates and sync tolerances of the checks, keyed by message class
+    import nav_msgs.msg
+    import sensor_msgs.msg
 
     # TODO at least add the ability to override specific topic names
     # test_config = {
     #     "/front_stereo_camera/imu": (30.0, 0.01),
     # }
 
-    test_config = {
+    return {
         'camera_acqtime': {
             sensor_msgs.msg._compressed_image.CompressedImage: (30.0, 0.01),
             'max_drops_in_a_row': 2,
@@ -495,15 +1291,18 @@ def _analyze_single(dfs, verbose=VERBOSE_WARNING):
         }
     }
 
+
+def _topic_groups(topics):
+    # The camera, IMU and segway topics checked by _analyze_single
     camera_topics = [
         topic
-        for topic in bag_tester.dfs.keys()
+        for topic in topics
         if 'camera' in topic or 'owl' in topic or 'hawk' in topic
     ]
 
     imu_topics = [
         topic
-        for topic in bag_tester.dfs.keys()
+        for topic in topics
         if 'stereo_imu' in topic
     ]
 
@@ -515,22 +1314,40 @@ def _analyze_single(dfs, verbose=VERBOSE_WARNING):
         '/chassis/battery_state',
         '/chassis/imu'
     ]
+    return camera_topics, imu_topics, segway_topics
 
-    camera_stats, camera_errors = bag_tester.analyze_acquisition_time(
-        camera_topics, test_config['camera_acqtime'], show_error_plots=False)
 
-    sync_stats, sync_errors = bag_tester.check_stereo_sync(
-        camera_topics, test_config['intra_cam_sync'])
+def _analyze_single(dfs, verbose=VERBOSE_WARNING, profiler=None, deadline=None):
+    # Analyzes a single bag file, plots are skipped after the deadline
+    profiler = profiler or NULL_PROFILER
+    bag_tester = BagTester(dfs, verbose=verbose, profiler=profiler, deadline=deadline)
+    test_config = _test_config()
+    camera_topics, imu_topics, segway_topics = _topic_groups(bag_tester.dfs.keys())
 
-    multi_sync_stats, multi_sync_errors = bag_tester.check_multi_sync(
-        camera_topics, test_config['inter_cam_sync'])
+    with profiler.stage('analyze'):
+        with profiler.stage('acquisition_time', topic='cameras'):
+            camera_stats, camera_errors = bag_tester.analyze_acquisition_time(
+                camera_topics, test_config['camera_acqtime'], show_error_plots=False)
 
-    imu_stats, imu_errors = bag_tester.analyze_acquisition_time(
-        imu_topics, test_config['imu_acqtime'], show_error_plots=False)
+        with profiler.stage('stereo_sync'):
+            sync_stats, sync_errors = bag_tester.check_stereo_sync(
+                camera_topics, test_config['intra_cam_sync'])
 
-    segway_stats, segway_errors = bag_tester.analyze_acquisition_time(
-        segway_topics, test_config['intra_cam_sync'], show_error_plots=False
-    )
+        with profiler.stage('multi_sync'):
+            multi_sync_stats, multi_sync_errors = bag_tester.check_multi_sync(
+                camera_topics, test_config['inter_cam_sync'])
+
+        with profiler.stage('acquisition_time', topic='imu'):
+            imu_stats, imu_errors = bag_tester.analyze_acquisition_time(
+                imu_topics, test_config['imu_acqtime'], show_error_plots=False)
+
+        with profiler.stage('acquisition_time', topic='segway'):
+            segway_stats, segway_errors = bag_tester.analyze_acquisition_time(
+                segway_topics, test_config['segway_acqtime'], show_error_plots=False
+            )
+
+        with profiler.stage('latency'):
+            latency_stats, latency_errors = bag_tester.analyze_latency()
 
     # TODO this should probably be in summarize above, but making the topic lists
     # would then need to be replicated ...
@@ -542,8 +1359,12 @@ def _analyze_single(dfs, verbose=VERBOSE_WARNING):
         print('\n------------------ Segway Data ------------------')
         _pretty_print(segway_stats, print_index=(verbose >= VERBOSE_DUMP))
 
-    all_errors = {**camera_errors, **sync_errors, **multi_sync_errors, **segway_errors}
-    all_stats = {**camera_stats, **sync_stats, **multi_sync_stats, **segway_stats}
+    all_errors = {
+        **camera_errors, **sync_errors, **multi_sync_errors, **imu_errors, **segway_errors}
+    all_stats = {**camera_stats, **sync_stats, **multi_sync_stats, **imu_stats, **segway_stats}
+    if latency_stats:
+        all_stats['recorder_latency'] = latency_stats
+        all_errors['recorder_latency'] = latency_errors
     return all_stats, all_errors
 
 
@@ -559,6 +1380,133 @@ def _pretty_print(stats, print_index=False):
         print()
 
 
+def jitter_spectrum(deviations, sample_rate_hz, num_peaks=3, segment_length=1024,
+                    min_energy_fraction=0.05):
+    """
+    Find periodic components in the inter-arrival deviation of a topic.
+
+    Drops or jitter that recur every few seconds (disk flushes, daemons waking up, ...) are
+    invisible in mean and max jitter but show up as peaks in the power spectrum of
+    acqtime.diff() - nominal_period. The spectrum is estimated with Welch's method: the series
+    is split into half overlapping Hann windowed segments whose periodograms are averaged.
+
+    Args
+    ----
+        deviations: Inter-arrival deviations from the nominal period in ns, one per sample
+        sample_rate_hz: Nominal message frequency, used as the sample rate of the series
+        num_peaks: Number of dominant periodicities to report
+        segment_length: Number of samples per Welch segment, limits the longest detectable
+            period to segment_length / sample_rate_hz seconds
+        min_energy_fraction: Periodicities carrying less of the total power are not reported
+
+    Returns
+    -------
+        A list of dicts with keys period_s, frequency_hz, energy_fraction and rms_ms for the
+        dominant periodicities, strongest first. energy_fraction is the share of the total
+        (non DC) deviation power in that peak.
+
+    """
+    deviations = np.asarray(deviations, dtype=float)
+    deviations = deviations[~np.isnan(deviations)]
+    if len(deviations) < 16:
+        return []
+
+    segment_length = min(segment_length, len(deviations))
+    step = segment_length // 2
+    starts = np.arange(0, len(deviations) - segment_length + 1, step)
+    segments = deviations[starts[:, None] + np.arange(segment_length)]
+    segments = segments - segments.mean(axis=1, keepdims=True)
+
+    window = np.hanning(segment_length)
+    power = (np.abs(np.fft.rfft(segments * window, axis=1)) ** 2).mean(axis=0)
+    power /= (window ** 2).sum()
+
+    # Ignore DC, what is left is the variance of the deviation around its mean
+    power[0] = 0
+    total = power.sum()
+    if total <= 0:
+        return []
+
+    # Significant local maxima, with their position refined by a parabolic fit
+    is_peak = np.r_[False, (power[1:-1] > power[:-2]) & (power[1:-1] >= power[2:]), False]
+    peaks = np.flatnonzero(is_peak & (power > 4 * np.median(power[1:])))
+    if len(peaks) == 0:
+        return []
+    left, center, right = power[peaks - 1], power[peaks], power[peaks + 1]
+    positions = peaks + 0.5 * (left - right) / (left - 2 * center + right)
+
+    # Periodic drops are impulse trains whose energy is spread over the harmonics of the
+    # fundamental, so each peak is credited with the consecutive harmonics that are also
+    # peaks. Every peak takes its direct neighbours along to account for leakage.
+    def harmonics(index):
+        found = [index]
+        fundamental = positions[index]
+        for multiple in range(2, len(power)):
+            expected = multiple * fundamental
+            nearest = np.argmin(np.abs(positions - expected))
+            if abs(positions[nearest] - expected) > 0.75:
+                break
+            found.append(nearest)
+            # Higher harmonics pin down the fundamental more precisely
+            fundamental = positions[nearest] / multiple
+        return peaks[found]
+
+    all_harmonics = [harmonics(index) for index in range(len(peaks))]
+    scores = [sum(power[peak - 1:peak + 2].sum() for peak in found) for found in all_harmonics]
+
+    spectrum = []
+    claimed = np.zeros(len(power), dtype=bool)
+    for index in np.argsort(scores)[::-1]:
+        if len(spectrum) == num_peaks or scores[index] < min_energy_fraction * total:
+            break
+        if claimed[peaks[index]]:
+            continue
+        energy = 0.0
+        for peak in all_harmonics[index]:
+            energy += power[peak - 1:peak + 2][~claimed[peak - 1:peak + 2]].sum()
+            claimed[peak - 1:peak + 2] = True
+        if energy < min_energy_fraction * total:
+            continue
+        frequency = positions[index] * sample_rate_hz / segment_length
+        spectrum.append({
+            'period_s': 1 / frequency,
+            'frequency_hz': frequency,
+            'energy_fraction': energy / total,
+            'rms_ms': np.sqrt(energy / len(power)) / 1e6,
+        })
+    return spectrum
+
+
+def _format_spectrum(spectrum):
+    # One line summary of jitter_spectrum for the report
+    if not spectrum:
+        return 'N/A'
+    return ', '.join(f'{peak["period_s"]:.2f} s ({100 * peak["energy_fraction"]:.0f}%)'
+                     for peak in spectrum)
+
+
+def windows_to_table(all_windows):
+    """
+    Flatten the output of BagTester.analyze_windows into a single long format table.
+
+    Args
+    ----
+        all_windows: {str: pd.DataFrame} as returned by BagTester.analyze_windows
+
+    Returns
+    -------
+        pd.DataFrame: One row per topic and window, with a categorical topic column
+
+    """
+    if not all_windows:
+        return pd.DataFrame(
+            columns=['topic', 'window_start_s', 'rate_hz', 'drop_count', 'jitter_rms_ms',
+                     'desync_count'])
+    table = pd.concat(all_windows, names=['topic']).reset_index()
+    table['topic'] = table['topic'].astype('category')
+    return table
+
+
 def create_ascii_table(all_timestamps, bad_indices, total_slots=NUM_BINS):
     """
     Create an ascii table showing bad indices.
@@ -593,20 +1541,35 @@ def create_ascii_table(all_timestamps, bad_indices, total_slots=NUM_BINS):
     return ascii_table
 
 
+def _nearest_differences(acqtimes_0, acqtimes_1):
+    # For every stamp in acqtimes_0, the absolute difference to the closest stamp in acqtimes_1
+    reference = np.sort(acqtimes_1[~np.isnan(acqtimes_1)])
+    if len(reference) == 0:
+        return np.full(len(acqtimes_0), np.nan)
+    upper = np.clip(np.searchsorted(reference, acqtimes_0), 0, len(reference) - 1)
+    lower = np.clip(upper - 1, 0, len(reference) - 1)
+    return np.minimum(np.abs(acqtimes_0 - reference[lower]), np.abs(acqtimes_0 - reference[upper]))
+
+
 class BagTester:
     """Helper for running automated tests on a bag file."""
 
-    def __init__(self, dfs, plot_dir=None, verbose=VERBOSE_WARNING):
+    def __init__(self, dfs, plot_dir=None, verbose=VERBOSE_WARNING, profiler=None,
+                 deadline=None):
         """
         Initialize a BagTester.
 
         dfs: dictionary of dataframes from read_rosbag
         plot_dir: directory to save any plots to
         verbose: verbosity level
+        profiler: Profiler recording the time spent plotting
+        deadline: time.monotonic() after which no more plots are made
 
         """
         self.dfs = dfs
         self.plot_dir = '/tmp/monitor_out/'
+        self.profiler = profiler or NULL_PROFILER
+        self.deadline = deadline
 
     def analyze_acquisition_time(self, topics, test_config, **kwargs):
         """
@@ -748,6 +1711,7 @@ class BagTester:
             (filtered_acqtime_diffs - nominal_period_ns).abs().max() / 1e6,
             'std_ms': acqtime_diffs.std() / 1e6,
             'std_filtered_ms': filtered_acqtime_diffs.std() / 1e6,
+            'jitter_spectrum': jitter_spectrum(acqtime_diffs - nominal_period_ns, nominal_freq),
         }
 
         errors = {
@@ -773,6 +1737,18 @@ class BagTester:
             }
         }
 
+        show = show_all_plots or errors['frame_drop']['num_errors'] and show_error_plots
+        past_deadline = self.deadline is not None and time.monotonic() > self.deadline
+        if (self.plot_dir or show) and not past_deadline:
+            with self.profiler.stage('plot', topic=topic):
+                self._plot_acquisition_time(topic, acqtime_diffs, filtered_acqtime_diffs, show)
+
+        return stats, errors
+
+    def _plot_acquisition_time(self, topic, acqtime_diffs, filtered_acqtime_diffs, show):
+        # Plots are only made when saved or shown, matplotlib alone takes a second to import
+        import matplotlib.pyplot as plt
+
         # Convert the difference from nanoseconds to microseconds for plotting
         us_diff_all = (acqtime_diffs - acqtime_diffs.mean()) / 1e3
         fig, axs = plt.subplots(1, 2, figsize=(10, 4))
@@ -803,13 +1779,374 @@ class BagTester:
             fig.savefig(
                 os.path.join(self.plot_dir, f'{safe_topic}_analysis.png'))
 
-        if show_all_plots or errors['frame_drop'][
-                'num_errors'] and show_error_plots:
+        if show:
             plt.show()
         plt.close(fig)
 
+    def analyze_windows(self, topics, test_config, sync_config=None, window_s=1.0):
+        """
+        Compute quality metrics over consecutive time windows.
+
+        Unlike the ascii tables, which only say whether a slot had any bad sample, this gives
+        rate, drop count, jitter and desync count for every window so it is possible to see
+        exactly when quality degraded in a long recording. Windows are aligned across topics,
+        starting at the earliest acqtime of all analyzed topics.
+
+        Args
+        ----
+            topics: list of topics to analyze
+            test_config: dict of test configs, same as for analyze_acquisition_time
+            sync_config: dict of stereo sync configs, same as for check_stereo_sync. If not
+                given, desync_count is left empty
+            window_s: window length in seconds
+
+        Returns
+        -------
+            {str: pd.DataFrame}: For each topic a DataFrame indexed by window start in seconds
+                with columns rate_hz, drop_count, jitter_rms_ms and desync_count
+
+        """
+        if isinstance(topics, str):
+            topics = [topics]
+        topics = [topic for topic in topics if topic in self.dfs and len(self.dfs[topic]) > 1]
+        if not topics:
+            return {}
+
+        window_ns = window_s * 1e9
+        acqtimes = {topic: self.dfs[topic]['acqtime'].to_numpy(dtype=float) for topic in topics}
+        start_ns = min(np.nanmin(acqtime) for acqtime in acqtimes.values())
+        windows = {
+            topic: (acqtime - start_ns) // window_ns for topic, acqtime in acqtimes.items()
+        }
+        num_windows = int(max(np.nanmax(window) for window in windows.values())) + 1
+
+        desyncs = {}
+        if sync_config is not None:
+            for left, right in pair_stereo_topics(topics):
+                differences = _nearest_differences(acqtimes[left], acqtimes[right])
+                desynced = differences > sync_config['sync_tolerance_ns']
+                counts = self._window_sum(windows[left], desynced, num_windows)
+                desyncs[left] = counts
+                desyncs[right] = counts
+
+        all_windows = {}
+        for topic in topics:
+            nominal_freq, tol = test_config.get(self.dfs[topic].data_type, (30.0, 0.5))
+            nominal_period_ns = (1 / nominal_freq) * 1e9
+            threshold_ns = tol * nominal_period_ns
+
+            window = windows[topic]
+            errors = np.diff(acqtimes[topic]) - nominal_period_ns
+            abs_errors = np.abs(errors)
+            dropped = abs_errors > threshold_ns
+            frames_dropped = np.where(
+                dropped, np.maximum(abs_errors // nominal_period_ns, 1), 0)
+
+            # Differences belong to the window of the later sample
+            counts = self._window_sum(window, 1, num_windows)
+            drop_counts = self._window_sum(window[1:], frames_dropped, num_windows)
+            kept = self._window_sum(window[1:], ~dropped, num_windows)
+            squared = self._window_sum(window[1:], np.where(dropped, 0, errors ** 2), num_windows)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                jitter_rms_ms = np.sqrt(squared / kept) / 1e6
+
+            all_windows[topic] = pd.DataFrame(
+                {
+                    'rate_hz': (counts / window_s).astype(np.float32),
+                    'drop_count': drop_counts.astype(np.int32),
+                    'jitter_rms_ms': jitter_rms_ms.astype(np.float32),
+                    'desync_count': desyncs.get(topic, np.full(num_windows, np.nan)),
+                },
+                index=pd.Index(np.arange(num_windows) * window_s, name='window_start_s'),
+            )
+            all_windows[topic].attrs['start_ns'] = start_ns
+
+        return all_windows
+
+    @staticmethod
+    def _window_sum(window, weights, num_windows):
+        # Sum weights per window, ignoring samples without a valid acqtime
+        valid = ~np.isnan(window)
+        weights = np.broadcast_to(weights, window.shape)[valid]
+        return np.bincount(window[valid].astype(np.int64), weights=weights, minlength=num_windows)
+
+    @staticmethod
+    def _latency_chunks(df, start_ns, window_ns, offset_ns=0.0):
+        # Yield (rows, window, latency) for slices of LATENCY_CHUNK_SIZE messages, so no array
+        # over all messages of a topic is allocated
+        log_times = df['timestamp']
+        acqtimes = df['acqtime']
+        for first in range(0, len(df), LATENCY_CHUNK_SIZE):
+            rows = slice(first, first + LATENCY_CHUNK_SIZE)
+            log_time = log_times.iloc[rows].to_numpy(dtype=float)
+            latency = log_time - acqtimes.iloc[rows].to_numpy(dtype=float) - offset_ns
+            yield rows, (log_time - start_ns) // window_ns, latency
+
+    def analyze_latency(self, topics=None, window_s=1.0, spike_threshold_ms=50.0,
+                        min_topic_fraction=0.75):
+        """
+        Analyze capture to disk latency, the difference between bag log time and header time.
+
+        Latency is windowed on the log time, since that is the clock of the recorder. A window
+        is part of a back pressure episode when the mean latency of at least min_topic_fraction
+        of the topics active in it is more than spike_threshold_ms above their median, i.e. when
+        the recorder falls behind on all topics at once rather than one sensor being late.
+
+        Latency is computed in slices of LATENCY_CHUNK_SIZE messages and percentiles come from
+        a StreamingHistogram, so besides the data frames memory only grows with the number of
+        windows and of reported spikes, not with the number of messages.
+
+        Args
+        ----
+            topics: list of topics to analyze, defaults to all topics with a header stamp
+            window_s: window length in seconds
+            spike_threshold_ms: latency above the topic median that counts as elevated
+            min_topic_fraction: fraction of active topics that need to be elevated in a window
+                for it to count as back pressure
+
+        Returns
+        -------
+            stats: per topic latency percentiles and a DataFrame of latency over time, plus
+                'recorder_backpressure' with the detected episodes
+            errors: per topic 'latency_spike' errors, plus 'recorder_backpressure'
+
+        """
+        if topics is None:
+            topics = list(self.dfs.keys())
+        elif isinstance(topics, str):
+            topics = [topics]
+
+        topics = [
+            topic for topic in topics
+            if topic in self.dfs and len(self.dfs[topic]) and
+            self.dfs[topic]['acqtime'].notna().any()
+        ]
+        if not topics:
+            return {}, {}
+
+        window_ns = window_s * 1e9
+        start_ns = min(float(self.dfs[topic]['timestamp'].min()) for topic in topics)
+        end_ns = max(float(self.dfs[topic]['timestamp'].max()) for topic in topics)
+        num_windows = int((end_ns - start_ns) // window_ns) + 1
+        spike_threshold_ns = spike_threshold_ms * 1e6
+
+        stats = {}
+        errors = {}
+        # Per window: topics with samples, topics whose mean is elevated, the largest excess
+        num_active = np.zeros(num_windows, dtype=np.int64)
+        num_elevated = np.zeros(num_windows, dtype=np.int64)
+        peak_excess = np.full(num_windows, np.nan)
+        for topic in topics:
+            df = self.dfs[topic]
+            # The median latency is on the log clock when fewer than half of the samples are
+            # more than MAX_CLOCK_OFFSET_NS off on either side
+            num_valid = num_below = num_above = 0
+            min_latency = np.inf
+            for _, _, latency in self._latency_chunks(df, start_ns, window_ns):
+                valid = latency[~np.isnan(latency)]
+                if len(valid):
+                    num_valid += len(valid)
+                    num_below += int((valid <= -MAX_CLOCK_OFFSET_NS).sum())
+                    num_above += int((valid >= MAX_CLOCK_OFFSET_NS).sum())
+                    min_latency = min(min_latency, valid.min())
+            clock_aligned = bool(2 * max(num_below, num_above) < num_valid)
+            offset_ns = 0.0 if clock_aligned else min_latency
+
+            histogram = StreamingHistogram()
+            counts = np.zeros(num_windows)
+            sums = np.zeros(num_windows)
+            maxima = np.full(num_windows, np.nan)
+            for _, window, latency in self._latency_chunks(df, start_ns, window_ns, offset_ns):
+                histogram.add(latency)
+                counts += self._window_sum(window, ~np.isnan(latency), num_windows)
+                sums += self._window_sum(window, np.nan_to_num(latency), num_windows)
+                valid = ~np.isnan(latency)
+                np.fmax.at(maxima, window[valid].astype(np.int64), latency[valid])
+            p50 = histogram.percentile(50)
+
+            spike_indices = []
+            spike_latencies = []
+            for rows, _, latency in self._latency_chunks(df, start_ns, window_ns, offset_ns):
+                spikes = np.flatnonzero(latency - p50 > spike_threshold_ns)
+                spike_indices.extend(df.index[rows.start + spikes])
+                spike_latencies.extend(latency[spikes])
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = sums / counts
+            excess = means - p50
+            active = counts > 0
+            num_active += active
+            num_elevated += active & (excess > spike_threshold_ns)
+            peak_excess = np.fmax(peak_excess, excess)
+
+            stats[topic] = {
+                'clock_aligned': clock_aligned,
+                'latency_p50_ms': p50 / 1e6,
+                'latency_p99_ms': histogram.percentile(99) / 1e6,
+                'latency_p999_ms': histogram.percentile(99.9) / 1e6,
+                'latency_max_ms': float(histogram.max / 1e6),
+                'latency_windows': pd.DataFrame(
+                    {
+                        'mean_ms': (means / 1e6).astype(np.float32),
+                        'max_ms': (maxima / 1e6).astype(np.float32),
+                    },
+                    index=pd.Index(np.arange(num_windows) * window_s, name='window_start_s'),
+                ),
+            }
+            errors[topic] = {
+                'latency_spike': {
+                    'num_errors': len(spike_indices),
+                    'indices': spike_indices,
+                    'acqtimes': spike_latencies,
+                },
+            }
+
+        backpressure = (num_active >= 2) & (num_elevated >= min_topic_fraction * num_active)
+
+        episodes = []
+        edges = np.diff(np.concatenate([[0], backpressure.astype(np.int8), [0]]))
+        for first, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            episodes.append({
+                'start_s': float(first * window_s),
+                'end_s': float(end * window_s),
+                'peak_excess_ms': float(np.nanmax(peak_excess[first:end]) / 1e6),
+            })
+
+        stats['recorder_backpressure'] = {
+            'num_episodes': len(episodes),
+            'total_duration_s': sum(e['end_s'] - e['start_s'] for e in episodes),
+            'episodes': episodes,
+        }
+        errors['recorder_backpressure'] = {
+            'backpressure': {
+                'num_errors': len(episodes),
+                'indices': [e['start_s'] for e in episodes],
+                'acqtimes': [e['peak_excess_ms'] * 1e6 for e in episodes],
+            },
+        }
         return stats, errors
 
+    def analyze_bandwidth(self, topics=None, window_s=1.0, burst_window_s=0.1):
+        """
+        Analyze the serialized byte rate per topic.
+
+        Needs a 'size' column in the data frames, as returned by read_rosbag or
+        read_message_sizes. Windows are based on the log time and aligned across topics, so
+        they can be summed to get the bandwidth of a group of topics.
+
+        Args
+        ----
+            topics: list of topics to analyze, defaults to all topics
+            window_s: window length in seconds for the throughput over time
+            burst_window_s: shorter window length used to find burst peaks
+
+        Returns
+        -------
+            {str: dict}: For each topic, and for 'total' over all of them: total_mb,
+                mean_mb_s, mean_message_kb, peak_mb_s (per window), burst_mb_s (per burst
+                window) and a bandwidth_windows DataFrame with the MB/s of every window
+
+        """
+        if topics is None:
+            topics = list(self.dfs.keys())
+        elif isinstance(topics, str):
+            topics = [topics]
+        topics = [
+            topic for topic in topics
+            if topic in self.dfs and 'size' in self.dfs[topic] and len(self.dfs[topic])
+        ]
+        if not topics:
+            return {}
+
+        log_times = {topic: self.dfs[topic]['timestamp'].to_numpy(dtype=float) for topic in topics}
+        sizes = {topic: self.dfs[topic]['size'].to_numpy(dtype=float) for topic in topics}
+        start_ns = min(log_time.min() for log_time in log_times.values())
+        end_ns = max(log_time.max() for log_time in log_times.values())
+        duration_s = max((end_ns - start_ns) / 1e9, window_s)
+        num_windows = int((end_ns - start_ns) // (window_s * 1e9)) + 1
+        num_bursts = int((end_ns - start_ns) // (burst_window_s * 1e9)) + 1
+        index = pd.Index(np.arange(num_windows) * window_s, name='window_start_s')
+
+        def _stats(log_time, size):
+            windows = self._window_sum(
+                (log_time - start_ns) // (window_s * 1e9), size, num_windows) / 1e6 / window_s
+            bursts = self._window_sum(
+                (log_time - start_ns) // (burst_window_s * 1e9), size, num_bursts)
+            return {
+                'total_mb': float(size.sum() / 1e6),
+                'mean_mb_s': float(size.sum() / 1e6 / duration_s),
+                'mean_message_kb': float(size.mean() / 1e3),
+                'peak_mb_s': float(windows.max()),
+                'burst_mb_s': float(bursts.max() / 1e6 / burst_window_s),
+                'bandwidth_windows': pd.DataFrame(
+                    {'mb_s': windows.astype(np.float32)}, index=index),
+            }
+
+        stats = {topic: _stats(log_times[topic], sizes[topic]) for topic in topics}
+        stats['total'] = _stats(
+            np.concatenate(list(log_times.values())), np.concatenate(list(sizes.values())))
+        return stats
+
+    def correlate_resources(self, system, processes, events, window_s=0.5):
+        """
+        Compare host resource usage around events with the usage over the whole recording.
+
+        Resource samples and events are both on the wall clock the bag log times use. A
+        sample belongs to an event if it is within window_s of it.
+
+        Args
+        ----
+            system: system table from resource_sampler.read_resource_samples
+            processes: process table from resource_sampler.read_resource_samples
+            events: events from incidents.collect_events, e.g. frame drops
+            window_s: how far before and after an event samples are attributed to it
+
+        Returns
+        -------
+            dict: num_samples, num_events, num_event_samples, and mean, max and event_mean
+                (mean over the samples around events, NaN without events) of every metric,
+                under 'system' and under 'processes' by process label
+
+        """
+        window_ns = int(window_s * 1e9)
+        starts = np.sort(np.array([event.start_ns for event in events], dtype=np.int64))
+        ends = np.sort(np.array([event.end_ns for event in events], dtype=np.int64))
+
+        def _near_events(times):
+            # A sample is near an event if more event windows started before it than ended
+            started = np.searchsorted(starts - window_ns, times, side='right')
+            ended = np.searchsorted(ends + window_ns, times, side='left')
+            return started > ended
+
+        def _metrics(table, columns):
+            near = _near_events(table['time_ns'].to_numpy())
+            metrics = {}
+            for column in columns:
+                values = table[column].to_numpy(dtype=float)
+                if np.isnan(values).all():
+                    continue
+                metrics[column] = {
+                    'mean': float(np.nanmean(values)),
+                    'max': float(np.nanmax(values)),
+                    'event_mean': float(np.nanmean(values[near]))
+                    if near.any() and not np.isnan(values[near]).all() else float('nan'),
+                }
+            return metrics, int(near.sum())
+
+        system_metrics, num_event_samples = _metrics(
+            system, ['cpu_percent', 'iowait_percent', 'mem_available_mb', 'disk_write_mb_s'])
+        process_metrics = {}
+        for label, table in processes.groupby('label', sort=True):
+            process_metrics[label], _ = _metrics(
+                table, ['cpu_percent', 'rss_mb', 'blkio_percent', 'write_mb_s'])
+        return {
+            'num_samples': len(system),
+            'num_events': len(events),
+            'num_event_samples': num_event_samples,
+            'system': system_metrics,
+            'processes': process_metrics,
+        }
+
     def check_stereo_sync(self, topics, test_config, **kwargs):
         """
         Check sync between left/right versions of a topic.
@@ -833,43 +2170,14 @@ class BagTester:
             errors (dict): Dictionary of errors
 
         """
-
-        def pair_topics_with_multiple_types(topics):
-            paired = []
-            topics_dict = {}
-
-            # Create a dictionary with key as the base topic
-            for topic in topics:
-                parts = topic.split('/')
-                base_topic = '/'.join(parts[:-2])
-                side = parts[-2]
-                topic_type = parts[-1]
-                if base_topic not in topics_dict:
-                    topics_dict[base_topic] = {}
-                if topic_type not in topics_dict[base_topic]:
-                    topics_dict[base_topic][topic_type] = {
-                        'left': None,
-                        'right': None
-                    }
-                topics_dict[base_topic][topic_type][side] = topic
-
-            # Pair the topics based on left and right parts for each type
-            for base_topic, types in topics_dict.items():
-                for topic_type, sides in types.items():
-                    if sides['left'] and sides['right']:
-                        paired.append((sides['left'], sides['right']))
-
-            return paired
-
-        paired_topics = pair_topics_with_multiple_types(topics)
-        paired_topics
+        paired_topics = pair_stereo_topics(topics)
 
         all_stats = {}
         all_errors = {}
         for pair in paired_topics:
             stats, errors = self._check_stereo_sync(pair, test_config,
                                                     **kwargs)
-            sync_name = ''.join(pair[0].split('left/')) + '/sync'
+            sync_name = stereo_sync_name(pair[0])
             all_stats[sync_name] = stats
             all_errors[sync_name] = errors
 
@@ -886,17 +2194,14 @@ class BagTester:
         else:
             acqtimes = self.dfs[topics[1]]['acqtime']
 
-        differences = pd.Series(np.zeros(len(acqtimes_0)))
-        for i, ts in enumerate(acqtimes_0):
-            closest_index = np.abs(acqtimes_1 - ts).idxmin()
-            difference = abs(ts - acqtimes_1[closest_index])
-            differences[i] = difference
+        differences = pd.Series(_nearest_differences(acqtimes_0.to_numpy(dtype=float),
+                                                     acqtimes_1.to_numpy(dtype=float)))
 
         desynced_ts = differences > sync_tolerance_ns
+        desynced_indices = desynced_ts.index[desynced_ts]
 
         try:
-            ascii_table = create_ascii_table(acqtimes,
-                                             desynced_ts.index[desynced_ts])
+            ascii_table = create_ascii_table(acqtimes, desynced_indices)
         except Exception as e:
             ascii_table = e
 
@@ -907,8 +2212,9 @@ class BagTester:
         max_diff = differences.max()
 
         stats = {
-            'indices_desynced': desynced_ts.index.to_list(),
-            'timestamped_desynced': acqtimes[desynced_ts.index],
+            'topics': list(topics),
+            'indices_desynced': desynced_indices.to_list(),
+            'timestamped_desynced': acqtimes[desynced_indices],
             'ascii_table': ascii_table,
             'num_desynced_frames': num_desynced_frames,
             'percent_desynced_frames': percent_desynced,
@@ -919,8 +2225,8 @@ class BagTester:
         errors = {
             'desync': {
                 'num_errors': num_desynced_frames,
-                'indices': desynced_ts.index.to_list(),
-                'acqtimes': acqtimes[desynced_ts.index].to_list()
+                'indices': desynced_indices.to_list(),
+                'acqtimes': acqtimes[desynced_indices].to_list()
             }
         }
         return stats, errors
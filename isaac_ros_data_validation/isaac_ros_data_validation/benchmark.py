@@ -0,0 +1,505 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from isaac_ros_data_validation.verbosity import VERBOSE_ERROR
+
+"""
+Benchmark the validation and conversion stages on synthetic recordings, e.g.
+python -m isaac_ros_data_validation.benchmark run --output baseline.json
+python -m isaac_ros_data_validation.benchmark compare baseline.json current.json
+or, once installed, ros2 run isaac_ros_data_validation benchmark run ...
+
+Fixtures are written by synthetic_bag with a fixed seed, so every run on every machine reads the
+same recordings, and kept in --fixtures-dir for the next run. Each stage is run once with
+tracemalloc for its peak memory and then --repeat times for its latency. Throughput is the
+messages and bytes a stage consumes divided by its median latency.
+
+compare flags stages whose median latency or peak memory grew by more than the tolerance, or
+that were measured in the baseline but failed or are missing now, and exits with 1 if there
+are any, so it can gate CI. Stages skipped for a missing optional dependency are listed but
+not flagged.
+"""
+
+BASELINE_VERSION = 1
+FIXTURE_SEED = 0
+# Fixtures from a single Hawk to a full Nova Carter, and from 1 minute to 1 hour
+FIXTURES = {
+    'hawk-1_1min': {'duration_s': 60.0, 'hawks': 1, 'owls': 0, 'lidar': False,
+                    'camera_kb': 20.0},
+    'nova-carter_1min': {'duration_s': 60.0, 'hawks': 4, 'owls': 4, 'lidar': True,
+                         'camera_kb': 20.0},
+    'nova-carter_10min': {'duration_s': 600.0, 'hawks': 4, 'owls': 4, 'lidar': True,
+                          'camera_kb': 20.0},
+    'nova-carter_1h': {'duration_s': 3600.0, 'hawks': 4, 'owls': 4, 'lidar': True,
+                       'camera_kb': 5.0},
+}
+DEFAULT_FIXTURES = ['hawk-1_1min', 'nova-carter_1min']
+# Changes below these are noise, whatever the relative change
+MIN_LATENCY_CHANGE_S = 0.01
+MIN_MEMORY_CHANGE_MB = 1.0
+
+
+class Skipped(Exception):
+    """A stage that can not run here, e.g. without ffmpeg or the ROS message packages."""
+
+
+def fixture_path(fixtures_dir, name, storage='mcap'):
+    """
+    Return the bag directory of a fixture, writing it if it does not exist yet.
+
+    Args
+    ----
+        fixtures_dir (str): Directory holding the fixtures
+        name (str): A key of FIXTURES
+        storage (str): Bag storage format, mcap or db3
+
+    Returns
+    -------
+        str: The bag directory, with the bag, metadata.yaml and ground_truth.json
+
+    """
+    from isaac_ros_data_validation.synthetic_bag import generate_bag, nova_carter_sensors
+
+    params = dict(FIXTURES[name], storage=storage, seed=FIXTURE_SEED)
+    bag_dir = os.path.join(fixtures_dir, f'{name}_{storage}')
+    params_file = os.path.join(bag_dir, 'fixture.json')
+    if os.path.isfile(params_file):
+        with open(params_file) as f:
+            if json.load(f) == params:
+                return bag_dir
+        shutil.rmtree(bag_dir)
+
+    print(f'Writing fixture {name} to {bag_dir}', flush=True)
+    sensors = nova_carter_sensors(params['hawks'], params['owls'], params['lidar'])
+    generate_bag(bag_dir, storage, params['duration_s'], sensors,
+                 camera_bytes=int(params['camera_kb'] * 1000), seed=FIXTURE_SEED)
+    with open(params_file, 'w') as f:
+        json.dump(params, f, indent=2)
+    return bag_dir
+
+
+def _bag_file(bag_dir, storage):
+    # read_rosbag takes the .mcap file, or the directory of a db3 bag
+    if storage == 'db3':
+        return bag_dir
+    return os.path.join(bag_dir, f'{os.path.basename(bag_dir)}_0.mcap')
+
+
+def measure(function, repeat=3, messages=0, num_bytes=0):
+    """
+    Measure the latency, throughput and peak memory of a stage.
+
+    The first run is traced with tracemalloc for the peak memory, which slows it down, so the
+    latency is taken from the following runs.
+
+    Args
+    ----
+        function (callable): The stage, called without arguments
+        repeat (int): Number of timed runs
+        messages (int): Number of messages the stage consumes, for the throughput
+        num_bytes (int): Number of bytes the stage consumes, for the throughput
+
+    Returns
+    -------
+        (dict, object): The measurements and the return value of the last run
+
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - start)
+
+    median = statistics.median(latencies)
+    return {
+        'latency_s': {'min': min(latencies), 'median': median, 'max': max(latencies)},
+        'repeat': len(latencies),
+        'messages': messages,
+        'mb': num_bytes / 1e6,
+        'msgs_per_s': messages / median if median else None,
+        'mb_per_s': num_bytes / 1e6 / median if median else None,
+        'peak_mb': peak / 1e6,
+    }, result
+
+
+def _load_script(scripts_dir, name):
+    # The converters are installed as scripts of isaac_ros_data_replayer, not as a module
+    path = os.path.join(scripts_dir or '', f'{name}.py')
+    if not scripts_dir or not os.path.isfile(path):
+        raise Skipped(f'{name}.py not found, pass --scripts-dir')
+    spec = importlib.util.spec_from_file_location(f'_benchmark_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        raise Skipped(str(e))
+    return module
+
+
+def default_scripts_dir():
+    """Return the isaac_ros_data_replayer scripts, installed or next to this source tree."""
+    try:
+        from ament_index_python.packages import get_package_prefix
+        return os.path.join(get_package_prefix('isaac_ros_data_replayer'), 'lib',
+                            'isaac_ros_data_replayer')
+    except Exception:
+        pass
+    source_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                              'isaac_ros_data_replayer', 'scripts')
+    return os.path.normpath(source_dir) if os.path.isdir(source_dir) else None
+
+
+def _checks(dfs):
+    # Every BagTester check, with the configs _analyze_single uses, and the topics it reads
+    from isaac_ros_data_validation import bag_tools
+
+    test_config = bag_tools._test_config()
+    camera_topics, imu_topics, segway_topics = bag_tools._topic_groups(dfs.keys())
+    return [
+        ('acquisition_time.cameras', camera_topics, lambda tester: tester.analyze_acquisition_time(
+            camera_topics, test_config['camera_acqtime'], show_error_plots=False)),
+        ('stereo_sync', camera_topics, lambda tester: tester.check_stereo_sync(
+            camera_topics, test_config['intra_cam_sync'])),
+        ('multi_sync', camera_topics, lambda tester: tester.check_multi_sync(
+            camera_topics, test_config['inter_cam_sync'])),
+        ('acquisition_time.imu', imu_topics, lambda tester: tester.analyze_acquisition_time(
+            imu_topics, test_config['imu_acqtime'], show_error_plots=False)),
+        ('acquisition_time.segway', segway_topics,
+         lambda tester: tester.analyze_acquisition_time(
+             segway_topics, test_config['segway_acqtime'], show_error_plots=False)),
+        ('windows', camera_topics, lambda tester: tester.analyze_windows(
+            camera_topics, test_config['camera_acqtime'], test_config['intra_cam_sync'])),
+        ('latency', list(dfs), lambda tester: tester.analyze_latency()),
+        ('bandwidth', list(dfs), lambda tester: tester.analyze_bandwidth()),
+    ]
+
+
+def run_fixture(bag_dir, storage='mcap', repeat=3, scripts_dir=None, work_dir=None):
+    """
+    Benchmark all stages on one fixture.
+
+    Args
+    ----
+        bag_dir (str): The fixture, as returned by fixture_path
+        storage (str): Bag storage format of the fixture, mcap or db3
+        repeat (int): Number of timed runs per stage
+        scripts_dir (str): Directory of the isaac_ros_data_replayer scripts
+        work_dir (str): Directory for the converter outputs, a temporary one if not given
+
+    Returns
+    -------
+        {str: dict}: The measurements of every stage, or {'skipped': reason}
+
+    """
+    from isaac_ros_data_validation import bag_tools
+
+    with open(os.path.join(bag_dir, 'ground_truth.json')) as f:
+        truth = json.load(f)
+    bag_file = _bag_file(bag_dir, storage)
+    bag_bytes = sum(os.path.getsize(os.path.join(bag_dir, name))
+                    for name in os.listdir(bag_dir) if name.endswith(f'.{storage}'))
+    bag_messages = sum(topic['message_count'] for topic in truth['topics'].values())
+    results = {}
+
+    def _stage(name, function, messages=0, num_bytes=0):
+        print(f'  {name}', flush=True)
+        try:
+            # The checks print their reports, which are not part of the benchmark
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                results[name], result = measure(function, repeat, messages, num_bytes)
+            return result
+        except (ImportError, Skipped) as e:
+            results[name] = {'skipped': str(e)}
+        except Exception as e:
+            results[name] = {'failed': f'{type(e).__name__}: {e}'}
+        return None
+
+    dfs = _stage('read_rosbag', lambda: bag_tools.read_rosbag(
+        bag_file, verbose=VERBOSE_ERROR, bagtype=storage), bag_messages, bag_bytes)
+
+    if dfs is not None:
+        for name, topics, check in _checks(dfs):
+            rows = sum(len(dfs[topic]) for topic in topics if topic in dfs)
+            # The checks may replace data frames in the dictionary, e.g. to skip the first IMU
+            # samples, so every run gets its own
+            _stage(f'bag_tester.{name}',
+                   lambda check=check: check(bag_tools.BagTester(dict(dfs),
+                                                                 verbose=VERBOSE_ERROR)),
+                   rows)
+        analyzed = dict(dfs)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            all_stats, all_errors = bag_tools._analyze_single(analyzed, verbose=VERBOSE_ERROR)
+        _stage('_summarize', lambda: bag_tools._summarize(
+            all_stats, all_errors, analyzed, os.path.basename(bag_dir), VERBOSE_ERROR),
+            sum(len(df) for df in analyzed.values()))
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as output_dir:
+        camera = next(topic for topic in truth['topics'] if topic.endswith('image_compressed'))
+        camera_bytes = 0
+        if dfs is not None and 'size' in dfs.get(camera, {}):
+            camera_bytes = int(dfs[camera]['size'].sum())
+
+        def _camera_converter():
+            if storage != 'mcap':
+                raise Skipped('camera_converter only reads mcap')
+            if shutil.which('ffmpeg') is None:
+                raise Skipped('ffmpeg not found')
+            module = _load_script(scripts_dir, 'camera_converter')
+            return lambda: module.convert(bag_file, camera, os.path.join(output_dir, 'camera.mp4'))
+
+        def _foxglove_converter():
+            if storage != 'mcap':
+                raise Skipped('foxglove_converter only reads mcap')
+            module = _load_script(scripts_dir, 'foxglove_converter')
+            output = os.path.join(output_dir, 'foxglove')
+
+            def convert():
+                shutil.rmtree(output, ignore_errors=True)
+                module.convert(bag_file, output)
+            return convert
+
+        for name, make, messages, num_bytes in (
+                ('camera_converter.convert', _camera_converter,
+                 truth['topics'][camera]['message_count'], camera_bytes),
+                ('foxglove_converter.convert', _foxglove_converter, bag_messages, bag_bytes)):
+            try:
+                function = make()
+            except Skipped as e:
+                print(f'  {name}', flush=True)
+                results[name] = {'skipped': str(e)}
+                continue
+            _stage(name, function, messages, num_bytes)
+    return results
+
+
+def run(fixtures, fixtures_dir, storage='mcap', repeat=3, scripts_dir=None):
+    """
+    Benchmark all stages on a list of fixtures.
+
+    Args
+    ----
+        fixtures ([str]): Keys of FIXTURES
+        fixtures_dir (str): Directory holding the fixtures
+        storage (str): Bag storage format of the fixtures, mcap or db3
+        repeat (int): Number of timed runs per stage
+        scripts_dir (str): Directory of the isaac_ros_data_replayer scripts
+
+    Returns
+    -------
+        dict: The baseline, with the host and the results per fixture and stage
+
+    """
+    baseline = {
+        'version': BASELINE_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'host': {
+            'node': platform.node(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'storage': storage,
+        'repeat': repeat,
+        'fixtures': {},
+    }
+    for name in fixtures:
+        bag_dir = fixture_path(fixtures_dir, name, storage)
+        print(f'{name}:', flush=True)
+        baseline['fixtures'][name] = {
+            'params': FIXTURES[name],
+            'stages': run_fixture(bag_dir, storage, repeat, scripts_dir),
+        }
+    baseline['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return baseline
+
+
+def compare(baseline, current, tolerance=0.1, memory_tolerance=0.2):
+    """
+    Compare the results of two runs.
+
+    Args
+    ----
+        baseline (dict): The reference run, as returned by run
+        current (dict): The run to check
+        tolerance (float): Allowed relative growth of the median latency
+        memory_tolerance (float): Allowed relative growth of the peak memory
+
+    Returns
+    -------
+        [dict]: One row per fixture, stage and metric, with the baseline and current values,
+            the relative change and whether it is a regression. A stage that was measured in
+            the baseline but failed or is missing in current is a regression, one that was
+            skipped is not.
+
+    """
+    rows = []
+    for fixture, reference in baseline['fixtures'].items():
+        stages = current['fixtures'].get(fixture, {}).get('stages', {})
+        for stage, before in reference['stages'].items():
+            after = stages.get(stage)
+            if 'latency_s' not in before:
+                continue
+            if after is None or 'latency_s' not in after:
+                status = 'missing' if after is None else next(iter(after))
+                rows.append({'fixture': fixture, 'stage': stage, 'metric': status,
+                             'baseline': None, 'current': None, 'change': None,
+                             'regression': status != 'skipped'})
+                continue
+            for metric, old, new, allowed, noise in (
+                    ('latency_s', before['latency_s']['median'], after['latency_s']['median'],
+                     tolerance, MIN_LATENCY_CHANGE_S),
+                    ('peak_mb', before['peak_mb'], after['peak_mb'], memory_tolerance,
+                     MIN_MEMORY_CHANGE_MB)):
+                change = (new - old) / old if old else 0.0
+                rows.append({
+                    'fixture': fixture, 'stage': stage, 'metric': metric,
+                    'baseline': old, 'current': new, 'change': change,
+                    'regression': change > allowed and new - old > noise,
+                })
+    return rows
+
+
+def _format_value(value):
+    return '-' if value is None else f'{value:.3f}'
+
+
+def print_results(baseline):
+    """Print the median latency, throughput and peak memory of every stage."""
+    print(f'{"fixture / stage":<52} {"median s":>10} {"msgs/s":>12} {"MB/s":>10} '
+          f'{"peak MB":>10}')
+    for fixture, entry in baseline['fixtures'].items():
+        print(fixture)
+        for stage, result in entry['stages'].items():
+            if 'latency_s' not in result:
+                reason = result.get('skipped') or result.get('failed')
+                print(f'  {stage:<50} {next(iter(result))}: {reason}')
+                continue
+            msgs_per_s = f'{result["msgs_per_s"]:.0f}' if result['messages'] else '-'
+            mb_per_s = f'{result["mb_per_s"]:.1f}' if result['mb'] else '-'
+            print(f'  {stage:<50} {result["latency_s"]["median"]:>10.3f} {msgs_per_s:>12} '
+                  f'{mb_per_s:>10} {result["peak_mb"]:>10.1f}')
+
+
+def print_comparison(rows):
+    """Print the rows returned by compare, marking regressions."""
+    print(f'{"fixture / stage":<52} {"metric":<10} {"baseline":>10} {"current":>10} '
+          f'{"change":>8}')
+    for row in rows:
+        change = '-' if row['change'] is None else f'{row["change"]:+.1%}'
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f'{row["fixture"] + " " + row["stage"]:<52} {row["metric"]:<10} '
+              f'{_format_value(row["baseline"]):>10} {_format_value(row["current"]):>10} '
+              f'{change:>8}{flag}')
+
+
+def _load(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get('version') != BASELINE_VERSION:
+        raise ValueError(f'{path} has version {results.get("version")}, expected '
+                         f'{BASELINE_VERSION}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the validation and conversion stages on synthetic bags.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and write the results')
+    run_parser.add_argument('--fixtures', nargs='+', choices=FIXTURES.keys(),
+                            default=DEFAULT_FIXTURES,
+                            help=f'Fixtures to run on (default: {" ".join(DEFAULT_FIXTURES)})')
+    run_parser.add_argument('--fixtures-dir', type=str,
+                            default=os.path.join(tempfile.gettempdir(),
+                                                 'isaac_ros_data_validation_benchmark'),
+                            help='Directory the fixtures are written to and reused from')
+    run_parser.add_argument('--storage', type=str, choices=['mcap', 'db3'], default='mcap',
+                            help='Bag storage format of the fixtures (default: mcap)')
+    run_parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed runs per stage (default: 3)')
+    run_parser.add_argument('--scripts-dir', type=str, default=None,
+                            help='Directory of the isaac_ros_data_replayer scripts (default: '
+                                 'the installed package, or the source tree)')
+    run_parser.add_argument('-o', '--output', type=str, default='benchmark.json',
+                            help='JSON file the results are written to (default: '
+                                 'benchmark.json)')
+    run_parser.add_argument('--baseline', type=str,
+                            help='Compare the results with this baseline afterwards')
+    run_parser.add_argument('--tolerance', type=float, default=0.1,
+                            help='Allowed relative latency growth (default: 0.1)')
+    run_parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                            help='Allowed relative peak memory growth (default: 0.2)')
+
+    compare_parser = commands.add_parser(
+        'compare', help='Compare results with a baseline, exit with 1 on regressions')
+    compare_parser.add_argument('baseline', type=str, help='Baseline results JSON')
+    compare_parser.add_argument('current', type=str, help='Current results JSON')
+    compare_parser.add_argument('--tolerance', type=float, default=0.1,
+                                help='Allowed relative latency growth (default: 0.1)')
+    compare_parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                                help='Allowed relative peak memory growth (default: 0.2)')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        os.makedirs(args.fixtures_dir, exist_ok=True)
+        results = run(args.fixtures, args.fixtures_dir, args.storage, args.repeat,
+                      args.scripts_dir or default_scripts_dir())
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print()
+        print_results(results)
+        print(f'\nResults written to {args.output}')
+        if not args.baseline:
+            return
+        baseline, current = _load(args.baseline), results
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    rows = compare(baseline, current, args.tolerance, args.memory_tolerance)
+    print()
+    print_comparison(rows)
+    regressions = [row for row in rows if row['regression']]
+    print(f'\n{len(regressions)} regressions beyond the tolerance')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
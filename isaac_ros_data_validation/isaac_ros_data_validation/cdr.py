@@ -0,0 +1,224 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Helpers for pulling fields out of serialized (CDR) ROS 2 messages without deserializing them.
+
+Full deserialization is by far the most expensive part of reading a bag, but most checks only
+need the header stamp or the raw payload of a CompressedImage. Both sit at fixed, easily
+computed offsets in the CDR stream, so we read them directly.
+"""
+
+import struct
+
+# Size of the CDR encapsulation header that prefixes every serialized message
+ENCAPSULATION_SIZE = 4
+
+_LE = (struct.Struct('<iI'), struct.Struct('<I'))
+_BE = (struct.Struct('>iI'), struct.Struct('>I'))
+
+
+def _structs(rawdata):
+    # Encapsulation kind is a big endian uint16, odd values are little endian
+    return _LE if rawdata[1] & 1 else _BE
+
+
+def _align(offset, alignment):
+    # CDR alignment is relative to the end of the encapsulation header
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+
+def header_stamp_ns(rawdata):
+    """
+    Read header.stamp from a serialized message whose first field is a std_msgs/Header.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        int: The stamp in nanoseconds.
+
+    """
+    stamp, _ = _structs(rawdata)
+    sec, nanosec = stamp.unpack_from(rawdata, ENCAPSULATION_SIZE)
+    return sec * 1000000000 + nanosec
+
+
+def compressed_image_payload_range(rawdata):
+    """
+    Locate the data field of a serialized sensor_msgs/CompressedImage.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        (int, int): Offset and length of the compressed image bytes within rawdata.
+
+    Raises
+    ------
+        ValueError: If the message is truncated.
+
+    """
+    _, uint32 = _structs(rawdata)
+    view = memoryview(rawdata)[ENCAPSULATION_SIZE:]
+
+    # header.stamp is 8 bytes, followed by header.frame_id and format as strings
+    offset = 8
+    for _ in range(2):
+        offset = _align(offset, 4)
+        (length,) = uint32.unpack_from(view, offset)
+        offset += 4 + length
+
+    offset = _align(offset, 4)
+    (length,) = uint32.unpack_from(view, offset)
+    offset += 4
+    if offset + length > len(view):
+        raise ValueError(f'Truncated CompressedImage, expected {length} bytes of data but only '
+                         f'{len(view) - offset} remain')
+    return ENCAPSULATION_SIZE + offset, length
+
+
+def _read_string(view, offset, uint32):
+    # CDR strings are a uint32 length including the terminating NUL, followed by the bytes
+    offset = _align(offset, 4)
+    (length,) = uint32.unpack_from(view, offset)
+    value = bytes(view[offset + 4:offset + 3 + length]).decode(errors='replace')
+    return value, offset + 4 + length
+
+
+def log_fields(rawdata):
+    """
+    Read the fields of a serialized rcl_interfaces/Log (/rosout) message.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        (int, int, str, str): stamp in nanoseconds, level, logger name and message.
+
+    """
+    stamp, uint32 = _structs(rawdata)
+    sec, nanosec = stamp.unpack_from(rawdata, ENCAPSULATION_SIZE)
+    view = memoryview(rawdata)[ENCAPSULATION_SIZE:]
+    level = view[8]
+    name, offset = _read_string(view, 9, uint32)
+    msg, _ = _read_string(view, offset, uint32)
+    return sec * 1000000000 + nanosec, level, name, msg
+
+
+def compressed_image_format(rawdata):
+    """
+    Read the format field of a serialized sensor_msgs/CompressedImage, e.g. 'h264' or 'jpeg'.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        str: The format string.
+
+    """
+    _, uint32 = _structs(rawdata)
+    view = memoryview(rawdata)[ENCAPSULATION_SIZE:]
+    _, offset = _read_string(view, 8, uint32)
+    image_format, _ = _read_string(view, offset, uint32)
+    return image_format
+
+
+def image_layout(rawdata):
+    """
+    Read the image layout fields of a serialized sensor_msgs/Image.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        (int, int, str, int, int, int): height, width, encoding, step, and offset and length
+            of the pixel data within rawdata.
+
+    Raises
+    ------
+        ValueError: If the message is truncated.
+
+    """
+    _, uint32 = _structs(rawdata)
+    view = memoryview(rawdata)[ENCAPSULATION_SIZE:]
+
+    # header.stamp, header.frame_id, height, width, encoding, is_bigendian, step, data
+    _, offset = _read_string(view, 8, uint32)
+    offset = _align(offset, 4)
+    (height,) = uint32.unpack_from(view, offset)
+    (width,) = uint32.unpack_from(view, offset + 4)
+    encoding, offset = _read_string(view, offset + 8, uint32)
+    offset = _align(offset + 1, 4)
+    (step,) = uint32.unpack_from(view, offset)
+    (length,) = uint32.unpack_from(view, offset + 4)
+    offset += 8
+    if offset + length > len(view):
+        raise ValueError(f'Truncated Image, expected {length} bytes of data but only '
+                         f'{len(view) - offset} remain')
+    return height, width, encoding, step, ENCAPSULATION_SIZE + offset, length
+
+
+def image_payload_range(rawdata):
+    """
+    Locate the data field of a serialized sensor_msgs/Image.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        (int, int): Offset and length of the pixel data within rawdata.
+
+    Raises
+    ------
+        ValueError: If the message is truncated.
+
+    """
+    return image_layout(rawdata)[4:]
+
+
+def compressed_image_payload(rawdata):
+    """
+    Return the data field of a serialized sensor_msgs/CompressedImage without copying it.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message.
+
+    Returns
+    -------
+        memoryview: A view of the compressed image bytes.
+
+    Raises
+    ------
+        ValueError: If the message is truncated.
+
+    """
+    offset, length = compressed_image_payload_range(rawdata)
+    return memoryview(rawdata)[offset:offset + length]
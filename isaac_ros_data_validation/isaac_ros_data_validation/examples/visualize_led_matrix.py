@@ -24,18 +24,12 @@ check of frame times. Requires setting up a jupyter server or other environment
 
 # %%
 
-import glob
-import subprocess
-import tempfile
-
-import cv2
-from isaac_ros_data_validation import EXAMPLE_BAG_DIR, REPLAYER_SCRIPT_DIR
+from isaac_ros_data_validation import EXAMPLE_BAG_DIR
 from isaac_ros_data_validation.bag_tools import do_validation
+from isaac_ros_data_validation.frame_server import FrameServer
 import matplotlib.pyplot as plt
 
 
-OUT_DIR = tempfile.mkdtemp()
-MP4_SCRIPT = f'{REPLAYER_SCRIPT_DIR}/mp4_converter.py'
 CAMERA_POSITIONS = ['front', 'right', 'left', 'back']
 INPUT_FILE = f'{EXAMPLE_BAG_DIR}/led_matrix'
 
@@ -45,25 +39,24 @@ stats, errors, dfs, q_scores = do_validation(INPUT_FILE)
 
 # %%
 
-for position in CAMERA_POSITIONS:
-    camera_topic = f'{position}_stereo_camera'
-    print(f'Converting {position} camera recordings...')
-    subprocess.run(['python', MP4_SCRIPT, INPUT_FILE, camera_topic, OUT_DIR], check=True)
+# Indexes every camera topic in one pass, frames are decoded on demand
+camera_topics = [f'/{position}_stereo_camera/{side}/image_compressed'
+                 for position in CAMERA_POSITIONS for side in ('left', 'right')]
+server = FrameServer(INPUT_FILE, topics=camera_topics)
 
 # %%
 
 
-def visualize_specific_frames_of_mp4_files(directory, frame_offsets):
-    """Visualizes specific frames of mp4 files in a directory."""
-    video_files = sorted(glob.glob(f'{directory}/*_stereo_camera_*.mp4'),
-                         key=lambda x: (x.split('_stereo_')[0], 'right' in x))
+def visualize_specific_frames(server, frame_numbers):
+    """Visualizes specific frames of the camera topics of a bag."""
+    topics = [topic for topic in server.topics if topic in frame_numbers]
 
-    # Calculate rows based on the number of video files found
+    # Calculate rows based on the number of topics found
     cols = 2
-    if len(video_files) % cols == 0:
-        rows = len(video_files) // cols
+    if len(topics) % cols == 0:
+        rows = len(topics) // cols
     else:
-        rows = (len(video_files) // cols) + 1
+        rows = (len(topics) // cols) + 1
 
     fig, axs = plt.subplots(rows, cols, figsize=(15, rows * 5))
     plt.subplots_adjust(wspace=0.1, hspace=0.2)
@@ -73,20 +66,15 @@ def visualize_specific_frames_of_mp4_files(directory, frame_offsets):
     else:
         axs = [axs]
 
-    for i, file_path in enumerate(video_files):
-        file_name = file_path.split('/')[-1].split('.')[0]
-        frame_num = frame_offsets.get(file_name, 0)  # Use default frame 0 if not specified
-        cap = cv2.VideoCapture(file_path)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            axs[i].imshow(frame)
-            axs[i].set_title(f'{file_name}: Frame {frame_num}')
+    for i, topic in enumerate(topics):
+        name = '_'.join(topic.split('/')[1:3])
+        frame_num = frame_numbers[topic]
+        try:
+            axs[i].imshow(server.get_frame(topic, frame_num))
+            axs[i].set_title(f'{name}: Frame {frame_num}')
             axs[i].axis('off')
-        else:
-            print(f'Failed to retrieve frame {frame_num} from {file_path}')
-        cap.release()
+        except (IndexError, ValueError) as e:
+            print(f'Failed to retrieve frame {frame_num} from {topic}: {e}')
 
     # Hide unused axes
     for j in range(i + 1, len(axs)):
@@ -97,18 +85,11 @@ def visualize_specific_frames_of_mp4_files(directory, frame_offsets):
 
 # N controls which frame to visualize
 n = 200
-frame_offsets = {}
+frame_numbers = {}
 
-# Extract frame offsets from stats and match it to topic names from the mp4 files
-for topic, frame_number in stats['inter_camera_sync']['offsets'].items():
+# Account for the frames dropped before frame n of every camera
+for topic, offsets in stats['inter_camera_sync']['offsets'].items():
     if 'image_compressed' in topic:
-        # Extract the camera name and side from the topic
-        parts = topic.split('/')
-        camera_name = parts[1]  # Get the camera name part
-        camera_side = parts[2]  # Get the side (left/right)
-        simplified_name = f'{camera_name}_{camera_side}'  # Create the simplified name
-
-        # Map the simplified name to the frame number
-        frame_offsets[simplified_name] = n - int(stats['inter_camera_sync']['offsets'][topic][n])
+        frame_numbers[topic] = n - int(offsets[n])
 
-visualize_specific_frames_of_mp4_files(OUT_DIR, frame_offsets)
+visualize_specific_frames(server, frame_numbers)
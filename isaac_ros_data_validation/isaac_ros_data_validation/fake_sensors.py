@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Fake Nova sensor drivers, to load test the recorder on a workstation without the hardware.
+
+Publishes the topics of one Hawk, Owl, BMI088, Hesai or RPLidar driver, relative to the node
+namespace, at the real rate and with payloads of the real size. Header stamps are the nominal
+acquisition ticks plus gaussian jitter, and a fraction of the messages can be dropped, so the
+timing checks of summarize_bag and recording_monitor have something to find, e.g.
+
+ros2 run isaac_ros_data_validation fake_sensor --ros-args -r __ns:=/front_stereo_camera \
+    -p sensor_type:=hawk -p jitter_us:=500.0 -p drop_rate:=0.01
+
+data_recorder.launch.py starts one per sensor with use_fake_sensors:=True.
+"""
+
+import array
+import random
+import threading
+import time
+
+from isaac_ros_data_validation.synthetic_bag import frame_offset, H264_FRAME_HEADER, payload_pool
+import rclpy
+from rclpy.node import Node
+from rclpy.time import Time
+from sensor_msgs.msg import CameraInfo, CompressedImage, Imu, LaserScan
+from std_msgs.msg import UInt8MultiArray
+
+# Default rate and payload size per sensor type. Camera payloads are H.264 frames, the size
+# varies by +-10% per frame. Hesai payloads are one rotation of 1080 byte UDP packets, RPLidar
+# payloads are the float32 ranges and intensities of one scan.
+SENSOR_TYPES = {
+    'hawk': (30.0, 150000),
+    'owl': (30.0, 150000),
+    'bmi088': (100.0, 0),
+    'hesai': (10.0, 180 * 1080),
+    'rplidar': (10.0, 3200 * 8),
+}
+QOS_DEPTH = 10
+
+
+def _camera_info(frame_id):
+    msg = CameraInfo()
+    msg.header.frame_id = frame_id
+    msg.width = 1920
+    msg.height = 1200
+    msg.distortion_model = 'rational_polynomial'
+    msg.d = [0.0] * 8
+    msg.k = [1000.0, 0.0, 960.0, 0.0, 1000.0, 600.0, 0.0, 0.0, 1.0]
+    msg.r = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+    msg.p = [1000.0, 0.0, 960.0, 0.0, 0.0, 1000.0, 600.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+    return msg
+
+
+class FakeSensor(Node):
+    """Publish the topics of one Nova sensor driver with controllable jitter and drops."""
+
+    def __init__(self):
+        super().__init__('fake_sensor')
+
+        self.declare_parameter('sensor_type', 'hawk')
+        self.declare_parameter('rate_hz', 0.0)
+        self.declare_parameter('payload_bytes', -1)
+        self.declare_parameter('jitter_us', 0.0)
+        self.declare_parameter('drop_rate', 0.0)
+        self.declare_parameter('seed', 0)
+
+        self.sensor_type = self.get_parameter('sensor_type').value
+        if self.sensor_type not in SENSOR_TYPES:
+            raise ValueError(f'Unknown sensor_type {self.sensor_type}, expected one of '
+                             f'{", ".join(SENSOR_TYPES)}')
+        default_rate_hz, default_payload_bytes = SENSOR_TYPES[self.sensor_type]
+        self.rate_hz = self.get_parameter('rate_hz').value or default_rate_hz
+        payload_bytes = self.get_parameter('payload_bytes').value
+        self.payload_bytes = default_payload_bytes if payload_bytes < 0 else payload_bytes
+        self.jitter_ns = self.get_parameter('jitter_us').value * 1e3
+        self.drop_rate = self.get_parameter('drop_rate').value
+        self.rng = random.Random(self.get_parameter('seed').value)
+
+        # Frame ids follow the drivers, e.g. front_stereo_camera_left_optical
+        self.frame_prefix = self.get_namespace().strip('/').replace('/', '_') or 'fake'
+        self.publish_tick = getattr(self, f'_setup_{self.sensor_type}')()
+
+        self.num_published = 0
+        self.num_dropped = 0
+        self.num_late = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.get_logger().info(
+            f'Publishing a fake {self.sensor_type} at {self.rate_hz} Hz, '
+            f'{self.payload_bytes} bytes, jitter {self.jitter_ns / 1e3:.0f} us, '
+            f'drop rate {self.drop_rate}')
+
+    def _dropped(self):
+        if self.drop_rate > 0.0 and self.rng.random() < self.drop_rate:
+            self.num_dropped += 1
+            return True
+        return False
+
+    def _publish(self, publisher, msg):
+        publisher.publish(msg)
+        self.num_published += 1
+
+    def _setup_cameras(self, sides):
+        image_pubs = {side: self.create_publisher(
+            CompressedImage, f'{side}/image_compressed', QOS_DEPTH) for side in sides}
+        info_pubs = {side: self.create_publisher(
+            CameraInfo, f'{side}/camera_info', QOS_DEPTH) for side in sides}
+        infos = {side: _camera_info(f'{self.frame_prefix}_{side}_optical') for side in sides}
+        images = {}
+        for side in sides:
+            images[side] = CompressedImage()
+            images[side].header.frame_id = f'{self.frame_prefix}_{side}_optical'
+            images[side].format = 'h264'
+        max_size = int(self.payload_bytes * 1.1) + 1
+        pool = payload_pool(self.rng, max_size)
+        bases = {side: self.rng.randrange(len(pool) - max_size) for side in sides}
+
+        def publish_tick(index, stamp):
+            # Both sides of a stereo camera are triggered together and share the stamp
+            for side in sides:
+                if self._dropped():
+                    continue
+                size = int(self.payload_bytes * self.rng.uniform(0.9, 1.1))
+                offset = frame_offset(bases[side], index)
+                image = images[side]
+                image.header.stamp = stamp
+                image.data = array.array(
+                    'B', H264_FRAME_HEADER + pool[offset:offset + size])
+                infos[side].header.stamp = stamp
+                self._publish(image_pubs[side], image)
+                self._publish(info_pubs[side], infos[side])
+
+        return publish_tick
+
+    def _setup_hawk(self):
+        return self._setup_cameras(('left', 'right'))
+
+    def _setup_owl(self):
+        return self._setup_cameras(('left',))
+
+    def _setup_bmi088(self):
+        publisher = self.create_publisher(Imu, 'imu', QOS_DEPTH)
+        msg = Imu()
+        msg.header.frame_id = self.frame_prefix
+        msg.orientation_covariance[0] = -1.0
+
+        def publish_tick(index, stamp):
+            if self._dropped():
+                return
+            msg.header.stamp = stamp
+            msg.linear_acceleration.x = self.rng.gauss(0.0, 0.05)
+            msg.linear_acceleration.y = self.rng.gauss(0.0, 0.05)
+            msg.linear_acceleration.z = 9.81 + self.rng.gauss(0.0, 0.05)
+            msg.angular_velocity.z = self.rng.gauss(0.0, 0.01)
+            self._publish(publisher, msg)
+
+        return publish_tick
+
+    def _setup_hesai(self):
+        # The packets of one rotation. The real driver publishes its own packet message,
+        # which is not available here, so this only matches its rate and size, not its type.
+        publisher = self.create_publisher(UInt8MultiArray, 'lidar_packets', QOS_DEPTH)
+        msg = UInt8MultiArray()
+        msg.data = array.array('B', self.rng.randbytes(self.payload_bytes))
+
+        def publish_tick(index, stamp):
+            if not self._dropped():
+                self._publish(publisher, msg)
+
+        return publish_tick
+
+    def _setup_rplidar(self):
+        publisher = self.create_publisher(LaserScan, 'scan', QOS_DEPTH)
+        num_ranges = max(self.payload_bytes // 8, 1)
+        msg = LaserScan()
+        msg.header.frame_id = f'{self.frame_prefix}_driver'
+        msg.angle_min = -3.14159274
+        msg.angle_max = 3.14159274
+        msg.angle_increment = (msg.angle_max - msg.angle_min) / num_ranges
+        msg.scan_time = 1.0 / self.rate_hz
+        msg.time_increment = msg.scan_time / num_ranges
+        msg.range_min = 0.05
+        msg.range_max = 25.0
+        msg.ranges = array.array('f', (self.rng.uniform(0.5, 20.0) for _ in range(num_ranges)))
+        msg.intensities = array.array('f', [47.0] * num_ranges)
+
+        def publish_tick(index, stamp):
+            if self._dropped():
+                return
+            msg.header.stamp = stamp
+            self._publish(publisher, msg)
+
+        return publish_tick
+
+    def _run(self):
+        # Ticks are paced by absolute deadlines so publishing time does not accumulate as drift.
+        # Ticks the publisher is too late for are lost, as with a driver that cannot keep up.
+        period_ns = int(1e9 / self.rate_hz)
+        start_ns = time.monotonic_ns()
+        start_stamp_ns = self.get_clock().now().nanoseconds
+        index = 0
+        while not self._stop.is_set():
+            delay_ns = start_ns + index * period_ns - time.monotonic_ns()
+            if delay_ns > 0:
+                if self._stop.wait(delay_ns / 1e9):
+                    break
+            elif delay_ns < -period_ns:
+                late = -delay_ns // period_ns
+                self.num_late += late
+                index += late
+                continue
+            jitter_ns = int(self.rng.gauss(0.0, self.jitter_ns)) if self.jitter_ns else 0
+            stamp_ns = start_stamp_ns + index * period_ns + jitter_ns
+            stamp = Time(nanoseconds=stamp_ns).to_msg()
+            self.publish_tick(index, stamp)
+            index += 1
+
+    def destroy_node(self):
+        self._stop.set()
+        self._thread.join()
+        self.get_logger().info(
+            f'Published {self.num_published} messages, dropped {self.num_dropped}, '
+            f'{self.num_late} ticks lost to late publishing')
+        super().destroy_node()
+
+
+def main():
+    rclpy.init()
+    node = FakeSensor()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.destroy_node()
+        rclpy.try_shutdown()
+
+
+if __name__ == '__main__':
+    main()
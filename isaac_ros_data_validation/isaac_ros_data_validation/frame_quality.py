@@ -0,0 +1,317 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Sampled image quality checks for camera topics.
+
+Frames are sampled at a fixed interval per topic while the bag is read, then decoded on CPU in
+a process pool, so throughput scales with the number of cores. For every sample the luma
+brightness (mean and percentiles), the ratio of saturated pixels and the variance of the
+Laplacian as a sharpness measure are computed. Samples that are black, saturated or far
+outside the typical values of their camera are reported as outliers, e.g.
+
+python -m isaac_ros_data_validation.frame_quality /some/bag/file.mcap --interval-s 0.5
+
+Frames are decoded by frame_server.decode_frame. Raw sensor_msgs/Image topics are decoded with
+numpy and YUV encodings with OpenCV. H.264 CompressedImage topics need PyAV (pip install av),
+other compressed formats such as jpeg need OpenCV. Topics that cannot be decoded are skipped.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from isaac_ros_data_validation.cdr import header_stamp_ns
+from isaac_ros_data_validation.message_pass import error_entry, MessagePass
+
+COMPRESSED_IMAGE = 'sensor_msgs/msg/CompressedImage'
+
+# Pixels at or above this 8 bit luma value count as saturated
+SATURATION_LEVEL = 250
+# Samples with a mean luma below this are black
+BLACK_LEVEL = 10.0
+# Samples with more saturated pixels than this are overexposed
+MAX_SATURATION_RATIO = 0.5
+# Robust z-score (median / MAD) above which a sample is an outlier for its camera
+OUTLIER_Z = 5.0
+# Brightness changes smaller than this are never outliers, even for a very static scene
+MIN_BRIGHTNESS_CHANGE = 20.0
+
+METRICS = (
+    'brightness_mean',
+    'brightness_p5',
+    'brightness_p50',
+    'brightness_p95',
+    'saturation_ratio',
+    'sharpness',
+)
+
+
+class FrameSamplePass(MessagePass):
+    """
+    Keep one serialized frame every interval_s seconds of log time for each image topic.
+
+    Encoders may only send SPS / PPS with the first frame, so the latest parameter sets of each
+    H.264 topic are tracked and stored with every sample to make it decodable on its own.
+    """
+
+    def __init__(self, interval_s=1.0, topics=None):
+        """
+        Initialize a FrameSamplePass.
+
+        interval_s: minimum log time between two samples of a topic
+        topics: optional list of topics to sample, defaults to all image topics
+
+        """
+        self.interval_ns = interval_s * 1e9
+        self.topics = topics
+        self.samples = []
+        self.next_sample_ns = {}
+        self.msgtypes = {}
+        self.indices = {}
+        self.parameter_sets = {}
+
+    def accepts(self, topic, msgtype):
+        if msgtype not in (COMPRESSED_IMAGE, 'sensor_msgs/msg/Image'):
+            return False
+        if self.topics is not None and topic not in self.topics:
+            return False
+        self.msgtypes[topic] = msgtype
+        self.indices[topic] = 0
+        return True
+
+    def process(self, topic, timestamp, rawdata):
+        index = self.indices[topic]
+        self.indices[topic] += 1
+        if self.msgtypes[topic] == COMPRESSED_IMAGE:
+            self._track_parameter_sets(topic, rawdata)
+        if timestamp < self.next_sample_ns.get(topic, 0):
+            return
+        self.next_sample_ns[topic] = timestamp + self.interval_ns
+        self.samples.append((topic, index, self.msgtypes[topic], bytes(rawdata),
+                             b''.join(self.parameter_sets.get(topic, {}).values())))
+
+    def _track_parameter_sets(self, topic, rawdata):
+        # h264 pulls in numpy through streaming_stats, keep it out of the command line startup
+        from isaac_ros_data_validation.h264 import parameter_sets
+
+        found = parameter_sets(rawdata)
+        if found:
+            self.parameter_sets.setdefault(topic, {}).update(found)
+
+    def results(self):
+        return {}, {}
+
+
+def _luma(msgtype, rawdata, parameter_sets):
+    # Decode a serialized image into an 8 bit luma array
+    import numpy as np
+
+    from isaac_ros_data_validation.frame_server import decode_frame
+
+    # With iframe_cqp every frame is an IDR frame, so with the parameter sets in front of it a
+    # frame decodes on its own
+    image = decode_frame(msgtype, rawdata, parameter_sets)
+    if image.dtype == np.uint16:
+        image = (image >> 8).astype(np.uint8)
+    if image.ndim == 3:
+        image = (0.299 * image[..., 0] + 0.587 * image[..., 1] +
+                 0.114 * image[..., 2]).astype(np.uint8)
+    return image
+
+
+def frame_metrics(luma):
+    """
+    Compute the quality metrics of an 8 bit luma image.
+
+    Returns
+    -------
+        dict: brightness mean and percentiles, saturation ratio and sharpness, the variance of
+            the 4 neighbour Laplacian
+
+    """
+    import numpy as np
+
+    pixels = luma.astype(np.float32)
+    p5, p50, p95 = np.percentile(luma, (5, 50, 95))
+    laplacian = (pixels[:-2, 1:-1] + pixels[2:, 1:-1] + pixels[1:-1, :-2] +
+                 pixels[1:-1, 2:] - 4 * pixels[1:-1, 1:-1])
+    return {
+        'brightness_mean': float(pixels.mean()),
+        'brightness_p5': float(p5),
+        'brightness_p50': float(p50),
+        'brightness_p95': float(p95),
+        'saturation_ratio': float((luma >= SATURATION_LEVEL).mean()),
+        'sharpness': float(laplacian.var()),
+    }
+
+
+def _analyze_sample(sample):
+    # Runs in a worker process
+    topic, index, msgtype, rawdata, parameter_sets = sample
+    try:
+        luma = _luma(msgtype, rawdata, parameter_sets)
+    except Exception:
+        luma = None
+    result = {'topic': topic, 'index': index, 'acqtime': header_stamp_ns(rawdata)}
+    if luma is None or luma.size == 0:
+        result['decoded'] = False
+        return result
+    result['decoded'] = True
+    result.update(frame_metrics(luma))
+    return result
+
+
+def _robust_z(values):
+    import numpy as np
+
+    median = np.nanmedian(values)
+    mad = np.nanmedian(np.abs(values - median)) * 1.4826
+    if not mad > 0:
+        return np.zeros_like(values)
+    return (values - median) / mad
+
+
+def analyze_frame_quality(samples, workers=None):
+    """
+    Decode sampled frames in a process pool and compute quality metrics per camera.
+
+    Args
+    ----
+        samples: samples collected by FrameSamplePass
+        workers (int): number of worker processes, defaults to the number of cores
+
+    Returns
+    -------
+        stats: for each topic the number of decoded samples, the median of every metric and
+            a 'frames' DataFrame with the metrics of every sample, indexed by acqtime
+        errors: for each topic 'black_frame', 'saturated_frame', 'blurry_frame' and
+            'brightness_outlier' errors, indices are message indices within the topic
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(samples) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_analyze_sample, samples,
+                                    chunksize=max(len(samples) // (4 * workers), 1)))
+    else:
+        results = [_analyze_sample(sample) for sample in samples]
+
+    stats = {}
+    errors = {}
+    if not results:
+        return stats, errors
+
+    table = pd.DataFrame(results)
+    for topic, frames in table.groupby('topic', sort=True):
+        decoded = frames[frames['decoded']].set_index('acqtime').drop(
+            columns=['topic', 'decoded'])
+        stats[topic] = {
+            'num_samples': len(frames),
+            'num_decoded': len(decoded),
+            'frames': decoded,
+        }
+        if decoded.empty:
+            continue
+        for metric in METRICS:
+            stats[topic][f'median_{metric}'] = float(decoded[metric].median())
+
+        acqtimes = decoded.index.to_numpy()
+        indices = decoded['index'].to_numpy()
+        black = decoded['brightness_mean'].to_numpy() < BLACK_LEVEL
+        saturated = decoded['saturation_ratio'].to_numpy() > MAX_SATURATION_RATIO
+        # Blur only lowers sharpness, and black or saturated frames are trivially flat
+        blurry = (_robust_z(np.log1p(decoded['sharpness'].to_numpy())) < -OUTLIER_Z)
+        blurry &= ~black & ~saturated
+        brightness_mean = decoded['brightness_mean'].to_numpy()
+        brightness = np.abs(_robust_z(brightness_mean)) > OUTLIER_Z
+        brightness &= np.abs(brightness_mean - np.median(brightness_mean)) > MIN_BRIGHTNESS_CHANGE
+        brightness &= ~black & ~saturated
+
+        errors[topic] = {
+            name: error_entry(indices[mask], acqtimes[mask])
+            for name, mask in (
+                ('black_frame', black),
+                ('saturated_frame', saturated),
+                ('blurry_frame', blurry),
+                ('brightness_outlier', brightness),
+            )
+        }
+    return stats, errors
+
+
+def scan_frame_quality(input_file, bagtype='mcap', interval_s=1.0, topics=None, workers=None):
+    """
+    Sample frames from every image topic of a bag and analyze their quality.
+
+    Args
+    ----
+        input_file (str): The bag to scan
+        bagtype (str): mcap or db3
+        interval_s (float): Sampling interval per topic, in seconds of log time
+        topics ([str]): Optional list of topics, defaults to all image topics
+        workers (int): Number of decode processes, defaults to the number of cores
+
+    Returns
+    -------
+        stats, errors: see analyze_frame_quality
+
+    """
+    from isaac_ros_data_validation.bag_tools import run_passes
+
+    sample_pass = FrameSamplePass(interval_s, topics)
+    run_passes(input_file, [sample_pass], bagtype=bagtype)
+    return analyze_frame_quality(sample_pass.samples, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sampled frame quality of camera topics.')
+    parser.add_argument('input_file', type=str, help='Path to the input file')
+    parser.add_argument('--bagtype', choices=['mcap', 'db3'], default='mcap',
+                        help='Bag storage format (default: mcap)')
+    parser.add_argument('--interval-s', type=float, default=1.0,
+                        help='Sampling interval per topic in seconds (default: 1.0)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of decode processes (default: number of cores)')
+    parser.add_argument('--topics', nargs='+', default=None,
+                        help='Topics to scan (default: all image topics)')
+    args = parser.parse_args()
+
+    stats, errors = scan_frame_quality(
+        args.input_file, args.bagtype, args.interval_s, args.topics, args.workers)
+
+    for topic, topic_stats in stats.items():
+        print(f'{topic}:')
+        print(f'    - Samples Decoded: {topic_stats["num_decoded"]} / '
+              f'{topic_stats["num_samples"]}')
+        if not topic_stats['num_decoded']:
+            print('    - Could not decode any sample, is PyAV / OpenCV installed?')
+            continue
+        print(f'    - Median Brightness: {topic_stats["median_brightness_mean"]:.1f}\n'
+              f'    - Median Saturation Ratio: {topic_stats["median_saturation_ratio"]:.4f}\n'
+              f'    - Median Sharpness: {topic_stats["median_sharpness"]:.1f}')
+        for name, entry in errors[topic].items():
+            if entry['num_errors']:
+                print(f'    - {name}: {entry["num_errors"]} at message indices '
+                      f'{entry["indices"][:10]}')
+
+
+if __name__ == '__main__':
+    main()
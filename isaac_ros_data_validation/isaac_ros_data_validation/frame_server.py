@@ -0,0 +1,466 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Frame accurate random access to the camera topics of a bag.
+
+One pass over the bag builds an index per camera topic: frame number -> header stamp -> where
+the serialized message lives in the file. A frame is then read and decoded on its own, which
+works for H.264 because the Hawk and Owl encoders run with iframe_cqp, so every frame is an IDR
+frame. Decoded frames are kept in an LRU cache, so a notebook can step through synchronized
+frames of all cameras without converting any video first, e.g.
+
+server = FrameServer('/some/bag')
+frame = server.get_frame('/front_stereo_camera/left/image_compressed', 200)
+frames = server.get_frames(server.stamps('/front_stereo_camera/left/image_compressed')[200])
+
+MCAP bags are indexed by chunk and offset into the decompressed chunk, zstd and lz4 chunks
+need the zstandard (or backports.zstd) and lz4 packages. db3 bags are indexed by message row
+id. Decoding H.264 needs PyAV (pip install av), other compressed formats need OpenCV.
+"""
+
+from collections import OrderedDict
+import glob
+import os
+import sqlite3
+import struct
+
+from isaac_ros_data_validation.cdr import (
+    compressed_image_format,
+    compressed_image_payload_range,
+    header_stamp_ns,
+    image_layout,
+)
+from isaac_ros_data_validation.h264 import parameter_sets
+import numpy as np
+
+COMPRESSED_IMAGE = 'sensor_msgs/msg/CompressedImage'
+IMAGE = 'sensor_msgs/msg/Image'
+CAMERA_TYPES = (COMPRESSED_IMAGE, IMAGE)
+
+MCAP_MAGIC = b'\x89MCAP0\r\n'
+_OP_SCHEMA = 0x03
+_OP_CHANNEL = 0x04
+_OP_MESSAGE = 0x05
+_OP_CHUNK = 0x06
+_OP_DATA_END = 0x0F
+_RECORD = struct.Struct('<BQ')
+_MESSAGE = struct.Struct('<HIQQ')
+_CHUNK = struct.Struct('<QQQI')
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_UINT64 = struct.Struct('<Q')
+
+# Decoded frames kept in memory, a 1920x1200 RGB frame is about 7 MB
+DEFAULT_CACHE_SIZE = 32
+# Decompressed MCAP chunks kept in memory, frames of all cameras at one time share a few chunks
+CHUNK_CACHE_SIZE = 8
+
+
+class _LruCache(OrderedDict):
+    # An OrderedDict that drops its least recently used entries beyond maxsize
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get_or_add(self, key, make):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = make()
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+
+def _string(data, offset):
+    (length,) = _UINT32.unpack_from(data, offset)
+    offset += 4
+    return bytes(data[offset:offset + length]).decode(), offset + length
+
+
+def decompress(data, compression, uncompressed_size):
+    """Decompress the records of an MCAP chunk."""
+    if compression == '':
+        return data
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            from backports import zstd
+            return zstd.decompress(data)
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=uncompressed_size)
+    if compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.decompress(data)
+    raise ValueError(f'Unsupported MCAP chunk compression {compression}')
+
+
+class _TopicIndex:
+    # Growing index of one camera topic, turned into numpy arrays by finish()
+
+    def __init__(self, msgtype):
+        self.msgtype = msgtype
+        self.stamps = []
+        self.log_times = []
+        # (file, chunk, offset, length), chunk is -1 if offset is a file offset
+        self.locations = []
+        self.parameter_sets = {}
+
+    def add(self, rawdata, log_time, location):
+        self.stamps.append(header_stamp_ns(rawdata))
+        self.log_times.append(log_time)
+        self.locations.append(location)
+        if self.msgtype == COMPRESSED_IMAGE:
+            self.parameter_sets.update(parameter_sets(rawdata))
+
+    def finish(self):
+        self.stamps = np.array(self.stamps, dtype=np.int64)
+        # Stamps can go backwards, lookups by stamp go through the sorted order
+        self.order = np.argsort(self.stamps, kind='stable')
+        self.sorted_stamps = self.stamps[self.order]
+        self.log_times = np.array(self.log_times, dtype=np.int64)
+        self.locations = np.array(self.locations, dtype=np.int64).reshape(-1, 4)
+        self.parameter_sets = b''.join(self.parameter_sets[nal_type]
+                                       for nal_type in sorted(self.parameter_sets))
+
+
+def decode_frame(msgtype, rawdata, parameter_sets=b''):
+    """
+    Decode a serialized camera message.
+
+    Args
+    ----
+        msgtype (str): sensor_msgs/msg/CompressedImage or sensor_msgs/msg/Image
+        rawdata (bytes): The serialized message
+        parameter_sets (bytes): H.264 SPS and PPS to decode frames that do not carry them
+
+    Returns
+    -------
+        np.ndarray: An RGB image, or a 2D array for mono encodings
+
+    Raises
+    ------
+        ValueError: If the image cannot be decoded
+
+    """
+    if msgtype == IMAGE:
+        height, width, encoding, step, offset, length = image_layout(rawdata)
+        data = np.frombuffer(rawdata, dtype=np.uint8, count=length, offset=offset)
+        rows = data[:height * step].reshape(height, step)
+        if encoding in ('mono8', '8UC1'):
+            return rows[:, :width].copy()
+        if encoding in ('mono16', '16UC1'):
+            return np.ascontiguousarray(rows[:, :2 * width]).view(np.uint16)
+        if encoding in ('rgb8', 'bgr8', 'rgba8', 'bgra8'):
+            channels = 4 if encoding.endswith('a8') else 3
+            pixels = rows[:, :channels * width].reshape(height, width, channels)
+            order = [0, 1, 2] if encoding.startswith('rgb') else [2, 1, 0]
+            return np.ascontiguousarray(pixels[..., order])
+        yuv_codes = {'yuv422': 'COLOR_YUV2RGB_UYVY', 'uyvy': 'COLOR_YUV2RGB_UYVY',
+                     'UYVY': 'COLOR_YUV2RGB_UYVY', 'yuv422_yuy2': 'COLOR_YUV2RGB_YUY2',
+                     'yuyv': 'COLOR_YUV2RGB_YUY2', 'YUYV': 'COLOR_YUV2RGB_YUY2'}
+        if encoding in yuv_codes:
+            import cv2
+            pixels = np.ascontiguousarray(rows[:, :2 * width]).reshape(height, width, 2)
+            return cv2.cvtColor(pixels, getattr(cv2, yuv_codes[encoding]))
+        raise ValueError(f'Unsupported image encoding {encoding}')
+
+    image_format = compressed_image_format(rawdata).lower()
+    offset, length = compressed_image_payload_range(rawdata)
+    payload = bytes(rawdata[offset:offset + length])
+    if 'h264' in image_format:
+        import av
+        codec = av.CodecContext.create('h264', 'r')
+        frames = []
+        for packet in codec.parse(parameter_sets + payload) + codec.parse(None):
+            frames.extend(codec.decode(packet))
+        frames.extend(codec.decode(None))
+        if not frames:
+            raise ValueError('H.264 frame did not decode')
+        return frames[0].to_ndarray(format='rgb24')
+
+    import cv2
+    image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f'{image_format} frame did not decode')
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2RGB if image.shape[2] == 4
+                            else cv2.COLOR_BGR2RGB)
+    return image
+
+
+class FrameServer:
+    """Random access to single frames of the camera topics of a bag."""
+
+    def __init__(self, input_path, bagtype='mcap', topics=None, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialize a FrameServer and index the bag in one pass.
+
+        input_path: a bag directory or a single .mcap / .db3 file
+        bagtype: mcap or db3
+        topics: optional list of topics to index, defaults to all camera topics
+        cache_size: number of decoded frames kept in memory
+
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f'The specified bag does not exist: {input_path}')
+        if bagtype not in ('mcap', 'db3'):
+            raise NotImplementedError(
+                f'Unsupported bag format {bagtype}, supported options are db3 and mcap')
+        self.bagtype = bagtype
+        if os.path.isdir(input_path):
+            self.files = sorted(glob.glob(os.path.join(input_path, f'*.{bagtype}')))
+        else:
+            self.files = [input_path]
+        self.wanted_topics = None if topics is None else set(topics)
+        self.index = {}
+        self._chunks = {}
+        self._handles = {}
+        self._chunk_cache = _LruCache(CHUNK_CACHE_SIZE)
+        self._frame_cache = _LruCache(cache_size)
+
+        for file_index, path in enumerate(self.files):
+            if bagtype == 'mcap':
+                self._index_mcap(file_index, path)
+            else:
+                self._index_db3(file_index, path)
+        for topic_index in self.index.values():
+            topic_index.finish()
+
+    def _wants(self, topic, msgtype):
+        return msgtype in CAMERA_TYPES and (
+            self.wanted_topics is None or topic in self.wanted_topics)
+
+    def _index_mcap(self, file_index, path):
+        schemas = {}
+        channels = {}
+
+        def add_schema(data, offset):
+            (schema_id,) = _UINT16.unpack_from(data, offset)
+            schemas[schema_id], _ = _string(data, offset + 2)
+
+        def add_channel(data, offset):
+            channel_id, schema_id = struct.unpack_from('<HH', data, offset)
+            topic, _ = _string(data, offset + 4)
+            msgtype = schemas.get(schema_id)
+            if self._wants(topic, msgtype):
+                channels[channel_id] = self.index.setdefault(topic, _TopicIndex(msgtype))
+
+        def add_message(data, offset, length, chunk, base):
+            # offset is where the message record content starts, base maps it to a location
+            channel_id, _, log_time, _ = _MESSAGE.unpack_from(data, offset)
+            topic_index = channels.get(channel_id)
+            if topic_index is not None:
+                start = offset + _MESSAGE.size
+                topic_index.add(data[start:offset + length], log_time,
+                                (file_index, chunk, base + start, length - _MESSAGE.size))
+
+        with open(path, 'rb') as f:
+            if f.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+                raise ValueError(f'{path} is not an MCAP file')
+            while True:
+                record_offset = f.tell()
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    break
+                opcode, length = _RECORD.unpack(header)
+                if opcode == _OP_DATA_END:
+                    break
+                if opcode not in (_OP_SCHEMA, _OP_CHANNEL, _OP_MESSAGE, _OP_CHUNK):
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                content = f.read(length)
+                content_offset = record_offset + _RECORD.size
+                if opcode == _OP_SCHEMA:
+                    add_schema(content, 0)
+                elif opcode == _OP_CHANNEL:
+                    add_channel(content, 0)
+                elif opcode == _OP_MESSAGE:
+                    add_message(content, 0, length, -1, content_offset)
+                else:
+                    _, _, uncompressed_size, _ = _CHUNK.unpack_from(content, 0)
+                    compression, offset = _string(content, _CHUNK.size)
+                    (records_length,) = _UINT64.unpack_from(content, offset)
+                    offset += 8
+                    records = decompress(content[offset:offset + records_length], compression,
+                                         uncompressed_size)
+                    if compression == '':
+                        # Messages can be read straight from the file
+                        chunk, base = -1, content_offset + offset
+                    else:
+                        chunk, base = len(self._chunks), 0
+                        self._chunks[chunk] = (file_index, content_offset + offset,
+                                               records_length, compression, uncompressed_size)
+                    position = 0
+                    while position < len(records):
+                        inner_opcode, inner_length = _RECORD.unpack_from(records, position)
+                        position += _RECORD.size
+                        if inner_opcode == _OP_SCHEMA:
+                            add_schema(records, position)
+                        elif inner_opcode == _OP_CHANNEL:
+                            add_channel(records, position)
+                        elif inner_opcode == _OP_MESSAGE:
+                            add_message(records, position, inner_length, chunk, base)
+                        position += inner_length
+
+    def _index_db3(self, file_index, path):
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            topics = {topic_id: (name, msgtype) for topic_id, name, msgtype in
+                      connection.execute('SELECT id, name, type FROM topics')}
+            indexes = {topic_id: self.index.setdefault(name, _TopicIndex(msgtype))
+                       for topic_id, (name, msgtype) in topics.items()
+                       if self._wants(name, msgtype)}
+            if not indexes:
+                return
+            rows = connection.execute(
+                'SELECT id, topic_id, timestamp, data FROM messages WHERE topic_id IN '
+                f'({", ".join("?" * len(indexes))}) ORDER BY id', list(indexes))
+            for row_id, topic_id, log_time, data in rows:
+                indexes[topic_id].add(data, log_time, (file_index, -1, row_id, len(data)))
+        finally:
+            connection.close()
+
+    @property
+    def topics(self):
+        return sorted(self.index)
+
+    def num_frames(self, topic):
+        return len(self.index[topic].stamps)
+
+    def stamps(self, topic):
+        """Return the header stamps of all frames of a topic in nanoseconds."""
+        return self.index[topic].stamps
+
+    def frame_index(self, topic, stamp_ns):
+        """Return the number of the frame of a topic with the header stamp closest to stamp_ns."""
+        topic_index = self.index[topic]
+        stamps = topic_index.sorted_stamps
+        if len(stamps) == 0:
+            raise IndexError(f'{topic} has no frames')
+        position = int(np.searchsorted(stamps, stamp_ns))
+        candidates = [i for i in (position - 1, position) if 0 <= i < len(stamps)]
+        closest = min(candidates, key=lambda i: abs(int(stamps[i]) - stamp_ns))
+        return int(topic_index.order[closest])
+
+    def _resolve(self, topic, index_or_stamp):
+        # Frame numbers are small, stamps are nanoseconds, so anything at or past the number
+        # of frames is taken as a stamp
+        index_or_stamp = int(index_or_stamp)
+        num_frames = self.num_frames(topic)
+        if 0 <= index_or_stamp < num_frames:
+            return index_or_stamp
+        if index_or_stamp < 0 and -num_frames <= index_or_stamp:
+            return num_frames + index_or_stamp
+        return self.frame_index(topic, index_or_stamp)
+
+    def _handle(self, file_index):
+        handle = self._handles.get(file_index)
+        if handle is None:
+            path = self.files[file_index]
+            if self.bagtype == 'mcap':
+                handle = open(path, 'rb')
+            else:
+                handle = sqlite3.connect(f'file:{path}?mode=ro', uri=True,
+                                         check_same_thread=False)
+            self._handles[file_index] = handle
+        return handle
+
+    def _read_chunk(self, chunk):
+        file_index, offset, length, compression, uncompressed_size = self._chunks[chunk]
+        f = self._handle(file_index)
+        f.seek(offset)
+        return decompress(f.read(length), compression, uncompressed_size)
+
+    def get_message(self, topic, index_or_stamp):
+        """
+        Return the serialized message of one frame.
+
+        Args
+        ----
+            topic (str): A camera topic
+            index_or_stamp (int): Frame number, negative numbers count from the end, or a
+                header stamp in nanoseconds, which selects the closest frame
+
+        Returns
+        -------
+            bytes: The serialized message
+
+        """
+        index = self._resolve(topic, index_or_stamp)
+        file_index, chunk, offset, length = (int(value)
+                                             for value in self.index[topic].locations[index])
+        if self.bagtype == 'db3':
+            (data,) = self._handle(file_index).execute(
+                'SELECT data FROM messages WHERE id = ?', (offset,)).fetchone()
+            return bytes(data)
+        if chunk < 0:
+            f = self._handle(file_index)
+            f.seek(offset)
+            return f.read(length)
+        records = self._chunk_cache.get_or_add(chunk, lambda: self._read_chunk(chunk))
+        return bytes(records[offset:offset + length])
+
+    def get_frame(self, topic, index_or_stamp):
+        """
+        Decode one frame, see get_message for the arguments.
+
+        Returns
+        -------
+            np.ndarray: An RGB image, or a 2D array for mono encodings. The array is shared
+                with the cache, copy it before modifying it.
+
+        """
+        index = self._resolve(topic, index_or_stamp)
+        topic_index = self.index[topic]
+        return self._frame_cache.get_or_add(
+            (topic, index), lambda: decode_frame(topic_index.msgtype,
+                                                 self.get_message(topic, index),
+                                                 topic_index.parameter_sets))
+
+    def get_frames(self, stamp_ns, topics=None):
+        """
+        Decode the frame closest to a header stamp on every camera topic.
+
+        Args
+        ----
+            stamp_ns (int): Header stamp in nanoseconds
+            topics ([str]): Optional list of topics, defaults to all indexed topics
+
+        Returns
+        -------
+            {str: (int, np.ndarray)}: Frame number and frame by topic
+
+        """
+        frames = {}
+        for topic in self.topics if topics is None else topics:
+            index = self.frame_index(topic, stamp_ns)
+            frames[topic] = (index, self.get_frame(topic, index))
+        return frames
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
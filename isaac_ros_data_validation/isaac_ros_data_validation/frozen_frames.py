@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Frozen frame detection by hashing image payloads.
+
+A camera that keeps republishing the same buffer still produces perfectly spaced timestamps,
+so it passes every timing check. Real sensor images always differ by at least some noise, so a
+payload that is byte for byte identical to one of the last few frames is frozen. Payloads are
+hashed with xxhash if it is installed, and with blake2b otherwise.
+"""
+
+from collections import deque
+
+from isaac_ros_data_validation.cdr import (
+    compressed_image_payload_range,
+    header_stamp_ns,
+    image_payload_range,
+)
+from isaac_ros_data_validation.message_pass import error_entry, MessagePass
+
+try:
+    import xxhash
+
+    def payload_hash(data):
+        """Return a 64 bit hash of a buffer."""
+        return xxhash.xxh3_64_intdigest(data)
+
+except ImportError:
+    import hashlib
+
+    def payload_hash(data):
+        """Return a 64 bit hash of a buffer."""
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+PAYLOAD_RANGES = {
+    'sensor_msgs/msg/CompressedImage': compressed_image_payload_range,
+    'sensor_msgs/msg/Image': image_payload_range,
+}
+
+
+class _TopicHashes:
+    # Hashes of the last `window` frames, plus the frozen frames found so far
+
+    def __init__(self, payload_range, window):
+        self.payload_range = payload_range
+        self.recent = deque(maxlen=window)
+        self.recent_counts = {}
+        self.num_frames = 0
+        self.frozen = []
+        self.acqtimes = []
+
+    def is_repeat(self, digest):
+        repeat = digest in self.recent_counts
+        if len(self.recent) == self.recent.maxlen:
+            evicted = self.recent[0]
+            self.recent_counts[evicted] -= 1
+            if not self.recent_counts[evicted]:
+                del self.recent_counts[evicted]
+        self.recent.append(digest)
+        self.recent_counts[digest] = self.recent_counts.get(digest, 0) + 1
+        return repeat
+
+
+class FrozenFramePass(MessagePass):
+    """
+    Flag image frames whose payload repeats one of the previous frames.
+
+    A window larger than one also catches cameras cycling through a small pool of stale
+    buffers, which never repeat the directly preceding frame.
+    """
+
+    def __init__(self, window=4):
+        """
+        Initialize a FrozenFramePass.
+
+        window: number of previous frames a payload is compared against
+
+        """
+        self.window = window
+        self.topics = {}
+
+    def accepts(self, topic, msgtype):
+        if msgtype in PAYLOAD_RANGES:
+            self.topics[topic] = _TopicHashes(PAYLOAD_RANGES[msgtype], self.window)
+            return True
+        return False
+
+    def process(self, topic, timestamp, rawdata):
+        state = self.topics[topic]
+        index = state.num_frames
+        state.num_frames += 1
+        try:
+            offset, length = state.payload_range(rawdata)
+        except Exception:
+            # Truncated messages are reported by the bitstream checks
+            return
+        if length == 0:
+            return
+
+        digest = payload_hash(memoryview(rawdata)[offset:offset + length])
+        if state.is_repeat(digest):
+            state.frozen.append(index)
+            state.acqtimes.append(header_stamp_ns(rawdata))
+
+    def results(self):
+        stats = {}
+        errors = {}
+        for topic, state in self.topics.items():
+            runs = []
+            for index, acqtime in zip(state.frozen, state.acqtimes):
+                if runs and runs[-1]['end_index'] == index - 1:
+                    runs[-1]['end_index'] = index
+                    runs[-1]['end_ns'] = acqtime
+                    runs[-1]['num_frames'] += 1
+                else:
+                    runs.append({
+                        'start_index': index,
+                        'end_index': index,
+                        'start_ns': acqtime,
+                        'end_ns': acqtime,
+                        'num_frames': 1,
+                    })
+
+            stats[topic] = {
+                'num_frozen_frames': len(state.frozen),
+                'percent_frozen_frames': 100.0 * len(state.frozen) / max(state.num_frames, 1),
+                'num_frozen_runs': len(runs),
+                'longest_frozen_run': max((run['num_frames'] for run in runs), default=0),
+                'frozen_runs': runs,
+            }
+            errors[topic] = {'frozen_frame': error_entry(state.frozen, state.acqtimes)}
+        return stats, errors
+
+
+def format_frozen(stats):
+    """Format a one line summary of the frozen frame stats of a topic."""
+    if not stats['num_frozen_frames']:
+        return 'None'
+    return (f'{stats["num_frozen_frames"]} frames in {stats["num_frozen_runs"]} runs, '
+            f'longest run {stats["longest_frozen_run"]} frames')
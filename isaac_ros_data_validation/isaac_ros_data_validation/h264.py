@@ -0,0 +1,326 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+H.264 Annex B bitstream checks for image_compressed topics, without decoding.
+
+Only NAL unit headers and the first bits of each slice header are parsed, everything else is
+found with bytes.find on the serialized message, so a pass runs at close to disk speed.
+The Hawk and Owl encoders run with the iframe_cqp config, so by default every frame is
+expected to be an IDR frame.
+"""
+
+from array import array
+from itertools import groupby
+
+from isaac_ros_data_validation.cdr import (
+    compressed_image_format,
+    compressed_image_payload_range,
+    header_stamp_ns,
+)
+from isaac_ros_data_validation.message_pass import error_entry, MessagePass
+from isaac_ros_data_validation.streaming_stats import RunningStats, StreamingHistogram
+
+START_CODE = b'\x00\x00\x01'
+
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SEI = 6
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+
+# Frame type codes used in the frame type sequence
+FRAME_IDR = 'I'
+FRAME_INTRA = 'i'
+FRAME_P = 'P'
+FRAME_B = 'B'
+FRAME_NONE = '-'
+
+ERROR_NAMES = (
+    'empty_frame',
+    'truncated_frame',
+    'malformed_frame',
+    'non_idr_frame',
+    'undersized_frame',
+    'parameter_set_change',
+)
+
+# Parameter sets are looked for in this many bytes at the start of each frame
+PARAMETER_SET_SCAN_BYTES = 512
+
+# slice_type % 5 -> frame type, SP and SI slices are reported as P and intra
+_SLICE_TYPES = (FRAME_P, FRAME_B, FRAME_INTRA, FRAME_P, FRAME_INTRA)
+
+
+def iter_nal_units(data, start=0, end=None):
+    """
+    Yield (offset, length) of every NAL unit in an Annex B byte stream.
+
+    The offset points at the NAL header byte, i.e. after the start code. Trailing zero bytes
+    of a four byte start code are not included in the length of the previous NAL unit.
+
+    Args
+    ----
+        data (bytes): Buffer holding the byte stream
+        start (int): Offset of the byte stream in data
+        end (int): End of the byte stream in data, defaults to len(data)
+
+    Yields
+    ------
+        (int, int): Offset and length of a NAL unit
+
+    """
+    if end is None:
+        end = len(data)
+    position = data.find(START_CODE, start, end)
+    while position != -1:
+        nal_start = position + 3
+        position = data.find(START_CODE, nal_start, end)
+        nal_end = end if position == -1 else position
+        while nal_end > nal_start and data[nal_end - 1] == 0 and position != -1:
+            nal_end -= 1
+        yield nal_start, nal_end - nal_start
+
+
+def parameter_sets(rawdata, scan_bytes=PARAMETER_SET_SCAN_BYTES):
+    """
+    Return the SPS and PPS at the start of a serialized sensor_msgs/CompressedImage.
+
+    Args
+    ----
+        rawdata (bytes): The serialized message
+        scan_bytes (int): Parameter sets are looked for in this many bytes of the frame
+
+    Returns
+    -------
+        {int: bytes}: Each parameter set with its start code, by NAL unit type
+
+    """
+    try:
+        offset, length = compressed_image_payload_range(rawdata)
+    except ValueError:
+        return {}
+    found = {}
+    end = offset + min(length, scan_bytes)
+    for nal_offset, nal_length in iter_nal_units(rawdata, offset, end):
+        # Only take NAL units that end inside the scanned range
+        if nal_offset + nal_length >= end or not nal_length:
+            break
+        nal_type = rawdata[nal_offset] & 0x1F
+        if nal_type in (NAL_SPS, NAL_PPS):
+            found[nal_type] = START_CODE + rawdata[nal_offset:nal_offset + nal_length]
+    return found
+
+
+def _read_ue(bits, position):
+    # Read an unsigned exp-golomb code from a string of '0' / '1'
+    zeros = 0
+    while bits[position + zeros] == '0':
+        zeros += 1
+    end = position + 2 * zeros + 1
+    return int(bits[position + zeros:end], 2) - 1, end
+
+
+def slice_frame_type(data, offset, length):
+    """
+    Return the frame type of a non-IDR slice NAL unit from its slice_type.
+
+    Args
+    ----
+        data (bytes): Buffer holding the NAL unit
+        offset (int): Offset of the NAL header byte
+        length (int): Length of the NAL unit, including the header byte
+
+    Returns
+    -------
+        str: One of FRAME_P, FRAME_B, FRAME_INTRA, or FRAME_NONE if the header is unreadable
+
+    """
+    # first_mb_in_slice and slice_type fit in a few bytes, drop emulation prevention bytes
+    # before reading them
+    header = data[offset + 1:offset + min(length, 12)].replace(b'\x00\x00\x03', b'\x00\x00')
+    if not header:
+        return FRAME_NONE
+    bits = format(int.from_bytes(header, 'big'), f'0{len(header) * 8}b')
+    try:
+        _, position = _read_ue(bits, 0)
+        slice_type, _ = _read_ue(bits, position)
+    except (IndexError, ValueError):
+        return FRAME_NONE
+    return _SLICE_TYPES[slice_type % 5]
+
+
+class _TopicBitstream:
+    # Per topic state, constant size apart from one small entry per frame
+
+    def __init__(self):
+        self.frame_types = bytearray()
+        self.sizes = array('I')
+        self.size_stats = RunningStats()
+        self.size_histogram = StreamingHistogram(min_value=1, max_value=1e9)
+        self.acqtimes = []
+        self.sps = None
+        self.pps = None
+        self.errors = {name: [] for name in ERROR_NAMES if name != 'undersized_frame'}
+
+
+class H264Pass(MessagePass):
+    """
+    Check the H.264 bitstream of CompressedImage topics.
+
+    Reports per topic the sequence of frame types, the frame size distribution, and errors for
+    empty, truncated, malformed, non IDR and undersized frames as well as SPS / PPS changes in
+    the middle of a recording. Topics whose first message is not in h264 format, e.g. jpeg,
+    are skipped.
+    """
+
+    def __init__(self, expect_idr_only=True, undersized_fraction=0.25):
+        """
+        Initialize an H264Pass.
+
+        expect_idr_only: report every frame that is not an IDR frame as an error
+        undersized_fraction: frames smaller than this fraction of the median size are
+            reported as undersized
+
+        """
+        self.expect_idr_only = expect_idr_only
+        self.undersized_fraction = undersized_fraction
+        self.topics = {}
+        self.skipped_topics = set()
+
+    def accepts(self, topic, msgtype):
+        return msgtype == 'sensor_msgs/msg/CompressedImage'
+
+    def process(self, topic, timestamp, rawdata):
+        state = self.topics.get(topic)
+        if state is None:
+            if topic in self.skipped_topics or not self._is_h264(rawdata):
+                self.skipped_topics.add(topic)
+                return
+            state = self.topics[topic] = _TopicBitstream()
+
+        index = len(state.frame_types)
+        try:
+            acqtime = header_stamp_ns(rawdata)
+            offset, length = compressed_image_payload_range(rawdata)
+        except Exception:
+            state.acqtimes.append(None)
+            state.frame_types.append(ord(FRAME_NONE))
+            state.sizes.append(0)
+            state.errors['truncated_frame'].append(index)
+            return
+
+        state.acqtimes.append(acqtime)
+        state.sizes.append(length)
+        state.size_stats.update(length)
+        state.size_histogram.add(length)
+        frame_type = self._scan_frame(state, index, rawdata, offset, length)
+        state.frame_types.append(ord(frame_type))
+        # Frames without a readable slice are already reported as empty, malformed or truncated
+        if self.expect_idr_only and frame_type not in (FRAME_IDR, FRAME_NONE):
+            state.errors['non_idr_frame'].append(index)
+
+    @staticmethod
+    def _is_h264(rawdata):
+        # A first message too short to read the format is checked as h264, and reported
+        try:
+            return 'h264' in compressed_image_format(rawdata).lower()
+        except Exception:
+            return True
+
+    def _scan_frame(self, state, index, rawdata, offset, length):
+        if length == 0:
+            state.errors['empty_frame'].append(index)
+            return FRAME_NONE
+        if not (rawdata.startswith(START_CODE, offset) or
+                rawdata.startswith(b'\x00' + START_CODE, offset)):
+            state.errors['malformed_frame'].append(index)
+            return FRAME_NONE
+
+        frame_type = FRAME_NONE
+        truncated = False
+        for nal_offset, nal_length in iter_nal_units(rawdata, offset, offset + length):
+            if nal_length <= 1:
+                truncated = True
+                continue
+            nal_type = rawdata[nal_offset] & 0x1F
+            if nal_type == NAL_IDR:
+                frame_type = FRAME_IDR
+            elif nal_type == NAL_SLICE and frame_type == FRAME_NONE:
+                frame_type = slice_frame_type(rawdata, nal_offset, nal_length)
+            elif nal_type in (NAL_SPS, NAL_PPS):
+                parameter_set = rawdata[nal_offset:nal_offset + nal_length]
+                name = 'sps' if nal_type == NAL_SPS else 'pps'
+                previous = getattr(state, name)
+                if previous is not None and previous != parameter_set:
+                    state.errors['parameter_set_change'].append(index)
+                setattr(state, name, parameter_set)
+
+        # A frame without any slice data was cut off after its parameter sets
+        if truncated or frame_type == FRAME_NONE:
+            state.errors['truncated_frame'].append(index)
+        return frame_type
+
+    def results(self):
+        stats = {}
+        errors = {}
+        for topic, state in self.topics.items():
+            median = state.size_histogram.percentile(50)
+            undersized = [
+                index for index, size in enumerate(state.sizes)
+                if 0 < size < self.undersized_fraction * median
+            ]
+
+            frame_types = state.frame_types.decode()
+            stats[topic] = {
+                'num_frames': len(frame_types),
+                'frame_type_counts': {
+                    frame_type: frame_types.count(frame_type)
+                    for frame_type in sorted(set(frame_types))
+                },
+                'frame_type_sequence': _run_length(frame_types),
+                'mean_frame_kb': state.size_stats.mean / 1e3,
+                'std_frame_kb': state.size_stats.std / 1e3,
+                'min_frame_kb': state.size_stats.min / 1e3,
+                'p1_frame_kb': state.size_histogram.percentile(1) / 1e3,
+                'p50_frame_kb': median / 1e3,
+                'p99_frame_kb': state.size_histogram.percentile(99) / 1e3,
+                'max_frame_kb': state.size_stats.max / 1e3,
+            }
+
+            topic_errors = dict(state.errors, undersized_frame=undersized)
+            errors[topic] = {
+                name: error_entry(indices, [state.acqtimes[index] for index in indices])
+                for name, indices in topic_errors.items()
+            }
+        return stats, errors
+
+
+def _run_length(sequence):
+    # 'IIIIP' -> [('I', 4), ('P', 1)]
+    return [(item, sum(1 for _ in run)) for item, run in groupby(sequence)]
+
+
+def format_bitstream(stats, errors):
+    """Format a one line summary of the bitstream stats of a topic."""
+    counts = ', '.join(f'{count} {frame_type}' for frame_type, count in
+                       stats['frame_type_counts'].items())
+    problems = ', '.join(f'{errors[name]["num_errors"]} {name}' for name in ERROR_NAMES
+                         if name in errors and errors[name]['num_errors'])
+    return (f'{counts} (I = IDR), {stats["p50_frame_kb"]:.1f} kB median frame'
+            f'{", " + problems if problems else ""}')
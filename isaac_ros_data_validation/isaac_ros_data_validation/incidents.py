@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Cross topic event index.
+
+Drops, desyncs and latency spikes of all topics are turned into time intervals on the bag log
+clock, which every topic shares, and overlapping intervals are merged with a sweep line. An
+incident that involves several sensors at once points at a system stall (recorder, disk, CPU),
+while a fault confined to one sensor points at that sensor or its driver. The left and right
+images of a stereo camera belong to the same sensor.
+"""
+
+from collections import Counter, namedtuple
+
+from isaac_ros_data_validation.topics import pair_stereo_topics, sensor_name, stereo_sync_name
+
+# A single fault on one topic, start_ns / end_ns are bag log times
+Event = namedtuple('Event', ['topic', 'kind', 'start_ns', 'end_ns'])
+
+# Error names of BagTester results that become events, and the kind they are reported as
+EVENT_KINDS = {
+    'frame_drop': 'drop',
+    'desync': 'desync',
+    'latency_spike': 'latency_spike',
+}
+
+# Latency spikes longer than this are not trusted to be on the log clock
+MAX_LATENCY_NS = 10e9
+
+
+def _topic_events(df, topic, kind, indices):
+    # Turn row indices of a topic into events on the log clock
+    log_times = df['timestamp']
+    events = []
+    for index in indices:
+        if index not in log_times.index:
+            continue
+        end_ns = int(log_times[index])
+        start_ns = end_ns
+        if kind == 'drop':
+            # The missing frames are between the previous sample and this one
+            position = log_times.index.get_loc(index)
+            if position > 0:
+                start_ns = int(log_times.iloc[position - 1])
+        elif kind == 'latency_spike':
+            # The message was stuck between capture and being written
+            latency = log_times[index] - df['acqtime'][index]
+            if 0 < latency < MAX_LATENCY_NS:
+                start_ns = end_ns - int(latency)
+        events.append(Event(topic, kind, start_ns, end_ns))
+    return events
+
+
+def collect_events(dfs, all_errors):
+    """
+    Collect events from the results of a validation run.
+
+    Args
+    ----
+        dfs: the data frames returned by read_rosbag
+        all_errors: the errors returned by do_validation / _analyze_single
+
+    Returns
+    -------
+        [Event]: Events of all topics, unsorted
+
+    """
+    # Stereo desyncs are reported under a sync name, with indices into the left topic
+    sync_topics = {
+        stereo_sync_name(left): left
+        for left, _ in pair_stereo_topics(list(dfs.keys()))
+    }
+    # Latency errors are reported per topic under 'recorder_latency'
+    per_topic_errors = list(all_errors.items())
+    per_topic_errors += list(all_errors.get('recorder_latency', {}).items())
+
+    events = []
+    for key, errors in per_topic_errors:
+        topic = sync_topics.get(key, key)
+        if topic not in dfs or not isinstance(errors, dict):
+            continue
+        for name, kind in EVENT_KINDS.items():
+            if name in errors and errors[name]['num_errors']:
+                events.extend(_topic_events(dfs[topic], topic, kind, errors[name]['indices']))
+    return events
+
+
+def sweep_events(events, padding_ns=0):
+    """
+    Group events into clusters of overlapping intervals.
+
+    Sorts the events by start time once and sweeps over them, keeping the end of the current
+    cluster, so this is O(n log n) in the number of events.
+
+    Args
+    ----
+        events ([Event]): The events to group
+        padding_ns (int): Events closer than this are considered overlapping
+
+    Returns
+    -------
+        [[Event]]: Clusters of events, ordered by start time
+
+    """
+    clusters = []
+    cluster_end = None
+    for event in sorted(events, key=lambda event: (event.start_ns, event.end_ns)):
+        if cluster_end is not None and event.start_ns <= cluster_end + padding_ns:
+            clusters[-1].append(event)
+            cluster_end = max(cluster_end, event.end_ns)
+        else:
+            clusters.append([event])
+            cluster_end = event.end_ns
+    return clusters
+
+
+def find_incidents(events, padding_ms=50.0, min_sensors=2):
+    """
+    Split events into system wide incidents and isolated per sensor faults.
+
+    Args
+    ----
+        events ([Event]): Events from collect_events
+        padding_ms (float): Events closer than this are merged into one incident
+        min_sensors (int): Number of distinct sensors an incident needs to be system wide
+
+    Returns
+    -------
+        incidents ([dict]): System wide incidents, with start_ns, end_ns, the participating
+            topics and sensors, the number of events by kind and the events themselves
+        isolated ([dict]): Faults confined to a single sensor, in the same format
+
+    """
+    incidents = []
+    isolated = []
+    for cluster in sweep_events(events, int(padding_ms * 1e6)):
+        topics = sorted({event.topic for event in cluster})
+        sensors = sorted({sensor_name(topic) for topic in topics})
+        entry = {
+            'start_ns': min(event.start_ns for event in cluster),
+            'end_ns': max(event.end_ns for event in cluster),
+            'topics': topics,
+            'sensors': sensors,
+            'kinds': dict(Counter(event.kind for event in cluster)),
+            'events': cluster,
+        }
+        (incidents if len(sensors) >= min_sensors else isolated).append(entry)
+    return incidents, isolated
+
+
+def format_incident(incident, start_ns):
+    """Format a one line summary of an incident, times relative to start_ns."""
+    kinds = ', '.join(f'{count} {kind}' for kind, count in sorted(incident['kinds'].items()))
+    return (f'{(incident["start_ns"] - start_ns) / 1e9:.3f} s to '
+            f'{(incident["end_ns"] - start_ns) / 1e9:.3f} s: {kinds} on '
+            f'{", ".join(incident["sensors"])}')
@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Minimal recursive inotify watcher, using libc through ctypes.
+
+inotify watches single directories, so every directory below the root gets its own watch, and
+directories created later are added as their IN_CREATE event arrives. The tree is only walked
+once at startup, and again if the kernel event queue overflows.
+"""
+
+from collections import namedtuple
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Enough to follow new recordings and the files closed in them
+DEFAULT_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of NUL padded name
+_EVENT = struct.Struct('iIII')
+
+# path is the full path of the file or directory the event is about
+Event = namedtuple('Event', ['path', 'mask'])
+
+
+def _libc():
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class RecursiveWatcher:
+    """Watch a directory tree for files being closed or moved into it."""
+
+    def __init__(self, root, mask=DEFAULT_MASK):
+        """
+        Initialize a RecursiveWatcher and add watches for the whole tree below root.
+
+        root: the directory to watch
+        mask: the inotify events to report, IN_CREATE is always added to follow new
+            directories
+
+        """
+        self.libc = _libc()
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f'inotify_init1 failed: {os.strerror(errno)}')
+        self.root = root
+        self.mask = mask | IN_CREATE
+        self.paths = {}
+        self.add_tree(root)
+
+    def add_watch(self, path):
+        """Watch a single directory, ignoring directories that vanished in the meantime."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno in (2, 20):  # ENOENT, ENOTDIR
+                return
+            raise OSError(errno, f'inotify_add_watch {path} failed: {os.strerror(errno)}')
+        self.paths[wd] = path
+
+    def add_tree(self, root):
+        """Watch a directory and every directory below it."""
+        for directory, dirs, _ in os.walk(root):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            self.add_watch(directory)
+
+    def read(self, timeout_s=None):
+        """
+        Wait for events.
+
+        Args
+        ----
+            timeout_s (float): How long to wait, None to wait forever
+
+        Returns
+        -------
+            [Event]: The events, empty on timeout. New directories are watched before this
+                returns, and an event with mask IN_Q_OVERFLOW means events were lost.
+
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout_s)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.add_tree(self.root)
+                events.append(Event(self.root, mask))
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if name.startswith(b'.'):
+                    continue
+                # Files may already have been written before the watch was added, so callers
+                # should look into new directories themselves
+                self.add_tree(path)
+            events.append(Event(path, mask))
+        return events
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
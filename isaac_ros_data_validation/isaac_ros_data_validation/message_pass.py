@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Analyses that run on serialized messages while read_rosbag reads a bag.
+
+Reading the bag dominates validation time, so payload level checks hook into that single pass
+instead of reading the bag again. A pass only ever sees the raw CDR bytes of a message, it is
+up to the pass to pull out what it needs, usually with the helpers in cdr.py.
+"""
+
+
+def error_entry(indices, acqtimes):
+    """Build an error entry in the same format BagTester uses."""
+    return {'num_errors': len(indices), 'indices': list(indices), 'acqtimes': list(acqtimes)}
+
+
+class MessagePass:
+    """Base class for a pass over the serialized messages of a bag."""
+
+    def accepts(self, topic, msgtype):
+        """
+        Return True if the pass wants to see messages of this topic.
+
+        Called once per topic, before the first message of the topic is processed.
+
+        Args
+        ----
+            topic (str): The topic name
+            msgtype (str): The message type, e.g. 'sensor_msgs/msg/CompressedImage'
+
+        Returns
+        -------
+            bool: Whether process should be called for messages of this topic
+
+        """
+        return True
+
+    def process(self, topic, timestamp, rawdata):
+        """
+        Process one serialized message.
+
+        topic: the topic name
+        timestamp: the bag log time in nanoseconds
+        rawdata: the serialized message, as bytes
+
+        """
+        raise NotImplementedError
+
+    def results(self):
+        """
+        Return the results of the pass.
+
+        Returns
+        -------
+            stats: {topic: dict} of statistics
+            errors: {topic: {error_name: error_entry}} in the same format as BagTester
+
+        """
+        raise NotImplementedError
@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Timing checks shared by the proof of life tests of the Nova sensor drivers.
+
+check_stream_timing subscribes to the given topics of a launch test, feeds every header stamp
+into a StreamingTimingChecker while it spins for the test duration, and asserts drops, jitter,
+drift and that the stamps span the whole test window. Memory does not grow with the duration,
+so the same test can run for two seconds or as an hour long soak run.
+"""
+
+import time
+
+from isaac_ros_data_validation.streaming_stats import StreamingTimingChecker
+import rclpy
+from rclpy.qos import qos_profile_sensor_data
+
+# Percentage of allowed dropped messages
+MSG_DROP_TOL_PERCENT = 0.01
+# Jitter tolerance as percentage of the message period
+FPS_DT_TOL_SECS_PERCENT = 0.1
+# Allowed difference between wall clock time dt and acq time dt
+ALLOWED_DIFF_WALL_CLOCK_ACQ_TIME = 0.05
+REPORT_PERIOD_S = 60
+
+
+def check_stream_timing(test, topics, msg_type, duration_s, expected_fps,
+                        msg_drop_tol_percent=MSG_DROP_TOL_PERCENT,
+                        fps_dt_tol_secs_percent=FPS_DT_TOL_SECS_PERCENT,
+                        allowed_diff_wall_clock_acq_time=ALLOWED_DIFF_WALL_CLOCK_ACQ_TIME,
+                        verbose=False):
+    """
+    Check the header stamps of topics for duration_s seconds and assert they are on time.
+
+    Args
+    ----
+        test (IsaacROSBaseTest): The running launch test, provides node and the assertions
+        topics (list): Topic names relative to the test namespace
+        msg_type (type): Message type of all topics, must have a header
+        duration_s (float): Test window in seconds
+        expected_fps (float): Nominal message rate of every topic
+
+    Returns
+    -------
+        dict: The StreamingTimingChecker of each topic
+
+    """
+    test.generate_namespace_lookup(topics)
+    checkers = {topic: StreamingTimingChecker(expected_fps, fps_dt_tol_secs_percent)
+                for topic in topics}
+
+    def make_callback(checker):
+        def callback(msg):
+            checker.update(msg.header.stamp.sec * 10**9 + msg.header.stamp.nanosec)
+        return callback
+
+    subs = [test.node.create_subscription(msg_type, test.namespaces[topic],
+                                          make_callback(checkers[topic]),
+                                          qos_profile_sensor_data)
+            for topic in topics]
+    try:
+        start_time = time.time()
+        end_time = start_time + duration_s
+        next_report = start_time + REPORT_PERIOD_S
+        while time.time() < end_time:
+            rclpy.spin_once(test.node, timeout_sec=0.1)
+            if verbose and time.time() > next_report:
+                for topic, checker in checkers.items():
+                    print(f'{topic}: {checker.summary()}')
+                next_report += REPORT_PERIOD_S
+        window_s = time.time() - start_time
+
+        for topic, checker in checkers.items():
+            summary = f'{topic}: {checker.summary()}'
+            if verbose:
+                print(summary)
+            # We need at least two msgs to check for jitter
+            test.assertGreaterEqual(checker.num_messages, 2, summary)
+            # The stamps have to cover the whole test window, a sensor that stops publishing
+            # part way through is otherwise only seen as a short, clean stream
+            test.assertLess(abs(window_s - checker.acq_span_ns / 1e9),
+                            allowed_diff_wall_clock_acq_time, summary)
+            # Check if the difference between first and last msg using
+            # wall clock time and acq time is within tolerance
+            test.assertLess(abs(checker.drift_ns) / 1e9,
+                            allowed_diff_wall_clock_acq_time, summary)
+            # Check if the difference between expected and received msgs are within threshold
+            test.assertLess(abs(checker.missing_messages),
+                            checker.expected_messages * msg_drop_tol_percent, summary)
+            # Check the time between every two consecutive msgs is within
+            # fps_dt_tol_secs_percent of the period
+            test.assertEqual(checker.num_jitter_violations, 0, summary)
+    finally:
+        for sub in subs:
+            test.assertTrue(test.node.destroy_subscription(sub))
+    return checkers
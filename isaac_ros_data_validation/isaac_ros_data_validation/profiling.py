@@ -0,0 +1,234 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Stage level profiling of the validation.
+
+A Profiler records wall time, CPU time, message counts and the peak RSS of named stages, and
+the time spent per topic in the hot loops, e.g. decoding messages. Stages nest, and are
+exported as JSON or in the Chrome trace event format, which chrome://tracing and Perfetto
+open. The disabled profiler, NULL_PROFILER, hands out one shared no-op stage, so
+instrumented code costs an attribute lookup and a method call per stage when profiling is
+off. Hot loops should check Profiler.enabled before taking timestamps.
+"""
+
+import json
+import os
+import resource
+import time
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _Stage:
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.messages = None
+
+    def __enter__(self):
+        self.depth = self.profiler._depth
+        self.profiler._depth += 1
+        self.start_ns = time.perf_counter_ns()
+        self.cpu_start_ns = time.process_time_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end_ns = time.perf_counter_ns()
+        cpu_ns = time.process_time_ns() - self.cpu_start_ns
+        self.profiler._depth -= 1
+        self.profiler.stages.append({
+            'name': self.name,
+            'depth': self.depth,
+            'start_s': (self.start_ns - self.profiler.start_ns) / 1e9,
+            'wall_s': (end_ns - self.start_ns) / 1e9,
+            'cpu_s': cpu_ns / 1e9,
+            'messages': self.messages,
+            'peak_rss_mb': _peak_rss_mb(),
+            **self.args,
+        })
+        return False
+
+
+class _NullStage:
+    messages = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """Collect stage timings of one validation run."""
+
+    def __init__(self, enabled=True):
+        """
+        Initialize a Profiler, the clock starts now.
+
+        enabled: if False, stage() and topic_time() do nothing
+
+        """
+        self.enabled = enabled
+        self.start_ns = time.perf_counter_ns()
+        self.cpu_start_ns = time.process_time_ns()
+        # Finished stages, in the order they finished
+        self.stages = []
+        # {topic: {kind: [total ns, count]}}
+        self.topics = {}
+        self._depth = 0
+
+    def stage(self, name, **args):
+        """
+        Time a stage, to be used as a context manager.
+
+        Set the messages attribute of the returned stage to record a message count. Keyword
+        arguments are stored with the stage, e.g. the topic of a per topic stage.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, args)
+
+    def topic_time(self, topic, kind, duration_ns):
+        """Add the duration of one event of a kind, e.g. 'decode', to a topic."""
+        if not self.enabled:
+            return
+        try:
+            entry = self.topics[topic][kind]
+        except KeyError:
+            entry = self.topics.setdefault(topic, {}).setdefault(kind, [0, 0])
+        entry[0] += duration_ns
+        entry[1] += 1
+
+    def results(self):
+        """
+        Return the profile as a JSON serializable dictionary.
+
+        Returns
+        -------
+            dict: total wall and CPU time, peak RSS, the stages sorted by start time and the
+                per topic totals
+
+        """
+        return {
+            'wall_s': (time.perf_counter_ns() - self.start_ns) / 1e9,
+            'cpu_s': (time.process_time_ns() - self.cpu_start_ns) / 1e9,
+            'peak_rss_mb': _peak_rss_mb(),
+            'stages': sorted(self.stages, key=lambda stage: stage['start_s']),
+            'topics': {
+                topic: {
+                    kind: {
+                        'total_s': total_ns / 1e9,
+                        'count': count,
+                        'mean_us': total_ns / count / 1e3,
+                    }
+                    for kind, (total_ns, count) in kinds.items()
+                }
+                for topic, kinds in sorted(self.topics.items())
+            },
+        }
+
+    def chrome_trace(self):
+        """
+        Return the profile in the Chrome trace event format.
+
+        Stages become complete ('X') events on one thread, so nested stages show as a flame
+        graph. The per topic totals have no time span and go into otherData.
+        """
+        results = self.results()
+        pid = os.getpid()
+        events = [{
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': 'data validation'},
+        }]
+        for stage in results['stages']:
+            events.append({
+                'name': stage['name'],
+                'cat': 'stage',
+                'ph': 'X',
+                'pid': pid,
+                'tid': 0,
+                'ts': stage['start_s'] * 1e6,
+                'dur': stage['wall_s'] * 1e6,
+                'args': {key: value for key, value in stage.items()
+                         if key not in ('name', 'start_s', 'wall_s', 'depth')},
+            })
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'topics': results['topics'], 'peak_rss_mb': results['peak_rss_mb']},
+        }
+
+    def write(self, json_file=None, trace_file=None):
+        """Write the profile as JSON and in the Chrome trace event format."""
+        if json_file is not None:
+            with open(json_file, 'w') as f:
+                json.dump(self.results(), f, indent=2)
+        if trace_file is not None:
+            with open(trace_file, 'w') as f:
+                json.dump(self.chrome_trace(), f)
+
+    def format_table(self):
+        """Format the stages and the slowest topics as a table, for the end of a report."""
+        results = self.results()
+        lines = [f'{"stage":<40} {"wall s":>9} {"cpu s":>9} {"messages":>10} {"rss MB":>9}']
+        for stage in results['stages']:
+            name = '  ' * stage['depth'] + stage['name']
+            if 'topic' in stage:
+                name += f' {stage["topic"]}'
+            messages = '' if stage['messages'] is None else stage['messages']
+            lines.append(f'{name[:40]:<40} {stage["wall_s"]:>9.3f} {stage["cpu_s"]:>9.3f} '
+                         f'{messages:>10} {stage["peak_rss_mb"]:>9.1f}')
+        lines.append(f'{"total":<40} {results["wall_s"]:>9.3f} {results["cpu_s"]:>9.3f} '
+                     f'{"":>10} {results["peak_rss_mb"]:>9.1f}')
+        topics = [(kind_stats['total_s'], topic, kind, kind_stats)
+                  for topic, kinds in results['topics'].items()
+                  for kind, kind_stats in kinds.items()]
+        if topics:
+            lines.append(f'\n{"topic":<52} {"kind":<8} {"total s":>9} {"count":>8} '
+                         f'{"mean us":>9}')
+            for total_s, topic, kind, kind_stats in sorted(topics, reverse=True)[:20]:
+                lines.append(f'{topic[:52]:<52} {kind:<8} {total_s:>9.3f} '
+                             f'{kind_stats["count"]:>8} {kind_stats["mean_us"]:>9.1f}')
+        return '\n'.join(lines)
+
+
+# Shared disabled profiler, the default everywhere a profiler can be passed
+NULL_PROFILER = Profiler(enabled=False)
+
+
+def profile_files(input_file):
+    """
+    Return the JSON and Chrome trace files for the profile of a bag.
+
+    Profiles of a recording directory go into it, profiles of a single bag file are named
+    after it, since one directory can hold several bag files.
+    """
+    if os.path.isdir(input_file):
+        return (os.path.join(input_file, 'validation_profile.json'),
+                os.path.join(input_file, 'validation_trace.json'))
+    base = os.path.splitext(input_file)[0]
+    return base + '_profile.json', base + '_trace.json'
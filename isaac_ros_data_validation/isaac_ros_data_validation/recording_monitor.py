@@ -0,0 +1,223 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Live health monitor for a running recording.
+
+Subscribes to the recorded topics with raw (serialized) callbacks, reads only the header stamp
+of each message and keeps constant memory timing statistics per topic. Once per second it
+publishes a diagnostic_msgs/DiagnosticArray on /diagnostics and logs the drop table that
+summarize_bag would print at the end of the recording, e.g.
+
+ros2 run isaac_ros_data_validation recording_monitor --ros-args \
+    -p topics:="['/front_stereo_camera/left/image_compressed']"
+"""
+
+from collections import deque
+
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+from isaac_ros_data_validation.cdr import header_stamp_ns
+from isaac_ros_data_validation.streaming_stats import (
+    nominal_rate,
+    StereoSyncTracker,
+    TimingStats,
+)
+from isaac_ros_data_validation.topics import pair_stereo_topics, stereo_sync_name
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from rosidl_runtime_py.utilities import get_message
+
+
+def _has_header(msg_type):
+    fields = msg_type.get_fields_and_field_types()
+    return next(iter(fields.items()), (None, None)) == ('header', 'std_msgs/Header')
+
+
+class _TopicState:
+    # Per topic bookkeeping, everything here is O(1) per message
+
+    def __init__(self, topic, table_bins):
+        self.topic = topic
+        self.stats = TimingStats(*nominal_rate(topic))
+        self.table = deque(maxlen=table_bins)
+        self.messages_this_tick = 0
+        self.drops_this_tick = 0
+
+
+class RecordingMonitor(Node):
+    """Publish live timing diagnostics for a list of recorded topics."""
+
+    def __init__(self):
+        super().__init__('recording_monitor')
+
+        self.declare_parameter('topics', rclpy.Parameter.Type.STRING_ARRAY)
+        self.declare_parameter('sync_window', 64)
+        self.declare_parameter('sync_tolerance_ns', 0)
+        self.declare_parameter('table_bins', 64)
+        self.declare_parameter('print_table', True)
+
+        self.topics = list(self.get_parameter('topics').value)
+        self.table_bins = self.get_parameter('table_bins').value
+        self.print_table = self.get_parameter('print_table').value
+
+        sync_window = self.get_parameter('sync_window').value
+        sync_tolerance_ns = self.get_parameter('sync_tolerance_ns').value
+        # {topic: (sync name, side)} for both topics of every stereo pair
+        self.stereo_topics = {}
+        for left, right in pair_stereo_topics(self.topics):
+            self.stereo_topics[left] = (stereo_sync_name(left), 'left')
+            self.stereo_topics[right] = (stereo_sync_name(left), 'right')
+        self.sync_trackers = {
+            sync_name: StereoSyncTracker(sync_window, sync_tolerance_ns)
+            for sync_name, _ in self.stereo_topics.values()
+        }
+        self.sync_desyncs_this_tick = {sync_name: 0 for sync_name in self.sync_trackers}
+        self.sync_tables = {
+            sync_name: deque(maxlen=self.table_bins) for sync_name in self.sync_trackers
+        }
+
+        self.states = {}
+        self.skipped = set()
+
+        self.diagnostics_pub = self.create_publisher(DiagnosticArray, '/diagnostics', 10)
+        self.create_timer(1.0, self.tick)
+
+    def subscribe_new_topics(self):
+        # Topics only show up once their publishers exist, so retry on every tick
+        topic_types = dict(self.get_topic_names_and_types())
+        for topic in self.topics:
+            if topic in self.states or topic in self.skipped or topic not in topic_types:
+                continue
+
+            msg_type = get_message(topic_types[topic][0])
+            if not _has_header(msg_type):
+                self.get_logger().info(f'{topic} has no header, not monitoring it')
+                self.skipped.add(topic)
+                continue
+
+            self.states[topic] = _TopicState(topic, self.table_bins)
+            # Best effort so the monitor can never apply back pressure on the recorder
+            self.create_subscription(
+                msg_type, topic, self._make_callback(topic), qos_profile_sensor_data, raw=True)
+
+    def _make_callback(self, topic):
+        state = self.states[topic]
+        sync = self.stereo_topics.get(topic)
+
+        def callback(rawdata):
+            stamp_ns = header_stamp_ns(rawdata)
+            state.messages_this_tick += 1
+            state.drops_this_tick += state.stats.update(stamp_ns)
+            if sync is not None:
+                sync_name, side = sync
+                self.sync_desyncs_this_tick[sync_name] += \
+                    self.sync_trackers[sync_name].update(side, stamp_ns)
+
+        return callback
+
+    def tick(self):
+        self.subscribe_new_topics()
+
+        array = DiagnosticArray()
+        array.header.stamp = self.get_clock().now().to_msg()
+
+        for topic, state in sorted(self.states.items()):
+            state.table.append(state.drops_this_tick > 0 or state.messages_this_tick == 0)
+            array.status.append(self._topic_status(state))
+            state.messages_this_tick = 0
+            state.drops_this_tick = 0
+
+        for sync_name, tracker in sorted(self.sync_trackers.items()):
+            desyncs = self.sync_desyncs_this_tick[sync_name]
+            self.sync_tables[sync_name].append(desyncs > 0)
+            array.status.append(self._sync_status(sync_name, tracker, desyncs))
+            self.sync_desyncs_this_tick[sync_name] = 0
+
+        self.diagnostics_pub.publish(array)
+
+        if self.print_table and self.states:
+            self.get_logger().info('\n' + self.ascii_tables())
+
+    def _topic_status(self, state):
+        stats = state.stats
+        status = DiagnosticStatus()
+        status.name = f'{self.get_name()}: {state.topic}'
+        if state.messages_this_tick == 0:
+            status.level = DiagnosticStatus.ERROR
+            status.message = 'No messages received'
+        elif state.drops_this_tick:
+            status.level = DiagnosticStatus.WARN
+            status.message = f'{state.drops_this_tick} frames dropped'
+        else:
+            status.level = DiagnosticStatus.OK
+            status.message = 'OK'
+
+        status.values = [
+            KeyValue(key='frequency', value=f'{state.messages_this_tick}'),
+            KeyValue(key='nominal_frequency', value=f'{stats.nominal_freq}'),
+            KeyValue(key='mean_period_ms', value=f'{stats.period_ns.mean / 1e6:.3f}'),
+            KeyValue(key='std_period_ms', value=f'{stats.period_ns.std / 1e6:.3f}'),
+            KeyValue(key='mean_absolute_error_ms', value=f'{stats.abs_error_ns.mean / 1e6:.3f}'),
+            KeyValue(key='total_frames_captured', value=f'{stats.total_frames_captured}'),
+            KeyValue(key='num_frames_dropped', value=f'{stats.num_frames_dropped}'),
+            KeyValue(key='percent_frames_dropped', value=f'{stats.percent_frames_dropped:.2f}'),
+            KeyValue(key='backwards_timestamps', value=f'{stats.num_backwards}'),
+            KeyValue(key='duplicate_timestamps', value=f'{stats.num_duplicates}'),
+        ]
+        return status
+
+    def _sync_status(self, sync_name, tracker, desyncs):
+        status = DiagnosticStatus()
+        status.name = f'{self.get_name()}: {sync_name}'
+        status.level = DiagnosticStatus.WARN if desyncs else DiagnosticStatus.OK
+        status.message = f'{desyncs} frames desynced' if desyncs else 'OK'
+        status.values = [
+            KeyValue(key='num_matched_frames', value=f'{tracker.num_matched}'),
+            KeyValue(key='num_desynced_frames', value=f'{tracker.num_desynced}'),
+            KeyValue(key='percent_desynced_frames', value=f'{tracker.percent_desynced:.2f}'),
+        ]
+        return status
+
+    def ascii_tables(self):
+        """Render the last table_bins seconds of drops / desyncs, one character per second."""
+        lines = []
+        for topic, state in sorted(self.states.items()):
+            topic_short = '/'.join(topic.split('/')[:3])
+            table = ''.join('x' if bad else '.' for bad in state.table)
+            lines.append(f'{topic_short:<42} [{table:<{self.table_bins}}]')
+        for sync_name, table in sorted(self.sync_tables.items()):
+            sync_short = '/'.join(sync_name.split('/')[:3]) + '/sync'
+            table = ''.join('x' if bad else '.' for bad in table)
+            lines.append(f'{sync_short:<42} [{table:<{self.table_bins}}]')
+        return '\n'.join(lines)
+
+
+def main():
+    rclpy.init()
+    node = RecordingMonitor()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.destroy_node()
+        rclpy.try_shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Host resource sampler that runs next to ros2 bag record.
+
+Reads /proc at a fixed rate and appends raw cumulative counters to resources.bin in the
+recording directory: system CPU and I/O wait ticks, available memory, sectors written to the
+disk holding the recording, and per process CPU ticks, RSS, block I/O delay and bytes written
+for the component containers and the bag recorder. The /proc files stay open and are re-read
+with pread, and nothing but struct packing happens per sample, so the sampler costs well
+under 1% of a core at 10 Hz. Rates are only computed when the file is read back, e.g.
+
+ros2 run isaac_ros_data_validation resource_sampler --output-dir /mnt/nova_ssd/recordings/x
+"""
+
+import argparse
+import os
+import re
+import signal
+import struct
+import time
+
+RESOURCE_FILE = 'resources.bin'
+DEFAULT_PATTERNS = ['component_container', 'ros2 bag record']
+
+_MAGIC = b'ISRS'
+_VERSION = 1
+# magic, version, clock ticks per second, page size, sector size, sample interval in seconds
+_HEADER = struct.Struct('<4sBHIId')
+# Records are a one byte type followed by a fixed struct
+_PROCESS = b'P'  # id, pid, label length, then the utf-8 label
+_PROCESS_STRUCT = struct.Struct('<HiH')
+_SYSTEM = b'S'  # time, cpu busy, cpu iowait, cpu total ticks, available kB, sectors written
+_SYSTEM_STRUCT = struct.Struct('<qqqqqq')
+_SAMPLE = b'T'  # time, id, cpu ticks, rss pages, block I/O delay ticks, bytes written
+_SAMPLE_STRUCT = struct.Struct('<qHqqqq')
+
+# How often the process list is scanned for new matching processes
+RESCAN_INTERVAL_S = 5.0
+# How often buffered samples are written out
+FLUSH_INTERVAL_S = 1.0
+
+_NODE_NAME = re.compile(r'__node:=(\S+)')
+
+
+def _pread(fd):
+    return os.pread(fd, 65536, 0).decode('ascii', errors='replace')
+
+
+class _ProcFile:
+    # A /proc file that is kept open and re-read from the start on every sample
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        return _pread(self.fd)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _disk_name(directory):
+    # Name of the block device in /proc/diskstats that holds a directory
+    device = os.stat(directory).st_dev
+    major, minor = os.major(device), os.minor(device)
+    with open('/proc/diskstats') as f:
+        for line in f:
+            fields = line.split()
+            if int(fields[0]) == major and int(fields[1]) == minor:
+                return fields[2]
+    return None
+
+
+class _Process:
+    # Open /proc files of one sampled process
+
+    def __init__(self, process_id, pid, label):
+        self.id = process_id
+        self.pid = pid
+        self.label = label
+        self.stat = _ProcFile(f'/proc/{pid}/stat')
+        try:
+            self.io = _ProcFile(f'/proc/{pid}/io')
+        except OSError:
+            # Only readable for processes of the same user
+            self.io = None
+
+    def sample(self):
+        # Fields after the command name, which may contain spaces, see proc(5)
+        fields = self.stat.read().rpartition(')')[2].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        rss_pages = int(fields[21])
+        blkio_ticks = int(fields[39]) if len(fields) > 39 else 0
+        write_bytes = -1
+        if self.io is not None:
+            for line in self.io.read().splitlines():
+                if line.startswith('write_bytes:'):
+                    write_bytes = int(line.split()[1])
+        return cpu_ticks, rss_pages, blkio_ticks, write_bytes
+
+    def close(self):
+        self.stat.close()
+        if self.io is not None:
+            self.io.close()
+
+
+class ResourceSampler:
+    """Sample system and per process resource usage into a binary file."""
+
+    def __init__(self, output_file, interval_s=0.1, patterns=None, disk_directory=None):
+        """
+        Initialize a ResourceSampler.
+
+        output_file: path of the binary file to write
+        interval_s: time between samples
+        patterns: substrings of the command line of processes to sample
+        disk_directory: directory on the disk to report write throughput for
+
+        """
+        self.interval_s = interval_s
+        self.patterns = patterns or DEFAULT_PATTERNS
+        self.processes = {}
+        self.finished_pids = set()
+        self.next_id = 0
+        self.stat = _ProcFile('/proc/stat')
+        self.meminfo = _ProcFile('/proc/meminfo')
+        self.diskstats = _ProcFile('/proc/diskstats')
+        self.disk = _disk_name(disk_directory or os.path.dirname(os.path.abspath(output_file)))
+        self.file = open(output_file, 'wb')
+        self.file.write(_HEADER.pack(_MAGIC, _VERSION, os.sysconf('SC_CLK_TCK'),
+                                     os.sysconf('SC_PAGE_SIZE'), 512, interval_s))
+        self.running = True
+
+    def _label(self, cmdline, pattern):
+        node = _NODE_NAME.search(cmdline)
+        return node.group(1) if node else pattern
+
+    def scan_processes(self):
+        """Start sampling processes that match one of the patterns."""
+        own_pid = os.getpid()
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            if pid == own_pid or pid in self.processes or pid in self.finished_pids:
+                continue
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    cmdline = f.read().replace(b'\0', b' ').decode(errors='replace')
+            except OSError:
+                continue
+            pattern = next((pattern for pattern in self.patterns if pattern in cmdline), None)
+            if pattern is None:
+                continue
+            try:
+                process = _Process(self.next_id, pid, self._label(cmdline, pattern))
+            except OSError:
+                continue
+            self.processes[pid] = process
+            self.next_id += 1
+            label = process.label.encode()
+            self.file.write(_PROCESS + _PROCESS_STRUCT.pack(process.id, pid, len(label)) + label)
+
+    def _system_sample(self, now_ns):
+        cpu = [int(value) for value in self.stat.read().split('\n', 1)[0].split()[1:]]
+        # user nice system idle iowait irq softirq steal, guest time is included in user
+        total = sum(cpu[:8])
+        busy = total - cpu[3] - cpu[4]
+        available_kb = -1
+        for line in self.meminfo.read().splitlines():
+            if line.startswith('MemAvailable:'):
+                available_kb = int(line.split()[1])
+                break
+        sectors_written = -1
+        if self.disk is not None:
+            for line in self.diskstats.read().splitlines():
+                fields = line.split()
+                if fields[2] == self.disk:
+                    sectors_written = int(fields[9])
+                    break
+        self.file.write(_SYSTEM + _SYSTEM_STRUCT.pack(
+            now_ns, busy, cpu[4], total, available_kb, sectors_written))
+
+    def sample(self):
+        """Take one sample of the system and of every tracked process."""
+        now_ns = time.time_ns()
+        self._system_sample(now_ns)
+        for pid, process in list(self.processes.items()):
+            try:
+                values = process.sample()
+            except (OSError, ValueError, IndexError):
+                # The process exited
+                process.close()
+                del self.processes[pid]
+                self.finished_pids.add(pid)
+                continue
+            self.file.write(_SAMPLE + _SAMPLE_STRUCT.pack(now_ns, process.id, *values))
+
+    def run(self):
+        """Sample until stop is called, e.g. from a signal handler."""
+        start = time.monotonic()
+        next_scan = start
+        next_flush = start + FLUSH_INTERVAL_S
+        num_samples = 0
+        while self.running:
+            now = time.monotonic()
+            if now >= next_scan:
+                self.scan_processes()
+                next_scan = now + RESCAN_INTERVAL_S
+            self.sample()
+            if now >= next_flush:
+                self.file.flush()
+                next_flush = now + FLUSH_INTERVAL_S
+            # Sleep until the next slot on a fixed grid, so the rate does not drift
+            num_samples += 1
+            delay = start + num_samples * self.interval_s - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                num_samples = int((time.monotonic() - start) / self.interval_s)
+        self.close()
+
+    def stop(self, *args):
+        """Stop sampling after the current sample."""
+        self.running = False
+
+    def close(self):
+        """Close the output and all /proc files."""
+        for process in self.processes.values():
+            process.close()
+        self.processes = {}
+        for proc_file in (self.stat, self.meminfo, self.diskstats):
+            proc_file.close()
+        self.file.close()
+
+
+def read_resource_samples(path):
+    """
+    Read a file written by ResourceSampler and compute rates between samples.
+
+    Args
+    ----
+        path (str): Path to resources.bin, or to the recording directory holding it
+
+    Returns
+    -------
+        system (pd.DataFrame): time_ns, cpu_percent, iowait_percent, mem_available_mb and
+            disk_write_mb_s, for every sample after the first
+        processes (pd.DataFrame): time_ns, pid, label, cpu_percent (of one core), rss_mb,
+            blkio_percent (time blocked on I/O) and write_mb_s for every process sample after
+            the first of that process
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    if os.path.isdir(path):
+        path = os.path.join(path, RESOURCE_FILE)
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, ticks_per_s, page_size, sector_size, _ = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f'{path} is not a resource sampler file')
+
+    labels = {}
+    system = []
+    samples = []
+    offset = _HEADER.size
+    # A sampler that was killed may have left a truncated last record
+    while offset < len(data):
+        kind = data[offset:offset + 1]
+        offset += 1
+        if kind == _SYSTEM and offset + _SYSTEM_STRUCT.size <= len(data):
+            system.append(_SYSTEM_STRUCT.unpack_from(data, offset))
+            offset += _SYSTEM_STRUCT.size
+        elif kind == _SAMPLE and offset + _SAMPLE_STRUCT.size <= len(data):
+            samples.append(_SAMPLE_STRUCT.unpack_from(data, offset))
+            offset += _SAMPLE_STRUCT.size
+        elif kind == _PROCESS and offset + _PROCESS_STRUCT.size <= len(data):
+            process_id, pid, length = _PROCESS_STRUCT.unpack_from(data, offset)
+            offset += _PROCESS_STRUCT.size
+            labels[process_id] = (pid, data[offset:offset + length].decode(errors='replace'))
+            offset += length
+        else:
+            break
+
+    system = np.array(system, dtype=np.int64).reshape(-1, _SYSTEM_STRUCT.size // 8)
+    time_ns, busy, iowait, total, available_kb, sectors = system.T
+    dt_s = np.diff(time_ns) / 1e9
+    total_ticks = np.maximum(np.diff(total), 1)
+    system_table = pd.DataFrame({
+        'time_ns': time_ns[1:],
+        'cpu_percent': 100.0 * np.diff(busy) / total_ticks,
+        'iowait_percent': 100.0 * np.diff(iowait) / total_ticks,
+        'mem_available_mb': available_kb[1:] / 1024.0,
+        'disk_write_mb_s': np.where(sectors[1:] >= 0,
+                                    np.diff(sectors) * sector_size / 1e6 / dt_s, np.nan),
+    })
+
+    columns = ['time_ns', 'id', 'cpu_ticks', 'rss_pages', 'blkio_ticks', 'write_bytes']
+    samples = pd.DataFrame(samples, columns=columns)
+    process_tables = []
+    for process_id, group in samples.groupby('id', sort=True):
+        pid, label = labels.get(process_id, (-1, str(process_id)))
+        dt_s = group['time_ns'].diff().to_numpy()[1:] / 1e9
+        write_bytes = group['write_bytes'].to_numpy()
+        process_tables.append(pd.DataFrame({
+            'time_ns': group['time_ns'].to_numpy()[1:],
+            'pid': pid,
+            'label': label,
+            'cpu_percent': 100.0 * group['cpu_ticks'].diff().to_numpy()[1:] / ticks_per_s / dt_s,
+            'rss_mb': group['rss_pages'].to_numpy()[1:] * page_size / 1e6,
+            'blkio_percent': 100.0 * group['blkio_ticks'].diff().to_numpy()[1:]
+            / ticks_per_s / dt_s,
+            'write_mb_s': np.where(write_bytes[1:] >= 0,
+                                   np.diff(write_bytes) / 1e6 / dt_s, np.nan),
+        }))
+    process_table = pd.concat(process_tables, ignore_index=True) if process_tables else \
+        pd.DataFrame(columns=['time_ns', 'pid', 'label', 'cpu_percent', 'rss_mb',
+                              'blkio_percent', 'write_mb_s'])
+    return system_table, process_table
+
+
+def _wait_for_directory(directory, timeout_s):
+    # ros2 bag record refuses to write into an existing directory, so it has to create it
+    deadline = time.monotonic() + timeout_s
+    while not os.path.isdir(directory):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'{directory} was not created within {timeout_s} s')
+        time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sample host resources during a recording.')
+    parser.add_argument('--output-dir', type=str, required=True,
+                        help=f'Recording directory, {RESOURCE_FILE} is written into it')
+    parser.add_argument('--rate-hz', type=float, default=10.0,
+                        help='Samples per second (default: 10.0)')
+    parser.add_argument('--match', type=str, action='append',
+                        help='Sample processes whose command line contains this, can be '
+                             f'repeated (default: {DEFAULT_PATTERNS})')
+    parser.add_argument('--wait-s', type=float, default=60.0,
+                        help='How long to wait for the recorder to create the directory '
+                             '(default: 60.0)')
+    # ros2 launch appends --ros-args to every process it runs through ros2 run
+    args, _ = parser.parse_known_args()
+
+    _wait_for_directory(args.output_dir, args.wait_s)
+    sampler = ResourceSampler(os.path.join(args.output_dir, RESOURCE_FILE),
+                              interval_s=1.0 / args.rate_hz, patterns=args.match,
+                              disk_directory=args.output_dir)
+    signal.signal(signal.SIGINT, sampler.stop)
+    signal.signal(signal.SIGTERM, sampler.stop)
+    sampler.run()
+
+
+if __name__ == '__main__':
+    main()
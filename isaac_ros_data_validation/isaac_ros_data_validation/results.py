@@ -0,0 +1,323 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Structured results of a validation, next to the text report of _summarize.
+
+The report is meant for people. Automation should read these results instead: every topic,
+sync group and q-score is a typed field, scores that could not be computed are None with the
+reason in QScores.failures, and the frame indices of every error are stored as run length
+encoded intervals rather than one list entry per frame. Results are written as compact JSON,
+or as a Parquet table with one row per topic and sync group.
+"""
+
+from dataclasses import asdict, dataclass, field
+import json
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Topics reported as the robot chassis in _summarize
+CHASSIS_TOPICS = (
+    '/odom', '/battery_state', '/imu', '/chassis/odom', '/chassis/battery_state', '/chassis/imu')
+# Key of the q-scores in the Parquet schema metadata
+PARQUET_METADATA_KEY = b'isaac_ros_data_validation'
+
+
+def _number(value):
+    # A finite float, or None for missing values, NaN and the exceptions stored in the stats
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.number)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _count(value):
+    number = _number(value)
+    return None if number is None else int(number)
+
+
+@dataclass
+class Intervals:
+    """Sorted, unique integer indices as run length encoded [start, stop) intervals."""
+
+    starts: List[int] = field(default_factory=list)
+    stops: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_indices(cls, indices):
+        """Encode indices in any order, duplicates are dropped."""
+        values = np.unique(np.asarray(indices, dtype=np.int64))
+        if not len(values):
+            return cls()
+        breaks = np.flatnonzero(np.diff(values) != 1) + 1
+        starts = values[np.r_[0, breaks]]
+        stops = values[np.r_[breaks - 1, len(values) - 1]] + 1
+        return cls(starts.tolist(), stops.tolist())
+
+    def to_indices(self):
+        """Decode into a sorted array of indices."""
+        if not self.starts:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, stop, dtype=np.int64)
+                               for start, stop in zip(self.starts, self.stops)])
+
+    def pairs(self):
+        """Return the intervals as [[start, stop], ...], the serialized form."""
+        return [[start, stop] for start, stop in zip(self.starts, self.stops)]
+
+    def __len__(self):
+        return sum(stop - start for start, stop in zip(self.starts, self.stops))
+
+
+@dataclass
+class ErrorSummary:
+    """One kind of error on a topic, e.g. frame_drop."""
+
+    name: str
+    count: int
+    # The frame indices of the errors, None for errors not indexed by frame
+    intervals: Optional[Intervals] = None
+
+    @classmethod
+    def from_entry(cls, name, entry):
+        """Build from an error entry in the format BagTester uses."""
+        indices = np.asarray(entry.get('indices', []), dtype=float)
+        intervals = None
+        if np.all(np.mod(indices, 1) == 0):
+            intervals = Intervals.from_indices(indices)
+        return cls(name, _count(entry.get('num_errors')) or 0, intervals)
+
+
+@dataclass
+class TopicResult:
+    """Timing statistics and errors of one topic."""
+
+    topic: str
+    # camera, imu, chassis or other
+    kind: str
+    frames_captured: Optional[int] = None
+    frames_dropped: Optional[int] = None
+    samples_removed: Optional[int] = None
+    percent_dropped: Optional[float] = None
+    mean_frequency_hz: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    jitter_excluding_drops_ms: Optional[float] = None
+    largest_drop_ms: Optional[float] = None
+    drop_table: Optional[str] = None
+    errors: Dict[str, ErrorSummary] = field(default_factory=dict)
+
+    @classmethod
+    def from_stats(cls, topic, stats, errors):
+        """Build from the stats and errors of a topic in do_validation."""
+        if 'image_compressed' in topic:
+            kind = 'camera'
+        elif 'stereo_imu' in topic:
+            kind = 'imu'
+        elif topic in CHASSIS_TOPICS:
+            kind = 'chassis'
+        else:
+            kind = 'other'
+        return cls(
+            topic=topic,
+            kind=kind,
+            frames_captured=_count(stats.get('total_frames_captured')),
+            frames_dropped=_count(stats.get('num_frames_dropped')),
+            samples_removed=_count(stats.get('num_indices_dropped')),
+            percent_dropped=_number(stats.get('percent_frames_dropped')),
+            mean_frequency_hz=_number(stats.get('mean_frequency_all')),
+            jitter_ms=_number(stats.get('mean_absolute_error_all_ms')),
+            jitter_excluding_drops_ms=_number(stats.get('mean_absolute_error_filtered_ms')),
+            largest_drop_ms=_number(stats.get('largest_drop')),
+            drop_table=stats.get('ascii_drop_table'),
+            errors={name: ErrorSummary.from_entry(name, entry)
+                    for name, entry in sorted(errors.items())
+                    if isinstance(entry, dict) and 'num_errors' in entry},
+        )
+
+
+@dataclass
+class SyncGroup:
+    """Synchronization of a stereo pair (intra) or of all cameras (inter)."""
+
+    name: str
+    # intra or inter
+    kind: str
+    topics: List[str] = field(default_factory=list)
+    num_desynced: Optional[int] = None
+    percent_desynced: Optional[float] = None
+    mean_difference_ns: Optional[float] = None
+    max_difference_ns: Optional[float] = None
+    desync_table: Optional[str] = None
+    desynced: Intervals = field(default_factory=Intervals)
+
+    @classmethod
+    def from_stats(cls, name, stats):
+        """Build from the stats of check_stereo_sync or check_multi_sync."""
+        inter = name == 'inter_camera_sync'
+        return cls(
+            name=name,
+            kind='inter' if inter else 'intra',
+            topics=sorted(stats.get('offsets', {})) if inter else list(stats.get('topics', [])),
+            num_desynced=_count(stats.get('num_desynced_frames')),
+            percent_desynced=_number(stats.get('percent_desynced_frames')),
+            mean_difference_ns=_number(stats.get('average_difference_ns')),
+            max_difference_ns=_number(stats.get('max_diff')),
+            desync_table=stats.get('ascii_table'),
+            desynced=Intervals.from_indices(stats.get('indices_desynced', [])),
+        )
+
+
+@dataclass
+class QScores:
+    """The q-scores of a bag in percent, None if a score could not be computed."""
+
+    drops: Optional[float] = None
+    buckets: Optional[float] = None
+    intra_sync: Optional[float] = None
+    inter_sync: Optional[float] = None
+    # {score: reason} for the scores that are None
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, q_scores):
+        """Build from the q_scores of _summarize, whose values are strings or exceptions."""
+        scores = cls()
+        for key, value in q_scores.items():
+            name = key[len('qscore_'):]
+            try:
+                setattr(scores, name, float(value))
+            except (TypeError, ValueError):
+                scores.failures[name] = f'{type(value).__name__}: {value}'
+        return scores
+
+
+@dataclass
+class ValidationResult:
+    """Everything the report of one bag says, as data."""
+
+    bag: str
+    title: str
+    q_scores: QScores
+    topics: List[TopicResult] = field(default_factory=list)
+    sync_groups: List[SyncGroup] = field(default_factory=list)
+    num_system_incidents: Optional[int] = None
+    num_isolated_faults: Optional[int] = None
+
+    @classmethod
+    def from_validation(cls, bag, all_stats, all_errors, q_scores, title=None):
+        """
+        Build from the return values of do_validation or do_tiered_validation.
+
+        Args
+        ----
+            bag (str): The validated bag
+            all_stats (dict): The statistics of the validation
+            all_errors (dict): The errors of the validation
+            q_scores (dict): The q-scores of the validation
+            title (str): The report title, defaults to the bag name like do_validation
+
+        Returns
+        -------
+            ValidationResult: The structured results
+
+        """
+        topics = []
+        sync_groups = []
+        for key in sorted(all_stats.keys() | all_errors.keys()):
+            stats = all_stats.get(key)
+            if not isinstance(stats, dict):
+                stats = {}
+            if key == 'inter_camera_sync' or key.endswith('/sync'):
+                sync_groups.append(SyncGroup.from_stats(key, stats))
+            elif key.startswith('/'):
+                topics.append(TopicResult.from_stats(key, stats, all_errors.get(key, {})))
+        incidents = all_stats.get('incidents', {})
+        return cls(
+            bag=bag,
+            title=title if title is not None else bag.rstrip('/').split('/')[-1],
+            q_scores=QScores.from_dict(q_scores),
+            topics=topics,
+            sync_groups=sync_groups,
+            num_system_incidents=_count(incidents.get('num_system_incidents')),
+            num_isolated_faults=_count(incidents.get('num_isolated_faults')),
+        )
+
+    def to_dict(self):
+        """Return the results as a JSON serializable dictionary."""
+        def _encode(value):
+            if isinstance(value, dict):
+                if set(value) == {'starts', 'stops'}:
+                    return [[start, stop] for start, stop in zip(value['starts'], value['stops'])]
+                return {key: _encode(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [_encode(item) for item in value]
+            return value
+        return _encode(asdict(self))
+
+    def to_table(self):
+        """
+        Return one row per topic and sync group as a pandas DataFrame.
+
+        Errors become two columns each, <name>_count and <name>_intervals, the latter holding
+        the [start, stop] pairs.
+        """
+        import pandas as pd
+
+        rows = []
+        for topic in self.topics:
+            row = {key: value for key, value in asdict(topic).items() if key != 'errors'}
+            for name, error in topic.errors.items():
+                row[f'{name}_count'] = error.count
+                row[f'{name}_intervals'] = error.intervals.pairs() if error.intervals else None
+            rows.append(row)
+        for group in self.sync_groups:
+            row = {key: value for key, value in asdict(group).items()
+                   if key not in ('name', 'kind', 'desynced')}
+            row.update(topic=group.name, kind=f'sync_{group.kind}',
+                       desync_count=group.num_desynced, desync_intervals=group.desynced.pairs())
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def write_json(self, path):
+        """Write the results as compact JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    def write_parquet(self, path):
+        """
+        Write to_table() as Parquet, with the bag, q-scores and incident counts in the schema.
+
+        Needs pyarrow, which is only imported here.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(self.to_table(), preserve_index=False)
+        summary = {key: value for key, value in self.to_dict().items()
+                   if key not in ('topics', 'sync_groups')}
+        metadata = {**(table.schema.metadata or {}),
+                    PARQUET_METADATA_KEY: json.dumps(summary).encode()}
+        pq.write_table(table.replace_schema_metadata(metadata), path)
+
+    def write(self, path):
+        """Write as Parquet if path ends in .parquet, as JSON otherwise."""
+        if path.endswith('.parquet'):
+            self.write_parquet(path)
+        else:
+            self.write_json(path)
@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Index the /rosout log recorded with every bag.
+
+Log messages are decoded straight from CDR into a columnar table: bag log time, level, node
+and a message template id, where the template is the message with all numbers masked so that
+e.g. every "Dropped 3 frames" line shares one id. The table is sorted by log time, the same
+clock the drop and desync events use, so the log lines around an event are found with a
+binary search.
+"""
+
+from array import array
+import re
+
+from isaac_ros_data_validation.cdr import log_fields
+from isaac_ros_data_validation.message_pass import MessagePass
+import numpy as np
+import pandas as pd
+
+LOG_MSGTYPE = 'rcl_interfaces/msg/Log'
+
+# rcl_interfaces/msg/Log levels
+LEVEL_NAMES = {10: 'DEBUG', 20: 'INFO', 30: 'WARN', 40: 'ERROR', 50: 'FATAL'}
+WARN = 30
+
+_NUMBER = re.compile(r'0x[0-9a-fA-F]+|[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+
+def message_template(message):
+    """Mask all numbers in a log message, e.g. 'Dropped 3 frames' -> 'Dropped <n> frames'."""
+    return _NUMBER.sub('<n>', message)
+
+
+class RosoutPass(MessagePass):
+    """Decode rcl_interfaces/Log messages into a columnar table."""
+
+    def __init__(self):
+        self.log_times = array('q')
+        self.stamps = array('q')
+        self.levels = array('B')
+        self.node_ids = array('H')
+        self.template_ids = array('I')
+        self.messages = []
+        self.nodes = {}
+        self.templates = {}
+
+    def accepts(self, topic, msgtype):
+        return msgtype == LOG_MSGTYPE
+
+    def process(self, topic, timestamp, rawdata):
+        try:
+            stamp, level, name, message = log_fields(rawdata)
+        except Exception:
+            return
+        self.log_times.append(timestamp)
+        self.stamps.append(stamp)
+        self.levels.append(level)
+        self.node_ids.append(self.nodes.setdefault(name, len(self.nodes)))
+        template = message_template(message)
+        self.template_ids.append(self.templates.setdefault(template, len(self.templates)))
+        self.messages.append(message)
+
+    def table(self):
+        """
+        Return the decoded log as a DataFrame sorted by log time.
+
+        Returns
+        -------
+            pd.DataFrame: columns log_time, stamp, level, node (categorical), template_id and
+                message. The template strings are in table.attrs['templates'].
+
+        """
+        table = pd.DataFrame({
+            'log_time': np.frombuffer(self.log_times, dtype=np.int64),
+            'stamp': np.frombuffer(self.stamps, dtype=np.int64),
+            'level': np.frombuffer(self.levels, dtype=np.uint8),
+            'node': pd.Categorical.from_codes(
+                np.frombuffer(self.node_ids, dtype=np.uint16).astype(np.int32),
+                categories=list(self.nodes)),
+            'template_id': np.frombuffer(self.template_ids, dtype=np.uint32),
+            'message': self.messages,
+        })
+        table = table.sort_values('log_time', kind='stable').reset_index(drop=True)
+        table.attrs['templates'] = list(self.templates)
+        return table
+
+    def results(self):
+        table = self.table()
+        if table.empty:
+            return {}, {}
+        return {
+            '/rosout': {
+                'num_messages': len(table),
+                'counts_by_level': {
+                    LEVEL_NAMES.get(level, str(level)): int(count)
+                    for level, count in table['level'].value_counts().sort_index().items()
+                },
+                'num_templates': len(table.attrs['templates']),
+                'table': table,
+            }
+        }, {}
+
+
+def logs_between(table, start_ns, end_ns, min_level=WARN):
+    """
+    Return the log lines with a log time in [start_ns, end_ns].
+
+    Args
+    ----
+        table (pd.DataFrame): table from RosoutPass.table
+        start_ns (int): start of the range, bag log time
+        end_ns (int): end of the range, bag log time
+        min_level (int): only return lines with at least this level
+
+    Returns
+    -------
+        pd.DataFrame: The matching rows of the table
+
+    """
+    log_times = table['log_time'].to_numpy()
+    first = np.searchsorted(log_times, start_ns, side='left')
+    last = np.searchsorted(log_times, end_ns, side='right')
+    rows = table.iloc[first:last]
+    return rows[rows['level'] >= min_level]
+
+
+def attach_logs(incidents, table, window_ms=500.0, min_level=WARN):
+    """
+    Attach the log lines within window_ms of each incident to it, under 'logs'.
+
+    incidents: incidents or isolated faults from incidents.find_incidents
+    table: table from RosoutPass.table
+    window_ms: how far before and after an incident to look
+    min_level: only attach lines with at least this level
+
+    """
+    window_ns = int(window_ms * 1e6)
+    for incident in incidents:
+        incident['logs'] = logs_between(
+            table, incident['start_ns'] - window_ns, incident['end_ns'] + window_ns, min_level)
+
+
+def format_log_line(row, start_ns):
+    """Format a log line from the table, with its time relative to start_ns."""
+    level = LEVEL_NAMES.get(row.level, str(row.level))
+    return f'{(row.log_time - start_ns) / 1e9:.3f} s [{level}] {row.node}: {row.message}'
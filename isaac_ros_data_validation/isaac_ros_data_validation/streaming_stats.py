@@ -0,0 +1,415 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Constant memory statistics for streams of timestamps.
+
+These mirror the checks BagTester runs on a finished bag, but are updated one message at a
+time so they can run live or over arbitrarily long recordings.
+"""
+
+from collections import OrderedDict
+import math
+import time
+
+import numpy as np
+
+# (nominal frequency, tolerance) by topic suffix, matching the test config used in bag_tools
+NOMINAL_RATES = {
+    'image_compressed': (30.0, 0.01),
+    'stereo_imu/imu': (100.0, 0.02),
+    'chassis/imu': (40.0, 0.5),
+    'chassis/odom': (40.0, 0.5),
+    'chassis/battery_state': (100.0, 0.5),
+}
+DEFAULT_RATE = (30.0, 0.5)
+
+
+def nominal_rate(topic):
+    """Return the (frequency, tolerance) used to detect drops on a topic."""
+    for suffix, rate in NOMINAL_RATES.items():
+        if topic.endswith(suffix):
+            return rate
+    return DEFAULT_RATE
+
+
+class RunningStats:
+    """Running mean / variance using Welford's algorithm."""
+
+    __slots__ = ('count', 'mean', 'min', 'max', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return math.nan
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class StreamingHistogram:
+    """
+    Fixed memory histogram with logarithmic bins for percentile estimates.
+
+    Bins are spaced evenly in log space between min_value and max_value, so every estimate has
+    the same relative error (about 1.2% with the default 100 bins per decade). Values below
+    min_value fall into an underflow bin, values above max_value into an overflow bin, and the
+    exact minimum and maximum are tracked separately.
+    """
+
+    def __init__(self, min_value=1e3, max_value=1e11, bins_per_decade=100):
+        """
+        Initialize a StreamingHistogram.
+
+        min_value: lower edge of the first regular bin, must be positive
+        max_value: upper edge of the last regular bin
+        bins_per_decade: resolution of the histogram
+
+        """
+        assert 0 < min_value < max_value
+        self.min_value = min_value
+        self.bins_per_decade = bins_per_decade
+        self._log_min = math.log10(min_value)
+        num_bins = int(math.ceil((math.log10(max_value) - self._log_min) * bins_per_decade))
+        # [underflow, regular bins..., overflow]
+        self.counts = np.zeros(num_bins + 2, dtype=np.int64)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        """Add a single value or an array of values, NaNs are ignored."""
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bins = np.floor((np.log10(values) - self._log_min) * self.bins_per_decade) + 1
+        bins = np.clip(np.nan_to_num(bins, nan=0, neginf=0), 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins.astype(np.int64), minlength=len(self.counts))
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    def percentile(self, q):
+        """
+        Estimate the q-th percentile.
+
+        Returns the geometric center of the bin holding the percentile, clamped to the exact
+        minimum and maximum.
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q / 100 * (self.count - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+        if index == 0:
+            estimate = self.min
+        elif index == len(self.counts) - 1:
+            estimate = self.max
+        else:
+            estimate = 10 ** (self._log_min + (index - 0.5) / self.bins_per_decade)
+        return min(max(estimate, self.min), self.max)
+
+
+class TimingStats:
+    """
+    Streaming version of the acquisition time checks in BagTester.
+
+    A sample is counted as a drop when its period differs from the nominal period by more than
+    tol * nominal_period, exactly like BagTester.analyze_acquisition_time.
+    """
+
+    def __init__(self, nominal_freq, tol):
+        """
+        Initialize TimingStats.
+
+        nominal_freq: expected message frequency in Hz
+        tol: allowed deviation from the nominal period, as a fraction of the period
+
+        """
+        assert nominal_freq > 0
+        self.nominal_freq = nominal_freq
+        self.nominal_period_ns = 1e9 / nominal_freq
+        self.threshold_ns = tol * self.nominal_period_ns
+
+        self.period_ns = RunningStats()
+        self.abs_error_ns = RunningStats()
+        self.num_frames_dropped = 0
+        self.num_indices_dropped = 0
+        self.num_backwards = 0
+        self.num_duplicates = 0
+        self.last_acqtime = None
+
+    def update(self, acqtime_ns):
+        """
+        Add a sample.
+
+        Args
+        ----
+            acqtime_ns (int): Acquisition time of the sample in nanoseconds
+
+        Returns
+        -------
+            int: The number of frames detected as dropped just before this sample
+
+        """
+        last_acqtime = self.last_acqtime
+        self.last_acqtime = acqtime_ns
+        if last_acqtime is None:
+            return 0
+
+        diff = acqtime_ns - last_acqtime
+        if diff < 0:
+            self.num_backwards += 1
+        elif diff == 0:
+            self.num_duplicates += 1
+
+        abs_error = abs(diff - self.nominal_period_ns)
+        self.period_ns.update(diff)
+        self.abs_error_ns.update(abs_error)
+
+        if abs_error > self.threshold_ns:
+            dropped = max(int(abs_error / self.nominal_period_ns), 1)
+            self.num_indices_dropped += 1
+            self.num_frames_dropped += dropped
+            return dropped
+        return 0
+
+    @property
+    def total_frames_captured(self):
+        return self.period_ns.count + (self.last_acqtime is not None)
+
+    @property
+    def percent_frames_dropped(self):
+        total = self.total_frames_captured + self.num_frames_dropped
+        return 100.0 * self.num_frames_dropped / total if total else 0.0
+
+
+class StreamingTimingChecker:
+    """
+    Constant memory timing checks of a live stream, for soak runs of the POL tests.
+
+    Combines the drop detection of TimingStats with jitter percentiles, the absolute deviation
+    of every period from the nominal period, and the drift between the wall clock the messages
+    are received at and their acquisition stamps. Memory does not grow with the duration.
+    """
+
+    def __init__(self, nominal_freq, tol=0.1):
+        """
+        Initialize a StreamingTimingChecker.
+
+        nominal_freq: expected message frequency in Hz
+        tol: allowed jitter, as a fraction of the nominal period
+
+        """
+        self.timing = TimingStats(nominal_freq, tol)
+        self.jitter_ns = StreamingHistogram()
+        self.num_jitter_violations = 0
+        self.max_abs_drift_ns = 0
+        self.first_acqtime_ns = None
+        self.first_wall_ns = None
+        self.last_wall_ns = None
+
+    def update(self, acqtime_ns, wall_ns=None):
+        """
+        Add a received message.
+
+        Args
+        ----
+            acqtime_ns (int): Acquisition time of the message in nanoseconds
+            wall_ns (int): Wall clock time the message was received at, now if None
+
+        Returns
+        -------
+            int: The number of messages detected as dropped just before this one
+
+        """
+        if wall_ns is None:
+            wall_ns = time.time_ns()
+        last_acqtime = self.timing.last_acqtime
+        dropped = self.timing.update(acqtime_ns)
+        self.last_wall_ns = wall_ns
+        if last_acqtime is None:
+            self.first_acqtime_ns = acqtime_ns
+            self.first_wall_ns = wall_ns
+            return dropped
+
+        jitter = abs(acqtime_ns - last_acqtime - self.timing.nominal_period_ns)
+        self.jitter_ns.add(jitter)
+        if jitter > self.timing.threshold_ns:
+            self.num_jitter_violations += 1
+        self.max_abs_drift_ns = max(self.max_abs_drift_ns, abs(self.drift_ns))
+        return dropped
+
+    @property
+    def num_messages(self):
+        return self.timing.total_frames_captured
+
+    @property
+    def acq_span_ns(self):
+        if self.first_acqtime_ns is None:
+            return 0
+        return self.timing.last_acqtime - self.first_acqtime_ns
+
+    @property
+    def wall_span_ns(self):
+        if self.first_wall_ns is None:
+            return 0
+        return self.last_wall_ns - self.first_wall_ns
+
+    @property
+    def drift_ns(self):
+        """Return how far the wall clock ran ahead of the acquisition stamps so far."""
+        return self.wall_span_ns - self.acq_span_ns
+
+    @property
+    def expected_messages(self):
+        """Return the number of messages expected between the first and the last stamp."""
+        if self.first_acqtime_ns is None:
+            return 0
+        return self.acq_span_ns / self.timing.nominal_period_ns + 1
+
+    @property
+    def missing_messages(self):
+        return self.expected_messages - self.num_messages
+
+    def jitter_percentile(self, q):
+        """Estimate the q-th percentile of the jitter in nanoseconds."""
+        return self.jitter_ns.percentile(q)
+
+    def summary(self):
+        """Return the statistics as a dict, e.g. to print at the end of a soak run."""
+        return {
+            'num_messages': self.num_messages,
+            'expected_messages': round(self.expected_messages, 1),
+            'num_frames_dropped': self.timing.num_frames_dropped,
+            'num_backwards': self.timing.num_backwards,
+            'num_duplicates': self.timing.num_duplicates,
+            'jitter_p50_us': self.jitter_percentile(50) / 1e3,
+            'jitter_p99_us': self.jitter_percentile(99) / 1e3,
+            'jitter_p999_us': self.jitter_percentile(99.9) / 1e3,
+            'jitter_max_us': float(self.jitter_ns.max) / 1e3,
+            'num_jitter_violations': self.num_jitter_violations,
+            'drift_ms': self.drift_ns / 1e6,
+            'max_abs_drift_ms': self.max_abs_drift_ns / 1e6,
+        }
+
+
+class StereoSyncTracker:
+    """
+    Match left / right stamps of a stereo pair as they arrive.
+
+    Stamps that find a partner within sync_tolerance_ns are matched. A pending stamp is counted
+    as desynced as soon as the other side has a stamp newer than it by more than
+    sync_tolerance_ns, since its partner can no longer arrive. Each side assumes its own stamps
+    arrive in order. The window only bounds memory when one side stops publishing.
+    """
+
+    def __init__(self, window=64, sync_tolerance_ns=0):
+        """
+        Initialize a StereoSyncTracker.
+
+        window: number of unmatched stamps to keep per side
+        sync_tolerance_ns: maximum stamp difference for a match
+
+        """
+        self.window = window
+        self.sync_tolerance_ns = sync_tolerance_ns
+        self.num_matched = 0
+        self.num_desynced = 0
+        self._pending = {'left': OrderedDict(), 'right': OrderedDict()}
+        self._latest = {'left': None, 'right': None}
+
+    def update(self, side, stamp_ns):
+        """
+        Add a stamp for one side of the pair.
+
+        Args
+        ----
+            side (str): 'left' or 'right'
+            stamp_ns (int): Header stamp in nanoseconds
+
+        Returns
+        -------
+            int: The number of stamps this update counted as desynced
+
+        """
+        other_side = 'right' if side == 'left' else 'left'
+        other = self._pending[other_side]
+        if self._latest[side] is None or stamp_ns > self._latest[side]:
+            self._latest[side] = stamp_ns
+
+        if self._match(other, stamp_ns):
+            self.num_matched += 1
+            desynced = 0
+        else:
+            other_latest = self._latest[other_side]
+            if other_latest is not None and other_latest - stamp_ns > self.sync_tolerance_ns:
+                # The other side is already past this stamp, so its partner is lost
+                desynced = 1
+            else:
+                self._pending[side][stamp_ns] = None
+                desynced = 0
+
+        # Stamps of the other side this one has moved past can no longer be matched
+        while other and stamp_ns - next(iter(other)) > self.sync_tolerance_ns:
+            other.popitem(last=False)
+            desynced += 1
+
+        pending = self._pending[side]
+        while len(pending) > self.window:
+            pending.popitem(last=False)
+            desynced += 1
+        self.num_desynced += desynced
+        return desynced
+
+    def _match(self, pending, stamp_ns):
+        if stamp_ns in pending:
+            del pending[stamp_ns]
+            return True
+        if self.sync_tolerance_ns <= 0:
+            return False
+        for candidate in pending:
+            if abs(candidate - stamp_ns) <= self.sync_tolerance_ns:
+                del pending[candidate]
+                return True
+        return False
+
+    @property
+    def percent_desynced(self):
+        total = self.num_matched + self.num_desynced
+        return 100.0 * self.num_desynced / total if total else 0.0
@@ -19,14 +19,17 @@ import argparse
 import json
 import os
 
-from isaac_ros_data_validation.bag_tools import do_validation, VERBOSITY_MAP
+from isaac_ros_data_validation.profiling import profile_files, Profiler
+from isaac_ros_data_validation.verbosity import VERBOSITY_MAP
 
 """
 Analyze single ROS bag file, e.g.
-python -m isaac_ros_data_validation.summarize_dir /some/bag/file.mcap
+python -m isaac_ros_data_validation.summarize_bag /some/bag/file.mcap
+or, once installed, ros2 run isaac_ros_data_validation summarize_bag /some/bag/file.mcap
 """
 
-if __name__ == '__main__':
+
+def main():
     parser = argparse.ArgumentParser(description='Rosbag input file path.')
     parser.add_argument('input_file', type=str, help='Path to the input file')
     parser.add_argument(
@@ -37,10 +40,43 @@ if __name__ == '__main__':
         default='warning',
         help='Verbosity level (default: warning)',
     )
+    parser.add_argument('--budget-s', type=float,
+                        help='Run the tiered validation and stop going deeper once this many '
+                             'seconds are used')
+    parser.add_argument('--max-tier', type=int, choices=[0, 1, 2],
+                        help='Run the tiered validation up to this tier (0: metadata, '
+                             '1: header timestamps, 2: bitstream and payload)')
+    parser.add_argument('--bagtype', choices=['mcap', 'db3'], default='mcap',
+                        help='Bag storage format for the tiered validation (default: mcap)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the time spent per stage, and write it as JSON and as a '
+                             'Chrome trace next to the bag')
+    parser.add_argument('--results', type=str,
+                        help='Also write the structured results to this file, as Parquet if it '
+                             'ends in .parquet and as JSON otherwise')
 
     args = parser.parse_args()
 
-    _, _, _, q_scores = do_validation(args.input_file, verbose=VERBOSITY_MAP[args.verbosity])
+    # Imported after parsing, so --help and argument errors do not wait for pandas and the
+    # ROS bag readers
+    from isaac_ros_data_validation.bag_tools import do_tiered_validation, do_validation
+    from isaac_ros_data_validation.results import ValidationResult
+
+    profiler = Profiler(enabled=args.profile)
+    if args.budget_s is not None or args.max_tier is not None:
+        all_stats, all_errors, _, q_scores = do_tiered_validation(
+            args.input_file, budget_s=args.budget_s,
+            max_tier=2 if args.max_tier is None else args.max_tier,
+            verbose=VERBOSITY_MAP[args.verbosity], bagtype=args.bagtype, profiler=profiler)
+    else:
+        all_stats, all_errors, _, q_scores = do_validation(
+            args.input_file, verbose=VERBOSITY_MAP[args.verbosity], profiler=profiler)
+
+    if args.profile:
+        json_file, trace_file = profile_files(args.input_file)
+        profiler.write(json_file, trace_file)
+        print(f'\n------------------ Profile ------------------\n{profiler.format_table()}')
+        print(f'\nProfile written to {json_file} and {trace_file}')
 
     # Check if the input is a directory
     if os.path.isdir(args.input_file):
@@ -49,4 +85,13 @@ if __name__ == '__main__':
         output_directory = os.path.dirname(args.input_file)
 
     with open(os.path.join(output_directory, 'q_scores.json'), 'w') as f:
-        json.dump(q_scores, f)
+        json.dump(q_scores, f, default=str)
+
+    if args.results:
+        result = ValidationResult.from_validation(args.input_file, all_stats, all_errors, q_scores)
+        result.write(args.results)
+        print(f'Results written to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+
+"""
+Report per topic bandwidth of a ROS bag and check it against a disk, e.g.
+python -m isaac_ros_data_validation.summarize_bandwidth /some/bag/file.mcap \
+    --config isaac_ros_data_recorder/config/nova-carter.yaml --disk-mb-s 1500
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per topic bandwidth of a ROS bag.')
+    parser.add_argument('input_file', type=str, help='Path to the input file')
+    parser.add_argument('--bagtype', choices=['mcap', 'db3'], default='mcap',
+                        help='Bag storage format (default: mcap)')
+    parser.add_argument('--window-s', type=float, default=1.0,
+                        help='Window length for throughput over time (default: 1.0)')
+    parser.add_argument('--burst-window-s', type=float, default=0.1,
+                        help='Window length for burst peaks (default: 0.1)')
+    parser.add_argument('--config', type=str,
+                        help='isaac_ros_data_recorder config file, restricts the disk check '
+                             'to its sensors')
+    disk = parser.add_mutually_exclusive_group()
+    disk.add_argument('--disk-mb-s', type=float,
+                      help='Sustained write throughput of the target disk in MB/s')
+    disk.add_argument('--measure-disk', type=str, metavar='DIR',
+                      help='Measure the sustained write throughput of the disk holding DIR')
+
+    args = parser.parse_args()
+
+    from isaac_ros_data_validation.bag_tools import (
+        BagTester,
+        check_disk_throughput,
+        load_config_sensors,
+        measure_disk_throughput,
+        read_message_sizes,
+    )
+
+    dfs = read_message_sizes(args.input_file, bagtype=args.bagtype)
+    stats = BagTester(dfs).analyze_bandwidth(
+        window_s=args.window_s, burst_window_s=args.burst_window_s)
+
+    print(f'{"topic":<52} {"total MB":>10} {"MB/s":>8} {"peak":>8} {"burst":>8} '
+          f'{"msg kB":>8}')
+    for topic, topic_stats in sorted(stats.items(), key=lambda item: item[0] == 'total'):
+        print(f'{topic:<52} {topic_stats["total_mb"]:>10.1f} {topic_stats["mean_mb_s"]:>8.2f} '
+              f'{topic_stats["peak_mb_s"]:>8.2f} {topic_stats["burst_mb_s"]:>8.2f} '
+              f'{topic_stats["mean_message_kb"]:>8.1f}')
+
+    disk_mb_s = args.disk_mb_s
+    if args.measure_disk is not None:
+        disk_mb_s = measure_disk_throughput(args.measure_disk)
+        print(f'\nMeasured disk throughput: {disk_mb_s:.1f} MB/s')
+
+    if disk_mb_s is not None:
+        sensors = load_config_sensors(args.config) if args.config else None
+        result = check_disk_throughput(stats, disk_mb_s, sensors=sensors)
+        print('\nPer sensor bandwidth:')
+        for sensor, sensor_stats in result['sensors'].items():
+            print(f'    {sensor:<30} mean {sensor_stats["mean_mb_s"]:>8.2f} MB/s, '
+                  f'peak {sensor_stats["peak_mb_s"]:>8.2f} MB/s')
+        for sensor in result['missing_sensors']:
+            print(f'Warning: {sensor} is in {args.config} but not in the bag')
+        print(f'\nRequired: mean {result["required_mean_mb_s"]:.2f} MB/s '
+              f'({100 * result["mean_utilization"]:.1f}% of disk), '
+              f'peak {result["required_peak_mb_s"]:.2f} MB/s '
+              f'({100 * result["peak_utilization"]:.1f}% of disk)')
+        print('Writable' if result['writable'] else
+              'Not writable: sustained bandwidth exceeds the usable disk throughput')
+
+
+if __name__ == '__main__':
+    main()
@@ -16,17 +16,206 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
-import glob
+from concurrent.futures import as_completed, ProcessPoolExecutor
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
 import os
+import signal
+import time
 
-from isaac_ros_data_validation.bag_tools import do_validation, VERBOSITY_MAP
+from isaac_ros_data_validation.inotify import IN_ISDIR, IN_Q_OVERFLOW, RecursiveWatcher
+from isaac_ros_data_validation.profiling import profile_files, Profiler
+from isaac_ros_data_validation.verbosity import VERBOSITY_MAP
 
 """
-Analyze directory with ROS bag files, e.g.
-python analyze_dir.py /workspaces/isaac_ros-dev/rosbag_output/cuvslam2/
+Analyze all ROS bag files below a directory, e.g.
+python -m isaac_ros_data_validation.summarize_dir /workspaces/isaac_ros-dev/rosbag_output/ -j 4
+or, once installed, ros2 run isaac_ros_data_validation summarize_dir <directory> -j 4
+
+Bags are validated by a pool of worker processes, while at most --readers of them read from
+disk at the same time. Results are cached by a fingerprint of the bag files, so bags that did
+not change since the last run are not validated again.
+
+With --watch, the directory is watched with inotify instead, and every recording is validated
+as soon as ros2 bag record closes it, which is when it writes metadata.yaml. The report and
+q-scores are written next to the bag, as record_data.sh does.
 """
 
-if __name__ == '__main__':
+CACHE_FILE = '.summarize_dir_cache.json'
+# Bump when the report changes, to invalidate old cache entries
+CACHE_VERSION = 1
+Q_SCORE_COLUMNS = {
+    'qscore_drops': 'drops',
+    'qscore_buckets': 'buckets',
+    'qscore_intra_sync': 'intra sync',
+    'qscore_inter_sync': 'inter sync',
+}
+
+# Set in every worker process by _init_worker
+_read_semaphore = None
+
+
+def find_bags(directory):
+    """Return all mcap files below a directory, sorted, skipping hidden directories."""
+    bags = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        bags.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.mcap'))
+    return bags
+
+
+def fingerprint(input_file, verbose):
+    """Fingerprint a bag by the size and modification time of its files."""
+    digest = hashlib.sha1(f'{CACHE_VERSION} {verbose}'.encode())
+    metadata_file = os.path.join(os.path.dirname(input_file), 'metadata.yaml')
+    for path in (input_file, metadata_file):
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f'{path} {stat.st_size} {stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+def _init_worker(read_semaphore):
+    global _read_semaphore
+    _read_semaphore = read_semaphore
+    # Ctrl-C is handled by the main process, which lets running validations finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _validate(input_file, verbose, profile=False):
+    # Validate one bag, capturing the report so reports of parallel workers do not interleave
+    from isaac_ros_data_validation.bag_tools import do_validation
+
+    output = io.StringIO()
+    profiler = Profiler(enabled=profile)
+    try:
+        with contextlib.redirect_stdout(output):
+            _, _, _, q_scores = do_validation(
+                input_file, verbose=verbose, read_lock=_read_semaphore, profiler=profiler)
+            if profile:
+                profiler.write(*profile_files(input_file))
+                print(f'\n------------------ Profile ------------------\n'
+                      f'{profiler.format_table()}')
+        error = None
+    except Exception as e:
+        q_scores = {}
+        error = f'{type(e).__name__}: {e}'
+    return {
+        'q_scores': {name: str(score) for name, score in q_scores.items()},
+        'report': output.getvalue(),
+        'error': error,
+    }
+
+
+def _load_cache(path):
+    if path is None or not os.path.isfile(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, content):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(content, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _print_table(results, directory):
+    names = {bag: os.path.relpath(bag, directory) for bag in results}
+    width = max([len(name) for name in names.values()] + [3])
+    print(f'{"bag":<{width}} ' + ' '.join(f'{column:>10}' for column in Q_SCORE_COLUMNS.values())
+          + '  status')
+    for bag, result in sorted(results.items()):
+        scores = ' '.join(f'{result["q_scores"].get(key, "-"):>10}' for key in Q_SCORE_COLUMNS)
+        status = result['status'] if result['error'] is None else f'failed: {result["error"]}'
+        print(f'{names[bag]:<{width}} {scores}  {status}')
+
+
+def needs_validation(recording_dir):
+    """Return True for a closed recording without q-scores newer than its metadata."""
+    metadata_file = os.path.join(recording_dir, 'metadata.yaml')
+    q_scores_file = os.path.join(recording_dir, 'q_scores.json')
+    if not os.path.isfile(metadata_file):
+        return False
+    return (not os.path.isfile(q_scores_file)
+            or os.path.getmtime(q_scores_file) < os.path.getmtime(metadata_file))
+
+
+def _recordings_to_validate(directory):
+    recordings = []
+    for root, dirs, _ in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        if needs_validation(root):
+            recordings.append(root)
+    return recordings
+
+
+def watch(directory, jobs, readers, verbose, settle_s=1.0, profile=False):
+    """
+    Validate recordings below a directory as they are closed, until interrupted.
+
+    Recordings that were closed while nobody was watching are validated first.
+
+    directory: the directory to watch
+    jobs: number of recordings validated in parallel
+    readers: number of recordings read from disk at the same time
+    verbose: the verbosity level of the reports
+    settle_s: time to wait after metadata.yaml was closed, for the files written after the
+        recording (e.g. by restart_and_record_data.sh)
+    profile: write the stage timings of every validation next to the bag
+
+    """
+    watcher = RecursiveWatcher(directory)
+    queued = {recording_dir: 0.0 for recording_dir in _recordings_to_validate(directory)}
+    running = {}
+    print(f'Watching {directory}, {len(queued)} recordings waiting for validation', flush=True)
+
+    read_semaphore = multiprocessing.Semaphore(max(readers, 1))
+    with ProcessPoolExecutor(max_workers=max(jobs, 1), initializer=_init_worker,
+                             initargs=(read_semaphore,)) as pool:
+        try:
+            while True:
+                for event in watcher.read(timeout_s=0.2):
+                    if event.mask & (IN_ISDIR | IN_Q_OVERFLOW):
+                        # A new or moved in directory, or lost events
+                        for recording_dir in _recordings_to_validate(event.path):
+                            queued.setdefault(recording_dir, time.monotonic() + settle_s)
+                    elif os.path.basename(event.path) == 'metadata.yaml':
+                        queued[os.path.dirname(event.path)] = time.monotonic() + settle_s
+
+                now = time.monotonic()
+                for recording_dir, due in list(queued.items()):
+                    if due <= now and recording_dir not in running.values():
+                        del queued[recording_dir]
+                        future = pool.submit(_validate, recording_dir, verbose, profile)
+                        running[future] = recording_dir
+
+                for future in [future for future in running if future.done()]:
+                    recording_dir = running.pop(future)
+                    result = future.result()
+                    with open(os.path.join(recording_dir, 'data_validation.txt'), 'w') as f:
+                        f.write(result['report'])
+                    if result['error'] is None:
+                        _write_json(os.path.join(recording_dir, 'q_scores.json'),
+                                    result['q_scores'])
+                        scores = ', '.join(f'{column} {result["q_scores"].get(key, "-")}'
+                                           for key, column in Q_SCORE_COLUMNS.items())
+                        print(f'{recording_dir}: {scores}', flush=True)
+                    else:
+                        print(f'{recording_dir}: failed: {result["error"]}', flush=True)
+        except KeyboardInterrupt:
+            print(f'Stopping, {len(running)} validations still running')
+        finally:
+            watcher.close()
+
+
+def main():
     parser = argparse.ArgumentParser(description='Process a directory of ROS bag files.')
     parser.add_argument('directory', type=str, help='Directory containing ROS bag files')
     parser.add_argument(
@@ -37,20 +226,81 @@ if __name__ == '__main__':
         default='compact',
         help='Verbosity level (default: compact)',
     )
+    parser.add_argument('-j', '--jobs', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Number of bags validated in parallel (default: min(4, cores))')
+    parser.add_argument('--readers', type=int, default=2,
+                        help='Number of bags read from disk at the same time (default: 2)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Validate every bag, ignoring and not writing {CACHE_FILE}')
+    parser.add_argument('--json', type=str,
+                        help='Output JSON with all q-scores '
+                             '(default: <directory>/q_scores_summary.json)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and validate every recording as soon as it is '
+                             'closed, writing data_validation.txt and q_scores.json next to it')
+    parser.add_argument('--settle-s', type=float, default=1.0,
+                        help='With --watch, wait this long after a recording closed '
+                             '(default: 1.0)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write the time spent per stage of every validation as JSON and '
+                             'as a Chrome trace next to the bag')
 
     args = parser.parse_args()
+    verbose = VERBOSITY_MAP[args.verbosity]
+
+    if args.watch:
+        watch(args.directory, args.jobs, args.readers, verbose, args.settle_s, args.profile)
+        return
+
+    cache_file = None if args.no_cache else os.path.join(args.directory, CACHE_FILE)
+    cache = _load_cache(cache_file)
+
+    results = {}
+    pending = []
+    for input_file in find_bags(args.directory):
+        key = fingerprint(input_file, verbose)
+        entry = cache.get(input_file)
+        if entry is not None and entry.get('fingerprint') == key and entry['error'] is None:
+            results[input_file] = {**entry, 'status': 'cached'}
+        else:
+            pending.append((input_file, key))
+    print(f'Found {len(results) + len(pending)} bags, {len(results)} unchanged since the '
+          f'last run\n')
 
-    all_stats = {}
-    all_errors = {}
-
-    for subdir in os.listdir(args.directory):
-        full_path = os.path.join(args.directory, subdir)
-        if os.path.isdir(full_path):
-            mcap_files = glob.glob(os.path.join(full_path, '*.mcap'))
-            for input_file in mcap_files:
-                try:
-                    do_validation(input_file, verbose=VERBOSITY_MAP[args.verbosity])
-                    print('\n')
-                except Exception as e:
-                    print(f'Caught exception: {e}')
-                    print('Continuing anyway ... ')
+    def _done(input_file, key, result):
+        results[input_file] = {**result, 'fingerprint': key, 'status': 'validated'}
+        print(result['report'])
+        if result['error'] is not None:
+            print(f'Caught exception validating {input_file}: {result["error"]}')
+            print('Continuing anyway ... ')
+        print('\n', flush=True)
+        if cache_file is not None:
+            cache[input_file] = {k: v for k, v in results[input_file].items() if k != 'status'}
+            _write_json(cache_file, cache)
+
+    if args.jobs <= 1:
+        for input_file, key in pending:
+            _done(input_file, key, _validate(input_file, verbose, args.profile))
+    elif pending:
+        read_semaphore = multiprocessing.Semaphore(max(args.readers, 1))
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                 initargs=(read_semaphore,)) as pool:
+            futures = {
+                pool.submit(_validate, input_file, verbose, args.profile): (input_file, key)
+                for input_file, key in pending
+            }
+            for future in as_completed(futures):
+                _done(*futures[future], future.result())
+
+    _print_table(results, args.directory)
+    json_file = args.json or os.path.join(args.directory, 'q_scores_summary.json')
+    _write_json(json_file, {
+        os.path.relpath(bag, args.directory): {
+            **result['q_scores'], 'status': result['status'], 'error': result['error']}
+        for bag, result in sorted(results.items())
+    })
+    print(f'\nQ-scores written to {json_file}')
+
+
+if __name__ == '__main__':
+    main()
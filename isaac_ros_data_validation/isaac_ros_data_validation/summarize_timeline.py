@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import os
+
+"""
+Merge the drops of a recording with the argus, kernel and tegrastats logs saved next to it
+into one timeline, written to timeline.csv in the recording directory, e.g.
+python -m isaac_ros_data_validation.summarize_timeline /mnt/nova_ssd/recordings/rosbag2_xxx
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Unified timeline of a recording.')
+    parser.add_argument('directory', type=str, help='Recording directory')
+    parser.add_argument('--bagtype', choices=['mcap', 'db3'], default='mcap',
+                        help='Bag storage format (default: mcap)')
+    parser.add_argument('--output', type=str,
+                        help='Output CSV file (default: <directory>/timeline.csv)')
+    parser.add_argument('--margin-s', type=float, default=60.0,
+                        help='Keep log lines this long before and after the recording '
+                             '(default: 60.0)')
+    parser.add_argument('--window-s', type=float, default=1.0,
+                        help='Print log lines this close to a bag event (default: 1.0)')
+    parser.add_argument('--boot-time-ns', type=int,
+                        help='Boot time for dmesg logs without --time-format iso')
+    parser.add_argument('--tz', type=str,
+                        help='Timezone of logs without one, e.g. America/Los_Angeles '
+                             '(default: local)')
+
+    args = parser.parse_args()
+
+    from isaac_ros_data_validation.bag_tools import collect_bag_events, read_rosbag
+    from isaac_ros_data_validation.system_logs import build_timeline, read_recording_logs
+    import numpy as np
+
+    dfs = read_rosbag(args.directory, bagtype=args.bagtype)
+    log_times = [df['timestamp'] for df in dfs.values() if len(df)]
+    start_ns = int(min(times.min() for times in log_times)) if log_times else None
+    end_ns = int(max(times.max() for times in log_times)) if log_times else None
+
+    logs = read_recording_logs(args.directory, boot_time_ns=args.boot_time_ns, tz=args.tz)
+    timeline = build_timeline(collect_bag_events(dfs), logs, start_ns, end_ns, args.margin_s)
+
+    output = args.output or os.path.join(args.directory, 'timeline.csv')
+    timeline.to_csv(output, index=False)
+
+    counts = timeline['source'].value_counts()
+    print('Timeline entries: '
+          + ', '.join(f'{source} {count}' for source, count in counts.items()))
+    print(f'Host logs found: {", ".join(logs) if logs else "none"}')
+
+    # Host log lines around bag events are the interesting part of the timeline
+    is_event = (timeline['source'] == 'bag').to_numpy()
+    event_times = np.sort(timeline['time_ns'].to_numpy()[is_event])
+    if len(event_times):
+        window_ns = int(args.window_s * 1e9)
+        times = timeline['time_ns'].to_numpy()
+        nearest = np.clip(np.searchsorted(event_times, times), 1, len(event_times) - 1)
+        distance = np.minimum(np.abs(times - event_times[nearest - 1]),
+                              np.abs(times - event_times[nearest]))
+        nearby = timeline[~is_event & (distance <= window_ns)]
+        print(f'\nHost log lines within {args.window_s} s of a bag event: {len(nearby)}')
+        for row in nearby.itertuples():
+            print(f'    {(row.time_ns - start_ns) / 1e9:10.3f} s [{row.source}] '
+                  f'{row.subject}: {row.message}')
+    print(f'\nTimeline written to {output}')
+
+
+if __name__ == '__main__':
+    main()
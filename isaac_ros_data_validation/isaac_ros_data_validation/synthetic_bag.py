@@ -0,0 +1,785 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Synthetic Nova Carter recordings with known faults, for benchmarks and regression tests.
+
+Writes an MCAP or db3 bag with the topics of a Nova Carter recording at their nominal rates:
+Hawk stereo pairs and Owl cameras with H.264 IDR frames of random content, the Hawk IMU, the
+chassis, and the 2D and 3D lidars. Drops, duplicates, backwards timestamps, stereo desync and
+frozen frames are injected at chosen or random frames, and written to ground_truth.json next
+to the bag, with the message indices the validation reports them at.
+
+Messages are serialized from templates and both storage formats are written directly, so this
+runs on any Linux machine, without ROS, e.g.
+python -m isaac_ros_data_validation.synthetic_bag /tmp/synthetic --duration-s 60 --drops 5
+"""
+
+import argparse
+from collections import namedtuple
+import functools
+import heapq
+from itertools import repeat
+import json
+import os
+import random
+import sqlite3
+import struct
+import zlib
+
+# clock: sensors sharing a clock have the same header stamps, e.g. the hardware triggered
+# cameras
+Sensor = namedtuple('Sensor', ['topic', 'msgtype', 'rate_hz', 'frame_id', 'clock'])
+
+# index: the frame the fault starts at, counting the frames of a fault free recording
+# count: number of frames affected, e.g. dropped in a row
+# offset_ns: for desync the shift of the header stamps, for backwards how far the stamp goes
+#     back from the previous one, 0 for the defaults
+Fault = namedtuple('Fault', ['kind', 'topic', 'index', 'count', 'offset_ns'],
+                   defaults=(1, 0))
+FAULT_KINDS = ('drop', 'duplicate', 'backwards', 'desync', 'frozen')
+
+HAWKS = ('front', 'back', 'left', 'right')
+OWLS = ('front', 'back', 'left', 'right')
+CAMERA_RATE_HZ = 30.0
+DEFAULT_START_NS = 1700000000 * 1000000000
+DEFAULT_DESYNC_NS = 1000000
+# Faults on the same topic are kept this many frames apart, and away from the ends
+FAULT_SPACING = 10
+
+MCAP_MAGIC = b'\x89MCAP0\r\n'
+MCAP_CHUNK_SIZE = 4 * 1024 * 1024
+
+_ENCAPSULATION = b'\x00\x01\x00\x00'
+_STAMP = struct.Struct('<iI')
+_UINT32 = struct.Struct('<I')
+_MCAP_MESSAGE = struct.Struct('<BQHIQQ')
+_MCAP_INDEX_ENTRY = struct.Struct('<QQ')
+
+# SPS, PPS and the start of an IDR slice with first_mb_in_slice 0 and slice_type 7, the
+# random slice data after it never contains zero bytes, and so no start codes
+H264_FRAME_HEADER = (b'\x00\x00\x00\x01\x67\x64\x00\x28\xac\xd2\x01\xe0\x08\x9f\x96'
+                     b'\x00\x00\x00\x01\x68\xce\x06\xe2'
+                     b'\x00\x00\x00\x01\x65\x88')
+# Number of offsets into the random pool, a prime so frame_offset only repeats after this
+# many frames
+POOL_OFFSETS = 65521
+
+
+def nova_carter_sensors(hawks=4, owls=4, lidar=True):
+    """
+    Return the sensors of a Nova Carter recording.
+
+    Args
+    ----
+        hawks (int): Number of Hawk stereo cameras, with the Hawk IMU if not 0
+        owls (int): Number of Owl fisheye cameras
+        lidar (bool): Include the 2D and 3D lidars
+
+    Returns
+    -------
+        [Sensor]: The sensors
+
+    """
+    sensors = []
+    for position in HAWKS[:hawks]:
+        for side in ('left', 'right'):
+            sensors.append(Sensor(f'/{position}_stereo_camera/{side}/image_compressed',
+                                  'sensor_msgs/msg/CompressedImage', CAMERA_RATE_HZ,
+                                  f'{position}_stereo_camera_{side}_optical', 'camera'))
+    for position in OWLS[:owls]:
+        sensors.append(Sensor(f'/{position}_fisheye_camera/left/image_compressed',
+                              'sensor_msgs/msg/CompressedImage', CAMERA_RATE_HZ,
+                              f'{position}_fisheye_camera_left_optical', 'camera'))
+    if hawks:
+        sensors.append(Sensor('/front_stereo_imu/imu', 'sensor_msgs/msg/Imu', 100.0,
+                              'front_stereo_camera_imu', 'front_stereo_imu'))
+    sensors += [
+        Sensor('/chassis/imu', 'sensor_msgs/msg/Imu', 40.0, 'chassis_imu', 'chassis'),
+        Sensor('/chassis/odom', 'nav_msgs/msg/Odometry', 40.0, 'odom', 'chassis'),
+        Sensor('/chassis/battery_state', 'sensor_msgs/msg/BatteryState', 100.0, 'base_link',
+               'battery'),
+    ]
+    if lidar:
+        sensors += [
+            Sensor('/front_2d_lidar/scan', 'sensor_msgs/msg/LaserScan', 10.0, 'front_2d_lidar',
+                   'front_2d_lidar'),
+            Sensor('/back_2d_lidar/scan', 'sensor_msgs/msg/LaserScan', 10.0, 'back_2d_lidar',
+                   'back_2d_lidar'),
+            Sensor('/front_3d_lidar/lidar_points', 'sensor_msgs/msg/PointCloud2', 10.0,
+                   'front_3d_lidar', 'front_3d_lidar'),
+        ]
+    return sensors
+
+
+def payload_pool(rng, max_size):
+    """
+    Return random bytes without zeros to slice H.264 slice data from.
+
+    Args
+    ----
+        rng (random.Random): The random generator
+        max_size (int): Largest slice that will be taken
+
+    Returns
+    -------
+        bytes: The pool, large enough for a slice of max_size at every frame_offset
+
+    """
+    return rng.randbytes(max_size + POOL_OFFSETS).translate(b'\x01' + bytes(range(1, 256)))
+
+
+def frame_offset(base, index):
+    """Return the offset into the payload pool of a frame, unique per frame of a topic."""
+    return (base + index * 7919) % POOL_OFFSETS
+
+
+class _Cdr:
+    # Little endian CDR body, alignment is relative to the end of the encapsulation header
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def pack(self, fmt, *values):
+        size = struct.calcsize('<' + fmt.lstrip('0123456789')[0])
+        self.data += bytes(-len(self.data) % size)
+        self.data += struct.pack('<' + fmt, *values)
+
+    def string(self, value):
+        encoded = value.encode() + b'\0'
+        self.pack('I', len(encoded))
+        self.data += encoded
+
+    def sequence(self, fmt, values):
+        self.pack('I', len(values))
+        if values:
+            self.pack(f'{len(values)}{fmt}', *values)
+
+    def header(self, frame_id):
+        # The stamp is patched in per message
+        self.pack('iI', 0, 0)
+        self.string(frame_id)
+
+
+def _imu(cdr, rng):
+    cdr.pack('4d', 0.0, 0.0, 0.0, 1.0)
+    cdr.pack('9d', *([0.0] * 9))
+    cdr.pack('3d', *(rng.gauss(0.0, 0.01) for _ in range(3)))
+    cdr.pack('9d', *([0.0] * 9))
+    cdr.pack('3d', 0.0, 0.0, 9.81)
+    cdr.pack('9d', *([0.0] * 9))
+
+
+def _odometry(cdr, rng):
+    cdr.string('base_link')
+    cdr.pack('7d', rng.uniform(-10, 10), rng.uniform(-10, 10), 0.0, 0.0, 0.0, 0.0, 1.0)
+    cdr.pack('36d', *([0.0] * 36))
+    cdr.pack('6d', 0.5, 0.0, 0.0, 0.0, 0.0, 0.1)
+    cdr.pack('36d', *([0.0] * 36))
+
+
+def _battery_state(cdr, rng):
+    cdr.pack('7f', 24.5, 30.0, -2.0, 10.0, 20.0, 20.0, 0.5)
+    cdr.pack('4B', 2, 1, 2, 1)
+    cdr.sequence('f', [])
+    cdr.sequence('f', [])
+    cdr.string('')
+    cdr.string('')
+
+
+def _laser_scan(cdr, rng, points):
+    increment = 2 * 3.141592653589793 / max(points, 1)
+    cdr.pack('7f', -3.141592653589793, 3.141592653589793 - increment, increment,
+             0.1 / max(points, 1), 0.1, 0.2, 25.0)
+    cdr.sequence('f', [rng.uniform(0.2, 25.0) for _ in range(points)])
+    cdr.sequence('f', [rng.uniform(0.0, 100.0) for _ in range(points)])
+
+
+def _point_cloud2(cdr, rng, points):
+    cdr.pack('II', 1, points)
+    cdr.pack('I', 4)
+    for offset, name in enumerate(('x', 'y', 'z', 'intensity')):
+        cdr.string(name)
+        cdr.pack('I', 4 * offset)
+        cdr.pack('B', 7)  # FLOAT32
+        cdr.pack('I', 1)
+    cdr.pack('B', 0)
+    cdr.pack('II', 16, 16 * points)
+    cdr.pack('I', 16 * points)
+    cdr.data += rng.randbytes(16 * points)
+    cdr.pack('B', 1)
+
+
+class _TopicWriter:
+    # Serializes the messages of one topic from a template, only the stamp and for cameras
+    # the payload change between messages
+
+    def __init__(self, sensor, rng, pool, camera_bytes, scan_points, cloud_points):
+        self.sensor = sensor
+        self.rng = rng
+        self.pool = pool
+        self.camera_bytes = camera_bytes
+        cdr = _Cdr()
+        cdr.header(sensor.frame_id)
+        if sensor.msgtype == 'sensor_msgs/msg/CompressedImage':
+            cdr.string('h264')
+            cdr.pack('I', 0)
+            # Everything but the length of the data, which is appended per message
+            self.template = bytes(cdr.data[8:-4])
+            self.pool_base = rng.randrange(POOL_OFFSETS)
+        else:
+            if sensor.msgtype == 'sensor_msgs/msg/Imu':
+                _imu(cdr, rng)
+            elif sensor.msgtype == 'nav_msgs/msg/Odometry':
+                _odometry(cdr, rng)
+            elif sensor.msgtype == 'sensor_msgs/msg/BatteryState':
+                _battery_state(cdr, rng)
+            elif sensor.msgtype == 'sensor_msgs/msg/LaserScan':
+                _laser_scan(cdr, rng, scan_points)
+            elif sensor.msgtype == 'sensor_msgs/msg/PointCloud2':
+                _point_cloud2(cdr, rng, cloud_points)
+            else:
+                raise ValueError(f'Unsupported message type {sensor.msgtype}')
+            self.template = bytes(cdr.data[8:])
+
+    def payload_key(self, index):
+        # Offset into the random pool and size of a camera frame, None for other topics
+        if self.pool is None:
+            return None
+        size = int(self.camera_bytes * self.rng.uniform(0.9, 1.1))
+        return frame_offset(self.pool_base, index), size
+
+    def serialize(self, stamp_ns, payload_key):
+        stamp = _STAMP.pack(*divmod(stamp_ns, 1000000000))
+        if payload_key is None:
+            return b''.join((_ENCAPSULATION, stamp, self.template))
+        offset, size = payload_key
+        return b''.join((_ENCAPSULATION, stamp, self.template,
+                         _UINT32.pack(len(H264_FRAME_HEADER) + size), H264_FRAME_HEADER,
+                         self.pool[offset:offset + size]))
+
+
+@functools.lru_cache(maxsize=None)
+def _message_definition(msgtype):
+    # The ros2msg definition stored with the schema, readers that need it come with rosbags
+    try:
+        from rosbags.typesys import get_typestore, Stores
+    except ImportError:
+        return ''
+    return get_typestore(Stores.ROS2_HUMBLE).generate_msgdef(msgtype, ros_version=2)[0]
+
+
+def _mcap_string(value):
+    encoded = value.encode()
+    return _UINT32.pack(len(encoded)) + encoded
+
+
+def _mcap_record(opcode, content):
+    return struct.pack('<BQ', opcode, len(content)) + content
+
+
+class McapWriter:
+    """Minimal chunked MCAP writer with the ros2 profile, a chunk index and statistics."""
+
+    def __init__(self, path, chunk_size=MCAP_CHUNK_SIZE):
+        """
+        Initialize a McapWriter and write the file header.
+
+        path: the .mcap file to write
+        chunk_size: uncompressed size at which a chunk is closed
+
+        """
+        self.file = open(path, 'wb')
+        self.chunk_size = chunk_size
+        self.schemas = {}
+        self.channels = []
+        self.channel_counts = {}
+        self.chunk_indexes = []
+        self.message_count = 0
+        self.start = None
+        self.end = None
+        self.file.write(MCAP_MAGIC)
+        self.file.write(_mcap_record(0x01, _mcap_string('ros2')
+                                     + _mcap_string('isaac_ros_data_validation')))
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self.chunk = bytearray()
+        self.chunk_messages = {}
+        self.chunk_start = None
+        self.chunk_end = None
+
+    def add_topic(self, topic, msgtype, msgdef=''):
+        """Add a topic and return its channel id."""
+        if msgtype not in self.schemas:
+            schema_id = len(self.schemas) + 1
+            encoded = msgdef.encode()
+            record = _mcap_record(0x03, struct.pack('<H', schema_id) + _mcap_string(msgtype)
+                                  + _mcap_string('ros2msg') + _UINT32.pack(len(encoded))
+                                  + encoded)
+            self.schemas[msgtype] = (schema_id, record)
+            self.file.write(record)
+        channel_id = len(self.channels) + 1
+        record = _mcap_record(0x04, struct.pack('<HH', channel_id, self.schemas[msgtype][0])
+                              + _mcap_string(topic) + _mcap_string('cdr')
+                              + _UINT32.pack(0))
+        self.channels.append(record)
+        self.channel_counts[channel_id] = 0
+        self.file.write(record)
+        return channel_id
+
+    def write(self, channel_id, log_time, data):
+        """Write one message, log times must not decrease."""
+        sequence = self.channel_counts[channel_id]
+        self.chunk_messages.setdefault(channel_id, []).append((log_time, len(self.chunk)))
+        self.chunk += _MCAP_MESSAGE.pack(0x05, 22 + len(data), channel_id, sequence, log_time,
+                                         log_time)
+        self.chunk += data
+        self.channel_counts[channel_id] = sequence + 1
+        self.message_count += 1
+        if self.chunk_start is None:
+            self.chunk_start = log_time
+        self.chunk_end = log_time
+        if len(self.chunk) >= self.chunk_size:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self.chunk:
+            return
+        chunk_offset = self.file.tell()
+        content = (struct.pack('<QQQI', self.chunk_start, self.chunk_end, len(self.chunk),
+                               zlib.crc32(self.chunk))
+                   + _mcap_string('') + struct.pack('<Q', len(self.chunk)))
+        self.file.write(struct.pack('<BQ', 0x06, len(content) + len(self.chunk)))
+        self.file.write(content)
+        self.file.write(self.chunk)
+        chunk_length = self.file.tell() - chunk_offset
+
+        index_offsets = b''
+        index_start = self.file.tell()
+        for channel_id, entries in sorted(self.chunk_messages.items()):
+            index_offsets += struct.pack('<HQ', channel_id, self.file.tell())
+            entries = b''.join(_MCAP_INDEX_ENTRY.pack(*entry) for entry in entries)
+            self.file.write(_mcap_record(0x07, struct.pack('<HI', channel_id, len(entries))
+                                         + entries))
+        self.chunk_indexes.append(_mcap_record(0x08, (
+            struct.pack('<QQQQ', self.chunk_start, self.chunk_end, chunk_offset, chunk_length)
+            + _UINT32.pack(len(index_offsets)) + index_offsets
+            + struct.pack('<Q', self.file.tell() - index_start)
+            + _mcap_string('') + struct.pack('<QQ', len(self.chunk), len(self.chunk)))))
+
+        self.start = self.chunk_start if self.start is None else self.start
+        self.end = self.chunk_end
+        self._new_chunk()
+
+    def close(self):
+        """Flush the last chunk and write the summary and footer."""
+        self._flush_chunk()
+        self.file.write(_mcap_record(0x0F, _UINT32.pack(0)))
+        summary_start = self.file.tell()
+        for _, record in self.schemas.values():
+            self.file.write(record)
+        for record in self.channels:
+            self.file.write(record)
+        counts = b''.join(struct.pack('<HQ', channel_id, count)
+                          for channel_id, count in self.channel_counts.items())
+        self.file.write(_mcap_record(0x0B, struct.pack(
+            '<QHIIIIQQ', self.message_count, len(self.schemas), len(self.channels), 0, 0,
+            len(self.chunk_indexes), self.start or 0, self.end or 0)
+            + _UINT32.pack(len(counts)) + counts))
+        for record in self.chunk_indexes:
+            self.file.write(record)
+        self.file.write(_mcap_record(0x02, struct.pack('<QQI', summary_start, 0, 0)))
+        self.file.write(MCAP_MAGIC)
+        self.file.close()
+
+
+class Db3Writer:
+    """Minimal rosbag2 sqlite3 writer, with the schema of ros2 humble."""
+
+    def __init__(self, path, batch_size=1000):
+        """
+        Initialize a Db3Writer and create the tables.
+
+        path: the .db3 file to write, must not exist
+        batch_size: number of messages inserted per statement
+
+        """
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            CREATE TABLE schema(schema_version INTEGER PRIMARY KEY, ros_distro TEXT NOT NULL);
+            CREATE TABLE topics(id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL,
+                serialization_format TEXT NOT NULL, offered_qos_profiles TEXT NOT NULL);
+            CREATE TABLE messages(id INTEGER PRIMARY KEY, topic_id INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL, data BLOB NOT NULL);
+            INSERT INTO schema(schema_version, ros_distro) VALUES (3, 'humble');
+        """)
+        self.batch_size = batch_size
+        self.batch = []
+        self.num_topics = 0
+
+    def add_topic(self, topic, msgtype, msgdef=''):
+        """Add a topic and return its id."""
+        self.num_topics += 1
+        self.db.execute('INSERT INTO topics VALUES (?, ?, ?, ?, ?)',
+                        (self.num_topics, topic, msgtype, 'cdr', ''))
+        return self.num_topics
+
+    def write(self, topic_id, log_time, data):
+        """Write one message."""
+        self.batch.append((topic_id, log_time, data))
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        self.db.executemany('INSERT INTO messages(topic_id, timestamp, data) VALUES (?, ?, ?)',
+                            self.batch)
+        self.batch = []
+
+    def close(self):
+        """Write the remaining messages and the timestamp index."""
+        self._flush()
+        self.db.execute('CREATE INDEX timestamp_idx ON messages (timestamp ASC)')
+        self.db.commit()
+        self.db.close()
+
+
+def _write_metadata(bag_dir, storage, bag_file, topics, start_ns, end_ns):
+    import yaml
+
+    duration = {'nanoseconds': end_ns - start_ns}
+    starting_time = {'nanoseconds_since_epoch': start_ns}
+    message_count = sum(count for _, _, count in topics)
+    metadata = {'rosbag2_bagfile_information': {
+        'version': 5,
+        'storage_identifier': 'mcap' if storage == 'mcap' else 'sqlite3',
+        'duration': duration,
+        'starting_time': starting_time,
+        'message_count': message_count,
+        'topics_with_message_count': [
+            {
+                'topic_metadata': {
+                    'name': topic,
+                    'type': msgtype,
+                    'serialization_format': 'cdr',
+                    'offered_qos_profiles': '',
+                },
+                'message_count': count,
+            }
+            for topic, msgtype, count in topics
+        ],
+        'compression_format': '',
+        'compression_mode': '',
+        'relative_file_paths': [bag_file],
+        'files': [{
+            'path': bag_file,
+            'starting_time': starting_time,
+            'duration': duration,
+            'message_count': message_count,
+        }],
+    }}
+    with open(os.path.join(bag_dir, 'metadata.yaml'), 'w') as f:
+        yaml.safe_dump(metadata, f, default_flow_style=False, sort_keys=False)
+
+
+def _check_fault(fault, num_frames, sensor):
+    if fault.kind not in FAULT_KINDS:
+        raise ValueError(f'Unknown fault kind {fault.kind}, expected one of {FAULT_KINDS}')
+    if not 1 <= fault.index or fault.index + fault.count >= num_frames:
+        raise ValueError(f'Fault {fault} is outside of the {num_frames} frames of '
+                         f'{fault.topic}')
+    if fault.kind == 'frozen' and sensor.msgtype != 'sensor_msgs/msg/CompressedImage':
+        raise ValueError(f'Frozen frames need a camera topic, not {fault.topic}')
+
+
+def random_faults(sensors, duration_s, counts, seed=0, max_count=3):
+    """
+    Pick random faults, spread over the topics they apply to.
+
+    Desync is only injected into the right camera of stereo pairs and frozen frames only into
+    cameras, the other faults into any topic.
+
+    Args
+    ----
+        sensors ([Sensor]): The sensors of the recording
+        duration_s (float): Duration of the recording
+        counts ({str: int}): Number of faults per kind, e.g. {'drop': 5}
+        seed (int): Seed of the random choices
+        max_count (int): Maximum number of frames affected by a drop, desync or frozen fault
+
+    Returns
+    -------
+        [Fault]: The faults
+
+    """
+    rng = random.Random(seed)
+    taken = {}
+    faults = []
+    for kind in FAULT_KINDS:
+        if kind == 'desync':
+            candidates = [sensor for sensor in sensors
+                          if '_stereo_camera/right/' in sensor.topic]
+        elif kind == 'frozen':
+            candidates = [sensor for sensor in sensors
+                          if sensor.msgtype == 'sensor_msgs/msg/CompressedImage']
+        else:
+            candidates = sensors
+        for _ in range(counts.get(kind, 0)):
+            if not candidates:
+                raise ValueError(f'No topic to inject {kind} faults into')
+            for _ in range(100):
+                sensor = rng.choice(candidates)
+                num_frames = int(duration_s * sensor.rate_hz)
+                count = rng.randint(1, max_count) if kind in ('drop', 'desync', 'frozen') else 1
+                if num_frames <= 2 * FAULT_SPACING + count:
+                    continue
+                index = rng.randrange(FAULT_SPACING, num_frames - FAULT_SPACING - count)
+                used = taken.setdefault(sensor.topic, [])
+                if all(abs(index - other) > FAULT_SPACING + max_count for other in used):
+                    used.append(index)
+                    faults.append(Fault(kind, sensor.topic, index, count))
+                    break
+            else:
+                raise ValueError(f'Could not place {counts[kind]} {kind} faults in '
+                                 f'{duration_s} s')
+    return faults
+
+
+def _timeline(sensor, num_frames, start_ns, clocks, rng, jitter_ns):
+    # Header stamps of a fault free recording, sensors on the same clock share them
+    stamps = clocks.get(sensor.clock)
+    if stamps is None or len(stamps) < num_frames:
+        phase = 0 if sensor.clock == 'camera' else rng.randrange(int(1e9 / sensor.rate_hz))
+        stamps = [start_ns + phase + round(index * 1e9 / sensor.rate_hz)
+                  + (round(rng.gauss(0.0, jitter_ns)) if jitter_ns else 0)
+                  for index in range(num_frames)]
+        clocks[sensor.clock] = stamps
+    return stamps[:num_frames]
+
+
+def _apply_faults(sensor, stamps, keys, faults):
+    # Return the recorded frames as (nominal index, stamp, payload key), and the ground truth
+    # of every fault
+    period_ns = round(1e9 / sensor.rate_hz)
+    stamps = list(stamps)
+    keys = list(keys)
+    for fault in faults:
+        if fault.kind == 'backwards':
+            stamps[fault.index] = stamps[fault.index - 1] - (fault.offset_ns or period_ns // 2)
+        elif fault.kind == 'desync':
+            for index in range(fault.index, fault.index + fault.count):
+                stamps[index] += fault.offset_ns or DEFAULT_DESYNC_NS
+        elif fault.kind == 'frozen':
+            for index in range(fault.index, fault.index + fault.count):
+                keys[index] = keys[fault.index - 1]
+
+    dropped = set()
+    duplicated = set()
+    for fault in faults:
+        if fault.kind == 'drop':
+            dropped.update(range(fault.index, fault.index + fault.count))
+        elif fault.kind == 'duplicate':
+            duplicated.add(fault.index)
+    frames = []
+    positions = {}
+    for index, (stamp, key) in enumerate(zip(stamps, keys)):
+        if index in dropped:
+            continue
+        positions[index] = len(frames)
+        frames.append((index, stamp, key))
+        if index in duplicated:
+            frames.append((index, stamp, key))
+
+    truth = []
+    for fault in faults:
+        if fault.kind == 'drop':
+            # Reported at the first frame after the gap
+            index = positions[fault.index + fault.count]
+        elif fault.kind == 'duplicate':
+            index = positions[fault.index] + 1
+        else:
+            index = positions[fault.index]
+        truth.append({
+            'kind': fault.kind,
+            'topic': fault.topic,
+            'index': index,
+            'nominal_index': fault.index,
+            'count': fault.count,
+            'acqtime_ns': frames[index][1],
+            'offset_ns': (fault.offset_ns or (DEFAULT_DESYNC_NS if fault.kind == 'desync'
+                                              else period_ns // 2))
+            if fault.kind in ('desync', 'backwards') else 0,
+        })
+    return frames, truth
+
+
+def _log_times(frames, rng, latency_ns):
+    # Receive times, a base latency plus an exponential tail, increasing per topic
+    log_times = []
+    previous = 0
+    for _, stamp, _ in frames:
+        log_time = max(previous + 1, stamp + latency_ns + round(rng.expovariate(1.0)
+                                                                * latency_ns / 4))
+        log_times.append(log_time)
+        previous = log_time
+    return log_times
+
+
+def generate_bag(output_dir, storage='mcap', duration_s=10.0, sensors=None, faults=(),
+                 camera_bytes=20000, scan_points=720, cloud_points=16000, jitter_ns=10000,
+                 latency_ns=2000000, start_ns=DEFAULT_START_NS, seed=0):
+    """
+    Write a synthetic recording and its ground truth.
+
+    Args
+    ----
+        output_dir (str): Directory of the bag, created if needed, like ros2 bag record -o
+        storage (str): Bag storage format, mcap or db3
+        duration_s (float): Duration of the recording
+        sensors ([Sensor]): The recorded sensors, defaults to nova_carter_sensors()
+        faults ([Fault]): Faults to inject, see random_faults
+        camera_bytes (int): Mean size of a camera frame, sizes vary by +-10%
+        scan_points (int): Number of ranges per 2D lidar scan
+        cloud_points (int): Number of points per 3D lidar point cloud
+        jitter_ns (int): Standard deviation of the header stamps around their nominal times
+        latency_ns (int): Base latency between header stamps and receive (log) times
+        start_ns (int): Header stamp of the first frames
+        seed (int): Seed of all random data, the same arguments write the same bag
+
+    Returns
+    -------
+        dict: The ground truth, as written to ground_truth.json
+
+    """
+    if storage not in ('mcap', 'db3'):
+        raise ValueError(f'Unsupported bag format {storage}, supported options are db3 and '
+                         f'mcap')
+    sensors = nova_carter_sensors() if sensors is None else sensors
+    by_topic = {sensor.topic: sensor for sensor in sensors}
+    for fault in faults:
+        if fault.topic not in by_topic:
+            raise ValueError(f'Fault {fault} is for a topic that is not recorded')
+        _check_fault(fault, int(duration_s * by_topic[fault.topic].rate_hz),
+                     by_topic[fault.topic])
+
+    rng = random.Random(seed)
+    has_cameras = any(sensor.msgtype == 'sensor_msgs/msg/CompressedImage'
+                      for sensor in sensors)
+    pool = None
+    if has_cameras:
+        pool = payload_pool(rng, int(camera_bytes * 1.1) + 1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    bag_file = f'{os.path.basename(os.path.normpath(output_dir))}_0.{storage}'
+    bag_path = os.path.join(output_dir, bag_file)
+    if os.path.exists(bag_path):
+        os.remove(bag_path)
+    writer = McapWriter(bag_path) if storage == 'mcap' else Db3Writer(bag_path)
+
+    clocks = {}
+    topics = []
+    streams = []
+    ground_truth = {'storage': storage, 'duration_s': duration_s, 'seed': seed,
+                    'jitter_ns': jitter_ns, 'topics': {}, 'faults': []}
+    for sensor in sensors:
+        topic_rng = random.Random(f'{seed} {sensor.topic}')
+        topic_writer = _TopicWriter(sensor, topic_rng,
+                                    pool if sensor.msgtype.endswith('CompressedImage') else None,
+                                    camera_bytes, scan_points, cloud_points)
+        num_frames = int(duration_s * sensor.rate_hz)
+        stamps = _timeline(sensor, num_frames, start_ns, clocks, rng, jitter_ns)
+        keys = [topic_writer.payload_key(index) for index in range(num_frames)]
+        frames, truth = _apply_faults(
+            sensor, stamps, keys, [fault for fault in faults if fault.topic == sensor.topic])
+        log_times = _log_times(frames, topic_rng, latency_ns)
+
+        topic_id = writer.add_topic(sensor.topic, sensor.msgtype,
+                                    _message_definition(sensor.msgtype))
+        topics.append((sensor.topic, sensor.msgtype, len(frames)))
+        streams.append(zip(log_times, repeat(topic_id), repeat(topic_writer), frames))
+        ground_truth['topics'][sensor.topic] = {
+            'type': sensor.msgtype,
+            'rate_hz': sensor.rate_hz,
+            'nominal_count': num_frames,
+            'message_count': len(frames),
+        }
+        ground_truth['faults'] += truth
+
+    start = end = None
+    for log_time, topic_id, topic_writer, (_, stamp, key) in heapq.merge(
+            *streams, key=lambda message: message[0]):
+        writer.write(topic_id, log_time, topic_writer.serialize(stamp, key))
+        start = log_time if start is None else start
+        end = log_time
+    writer.close()
+
+    _write_metadata(output_dir, storage, bag_file, topics, start or start_ns, end or start_ns)
+    ground_truth['faults'].sort(key=lambda fault: (fault['topic'], fault['index']))
+    with open(os.path.join(output_dir, 'ground_truth.json'), 'w') as f:
+        json.dump(ground_truth, f, indent=2)
+    return ground_truth
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Write a synthetic Nova Carter bag with injected faults.')
+    parser.add_argument('output_dir', type=str, help='Directory of the bag')
+    parser.add_argument('--storage', type=str, choices=['mcap', 'db3'], default='mcap',
+                        help='Bag storage format (default: mcap)')
+    parser.add_argument('--duration-s', type=float, default=10.0,
+                        help='Duration of the recording (default: 10)')
+    parser.add_argument('--hawks', type=int, default=4, choices=range(5),
+                        help='Number of Hawk stereo cameras (default: 4)')
+    parser.add_argument('--owls', type=int, default=4, choices=range(5),
+                        help='Number of Owl cameras (default: 4)')
+    parser.add_argument('--no-lidar', action='store_true', help='Leave out the lidars')
+    parser.add_argument('--camera-kb', type=float, default=20.0,
+                        help='Mean size of a camera frame in kB (default: 20)')
+    parser.add_argument('--scan-points', type=int, default=720,
+                        help='Ranges per 2D lidar scan (default: 720)')
+    parser.add_argument('--cloud-points', type=int, default=16000,
+                        help='Points per 3D lidar point cloud (default: 16000)')
+    parser.add_argument('--jitter-us', type=float, default=10.0,
+                        help='Standard deviation of the header stamps (default: 10)')
+    for kind, name in (('drop', 'drops'), ('duplicate', 'duplicates'),
+                       ('backwards', 'backwards'), ('desync', 'desyncs'),
+                       ('frozen', 'frozen')):
+        parser.add_argument(f'--{name}', type=int, default=0, dest=kind,
+                            help=f'Number of random {kind} faults (default: 0)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of all random data and faults (default: 0)')
+    args = parser.parse_args()
+
+    sensors = nova_carter_sensors(args.hawks, args.owls, not args.no_lidar)
+    faults = random_faults(sensors, args.duration_s,
+                           {kind: getattr(args, kind) for kind in FAULT_KINDS}, args.seed)
+    ground_truth = generate_bag(
+        args.output_dir, args.storage, args.duration_s, sensors, faults,
+        camera_bytes=int(args.camera_kb * 1000), scan_points=args.scan_points,
+        cloud_points=args.cloud_points, jitter_ns=int(args.jitter_us * 1000), seed=args.seed)
+
+    num_messages = sum(topic['message_count'] for topic in ground_truth['topics'].values())
+    print(f'Wrote {num_messages} messages on {len(sensors)} topics to {args.output_dir}')
+    for fault in ground_truth['faults']:
+        print(f'{fault["kind"]:>10} {fault["topic"]} at index {fault["index"]} '
+              f'({fault["count"]} frames)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Parsers for the host logs saved next to a recording by restart_and_record_data.sh.
+
+argus_log.txt (journalctl of nvargus-daemon), dmesg.txt and the optional tegrastats.txt are
+turned into tables indexed by UTC nanoseconds, the clock the bag log times are on, and merged
+with the drop, desync and latency events of the bag into one sorted timeline. Each file is
+parsed with a single regex scan over its whole content and a vectorized timestamp conversion,
+so even multi-hour logs parse in a few seconds.
+"""
+
+import datetime
+import os
+import re
+
+import pandas as pd
+
+ARGUS_LOG = 'argus_log.txt'
+DMESG_LOG = 'dmesg.txt'
+TEGRASTATS_LOG = 'tegrastats.txt'
+
+TIMELINE_COLUMNS = ['time_ns', 'end_ns', 'source', 'kind', 'subject', 'message']
+
+# journalctl -o short-iso-precise: 2024-05-01T12:34:56.123456+0000 host nvargus-daemon[123]: msg
+_JOURNAL_ISO = re.compile(
+    r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?[+-]\d\d:?\d\d) \S+ ([^\[:\s]+)(?:\[\d+\])?: '
+    r'(.*)$', re.MULTILINE)
+# journalctl default format, no year and local time: May 01 12:34:56 host process[123]: msg
+_JOURNAL_SHORT = re.compile(
+    r'^([A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) \S+ ([^\[:\s]+)(?:\[\d+\])?: (.*)$', re.MULTILINE)
+# dmesg --time-format iso: 2024-05-01T12:34:56,123456+00:00 msg
+_DMESG_ISO = re.compile(r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d),(\d+)([+-]\d\d:?\d\d) (.*)$',
+                        re.MULTILINE)
+# dmesg default format, seconds since boot: [  123.456789] msg
+_DMESG_RAW = re.compile(r'^\[\s*(\d+\.\d+)\] (.*)$', re.MULTILINE)
+# tegrastats --logfile, local time: 05-01-2024 12:34:56 RAM 8406/30536MB ...
+_TEGRASTATS = re.compile(r'^(\d\d-\d\d-\d{4} \d\d:\d\d:\d\d) (.*)$', re.MULTILINE)
+_TEGRA_RAM = re.compile(r'RAM (\d+)/(\d+)MB')
+_TEGRA_CPU = re.compile(r'CPU \[([^\]]*)\]')
+_TEGRA_GPU = re.compile(r'GR3D_FREQ (\d+)%')
+_TEGRA_TEMP = re.compile(r'(\w+)@(-?\d+(?:\.\d+)?)C\b')
+
+# Sensors report -256C when they are off
+_MIN_VALID_TEMPERATURE = -100.0
+
+
+def _read_text(path):
+    with open(path, 'r', errors='replace') as f:
+        return f.read()
+
+
+def _local_timezone():
+    return datetime.datetime.now().astimezone().tzinfo
+
+
+def _to_ns(times):
+    # Timezone aware datetimes to UTC nanoseconds
+    return (times.dt.tz_convert('UTC').dt.tz_localize(None)
+            .astype('datetime64[ns]').astype('int64'))
+
+
+def read_argus_log(path, year=None, tz=None):
+    """
+    Parse the nvargus-daemon journal saved by restart_and_record_data.sh.
+
+    Both `journalctl -o short-iso-precise` and the default journalctl format are understood.
+    The default format has neither a year nor a timezone, so those are taken from the year
+    and tz arguments.
+
+    Args
+    ----
+        path (str): Path to argus_log.txt
+        year (int): Year for the default format, defaults to the year the file was written
+        tz (tzinfo or str): Timezone for the default format, defaults to the local one
+
+    Returns
+    -------
+        pd.DataFrame: columns time_ns, process and message, in file order
+
+    """
+    text = _read_text(path)
+    rows = _JOURNAL_ISO.findall(text)
+    if rows:
+        times = pd.to_datetime(pd.Series([row[0] for row in rows], dtype=object),
+                               format='ISO8601', utc=True)
+    else:
+        rows = _JOURNAL_SHORT.findall(text)
+        if year is None:
+            year = datetime.datetime.fromtimestamp(os.path.getmtime(path)).year
+        times = pd.to_datetime(pd.Series([f'{year} {row[0]}' for row in rows], dtype=object),
+                               format='%Y %b %d %H:%M:%S')
+        times = times.dt.tz_localize(tz or _local_timezone())
+    return pd.DataFrame({
+        'time_ns': _to_ns(times) if rows else pd.Series([], dtype='int64'),
+        'process': [row[1] for row in rows],
+        'message': [row[2] for row in rows],
+    })
+
+
+def read_dmesg(path, boot_time_ns=None):
+    """
+    Parse a kernel log saved by restart_and_record_data.sh.
+
+    `dmesg --time-format iso` lines carry wall clock times. Lines in the default format only
+    carry the seconds since boot and are placed on the wall clock with boot_time_ns. Without
+    it their time_ns is missing and they are left out of the timeline.
+
+    Args
+    ----
+        path (str): Path to dmesg.txt
+        boot_time_ns (int): Wall clock time of the boot, e.g. btime from /proc/stat
+
+    Returns
+    -------
+        pd.DataFrame: columns time_ns (nullable) and message, in file order
+
+    """
+    text = _read_text(path)
+    rows = _DMESG_ISO.findall(text)
+    if rows:
+        times = pd.to_datetime(
+            pd.Series([f'{row[0]}.{row[1]}{row[2]}' for row in rows], dtype=object),
+            format='ISO8601', utc=True)
+        return pd.DataFrame({
+            'time_ns': _to_ns(times).astype('Int64'),
+            'message': [row[3] for row in rows],
+        })
+
+    rows = _DMESG_RAW.findall(text)
+    since_boot_ns = (pd.to_numeric(pd.Series([row[0] for row in rows], dtype=object))
+                     * 1e9).round().astype('Int64')
+    return pd.DataFrame({
+        'time_ns': since_boot_ns + boot_time_ns if boot_time_ns is not None
+        else pd.array([pd.NA] * len(rows), dtype='Int64'),
+        'message': [row[1] for row in rows],
+    })
+
+
+def _cpu_loads(cpus):
+    # '15%@729,9%@729,off' -> [15, 9], cores that are off are skipped
+    return [int(core.split('%')[0]) for core in cpus.split(',') if '%' in core]
+
+
+def read_tegrastats(path, tz=None):
+    """
+    Parse a tegrastats --logfile capture.
+
+    Lines without a leading timestamp (tegrastats before JetPack 5) can not be aligned and are
+    skipped.
+
+    Args
+    ----
+        path (str): Path to tegrastats.txt
+        tz (tzinfo or str): Timezone tegrastats ran in, defaults to the local one
+
+    Returns
+    -------
+        pd.DataFrame: columns time_ns, ram_used_mb, ram_total_mb, cpu_mean_percent,
+            cpu_max_percent, gpu_percent and one temp_<sensor>_c column per thermal zone
+
+    """
+    rows = _TEGRASTATS.findall(_read_text(path))
+    times = pd.to_datetime(pd.Series([row[0] for row in rows], dtype=object),
+                           format='%m-%d-%Y %H:%M:%S')
+    table = {'time_ns': _to_ns(times.dt.tz_localize(tz or _local_timezone()))
+             if rows else pd.Series([], dtype='int64')}
+
+    columns = {
+        'ram_used_mb': [], 'ram_total_mb': [], 'cpu_mean_percent': [], 'cpu_max_percent': [],
+        'gpu_percent': [],
+    }
+    temperatures = {}
+    for index, (_, line) in enumerate(rows):
+        ram = _TEGRA_RAM.search(line)
+        cpu = _TEGRA_CPU.search(line)
+        gpu = _TEGRA_GPU.search(line)
+        loads = _cpu_loads(cpu.group(1)) if cpu else []
+        columns['ram_used_mb'].append(float(ram.group(1)) if ram else float('nan'))
+        columns['ram_total_mb'].append(float(ram.group(2)) if ram else float('nan'))
+        columns['cpu_mean_percent'].append(sum(loads) / len(loads) if loads else float('nan'))
+        columns['cpu_max_percent'].append(max(loads) if loads else float('nan'))
+        columns['gpu_percent'].append(float(gpu.group(1)) if gpu else float('nan'))
+        for sensor, value in _TEGRA_TEMP.findall(line):
+            value = float(value)
+            if value > _MIN_VALID_TEMPERATURE:
+                name = f'temp_{sensor.lower()}_c'
+                if name not in temperatures:
+                    temperatures[name] = [float('nan')] * len(rows)
+                temperatures[name][index] = value
+    table.update(columns)
+    table.update(temperatures)
+    return pd.DataFrame(table)
+
+
+def read_recording_logs(directory, boot_time_ns=None, tz=None):
+    """
+    Parse whichever of the host logs exist in a recording directory.
+
+    Args
+    ----
+        directory (str): The recording directory
+        boot_time_ns (int): Passed on to read_dmesg
+        tz (tzinfo or str): Passed on to read_argus_log and read_tegrastats
+
+    Returns
+    -------
+        {str: pd.DataFrame}: Tables by source, any of 'argus', 'dmesg' and 'tegrastats'
+
+    """
+    readers = {
+        'argus': (ARGUS_LOG, lambda path: read_argus_log(path, tz=tz)),
+        'dmesg': (DMESG_LOG, lambda path: read_dmesg(path, boot_time_ns=boot_time_ns)),
+        'tegrastats': (TEGRASTATS_LOG, lambda path: read_tegrastats(path, tz=tz)),
+    }
+    logs = {}
+    for source, (filename, reader) in readers.items():
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            logs[source] = reader(path)
+    return logs
+
+
+def build_timeline(events, logs, start_ns=None, end_ns=None, margin_s=60.0):
+    """
+    Merge bag events and host log lines into one timeline sorted by time.
+
+    Log lines outside of [start_ns - margin_s, end_ns + margin_s] are dropped, so a dmesg
+    covering days of uptime only contributes the lines around the recording. If a tegrastats
+    table is given, every row is annotated with the last sample before it.
+
+    Args
+    ----
+        events ([incidents.Event]): Events from incidents.collect_events
+        logs ({str: pd.DataFrame}): Tables from read_recording_logs
+        start_ns (int): Start of the recording, bag log time
+        end_ns (int): End of the recording, bag log time
+        margin_s (float): How far outside of the recording log lines are kept
+
+    Returns
+    -------
+        pd.DataFrame: columns time_ns, end_ns, source, kind, subject and message, plus the
+            tegrastats columns if available
+
+    """
+    parts = [pd.DataFrame({
+        'time_ns': [event.start_ns for event in events],
+        'end_ns': [event.end_ns for event in events],
+        'source': 'bag',
+        'kind': [event.kind for event in events],
+        'subject': [event.topic for event in events],
+        'message': '',
+    }, columns=TIMELINE_COLUMNS)]
+    if 'argus' in logs:
+        argus = logs['argus']
+        parts.append(pd.DataFrame({
+            'time_ns': argus['time_ns'], 'end_ns': argus['time_ns'], 'source': 'argus',
+            'kind': 'log', 'subject': argus['process'], 'message': argus['message'],
+        }, columns=TIMELINE_COLUMNS))
+    if 'dmesg' in logs:
+        dmesg = logs['dmesg'].dropna(subset=['time_ns'])
+        parts.append(pd.DataFrame({
+            'time_ns': dmesg['time_ns'], 'end_ns': dmesg['time_ns'], 'source': 'dmesg',
+            'kind': 'log', 'subject': 'kernel', 'message': dmesg['message'],
+        }, columns=TIMELINE_COLUMNS))
+
+    timeline = pd.concat([part for part in parts if len(part)] or parts, ignore_index=True)
+    timeline = timeline.astype({'time_ns': 'int64', 'end_ns': 'int64'})
+    margin_ns = int(margin_s * 1e9)
+    if start_ns is not None:
+        timeline = timeline[(timeline['source'] == 'bag')
+                            | (timeline['time_ns'] >= start_ns - margin_ns)]
+    if end_ns is not None:
+        timeline = timeline[(timeline['source'] == 'bag')
+                            | (timeline['time_ns'] <= end_ns + margin_ns)]
+    timeline = timeline.sort_values('time_ns', kind='stable').reset_index(drop=True)
+
+    tegrastats = logs.get('tegrastats')
+    if tegrastats is not None and len(tegrastats):
+        timeline = pd.merge_asof(timeline, tegrastats.sort_values('time_ns'), on='time_ns',
+                                 direction='backward')
+    return timeline
@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Regressions found by benchmark compare."""
+
+from isaac_ros_data_validation.benchmark import compare
+
+
+def _stage(latency_s, peak_mb):
+    return {'latency_s': {'median': latency_s}, 'peak_mb': peak_mb}
+
+
+def _run(stages):
+    return {'version': 1, 'fixtures': {'hawk-1_1min': {'stages': stages}}}
+
+
+def test_compare():
+    baseline = _run({
+        'read_rosbag': _stage(2.0, 100.0),
+        'read_header_timestamps': _stage(1.0, 100.0),
+        'h264_pass': _stage(1.0, 100.0),
+        'frame_quality': _stage(1.0, 100.0),
+        'camera_converter': _stage(1.0, 100.0),
+        'foxglove_converter': {'skipped': 'foxglove is not installed'},
+    })
+    current = _run({
+        'read_rosbag': {'failed': 'ValueError: broken'},
+        # Slower by more than the tolerance and the noise floor
+        'read_header_timestamps': _stage(1.5, 100.0),
+        # Within the tolerance
+        'h264_pass': _stage(1.05, 110.0),
+        'frame_quality': {'skipped': 'av is not installed'},
+        'foxglove_converter': {'skipped': 'foxglove is not installed'},
+    })
+    rows = {(row['stage'], row['metric']): row['regression']
+            for row in compare(baseline, current, tolerance=0.1, memory_tolerance=0.2)}
+
+    assert rows == {
+        ('read_rosbag', 'failed'): True,
+        ('read_header_timestamps', 'latency_s'): True,
+        ('read_header_timestamps', 'peak_mb'): False,
+        ('h264_pass', 'latency_s'): False,
+        ('h264_pass', 'peak_mb'): False,
+        ('frame_quality', 'skipped'): False,
+        ('camera_converter', 'missing'): True,
+    }
+    # A fixture missing from the current run fails every stage it had
+    rows = compare(baseline, {'version': 1, 'fixtures': {}})
+    assert sum(row['regression'] for row in rows) == 5
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Frame quality metrics and errors on hand built raw images."""
+
+import struct
+
+from isaac_ros_data_validation.frame_quality import (
+    _robust_z,
+    analyze_frame_quality,
+    frame_metrics,
+)
+import numpy as np
+
+TOPIC = '/front_stereo_camera/left/image_raw'
+HEIGHT = 48
+WIDTH = 64
+
+
+def _image(stamp_ns, pixels):
+    # Little endian CDR sensor_msgs/Image with mono8 encoding
+    body = struct.pack('<iI', *divmod(stamp_ns, 1000000000))
+    body += struct.pack('<I', 7) + b'camera\0' + bytes(1)
+    body += struct.pack('<II', HEIGHT, WIDTH)
+    body += struct.pack('<I', 6) + b'mono8\0'
+    # is_bigendian, aligned step and data length
+    body += bytes(1) + bytes(-(len(body) + 1) % 4)
+    data = pixels.astype(np.uint8).tobytes()
+    body += struct.pack('<II', WIDTH, len(data)) + data
+    return b'\x00\x01\x00\x00' + body
+
+
+def _textured(rng, level):
+    return level + rng.integers(-30, 30, (HEIGHT, WIDTH))
+
+
+def test_frame_metrics():
+    black = frame_metrics(np.zeros((HEIGHT, WIDTH), np.uint8))
+    assert black['brightness_mean'] == 0
+    assert black['saturation_ratio'] == 0
+    assert black['sharpness'] == 0
+
+    # Every interior pixel of a checkerboard has a Laplacian of +-4 * 255
+    checkerboard = (np.indices((HEIGHT, WIDTH)).sum(axis=0) % 2 * 255).astype(np.uint8)
+    metrics = frame_metrics(checkerboard)
+    assert metrics['brightness_mean'] == 127.5
+    assert metrics['brightness_p5'] == 0
+    assert metrics['brightness_p95'] == 255
+    assert metrics['saturation_ratio'] == 0.5
+    assert metrics['sharpness'] == 1020 ** 2
+
+
+def test_robust_z():
+    z = _robust_z(np.array([1.0, 2.0, 3.0, 4.0, 100.0]))
+    assert np.allclose(z, np.array([-2, -1, 0, 1, 97]) / 1.4826)
+    assert not _robust_z(np.full(5, 7.0)).any()
+
+
+def test_analyze_frame_quality():
+    rng = np.random.default_rng(0)
+    frames = [_textured(rng, 100) for _ in range(20)]
+    frames[3] = np.zeros((HEIGHT, WIDTH))
+    frames[7] = np.full((HEIGHT, WIDTH), 255)
+    frames[11] = np.full((HEIGHT, WIDTH), 100)
+    frames[15] = _textured(rng, 180)
+    samples = [(TOPIC, index, 'sensor_msgs/msg/Image', _image(index * 50000000, pixels), b'')
+               for index, pixels in enumerate(frames)]
+
+    stats, errors = analyze_frame_quality(samples, workers=1)
+
+    assert stats[TOPIC]['num_samples'] == 20
+    assert stats[TOPIC]['num_decoded'] == 20
+    assert abs(stats[TOPIC]['median_brightness_mean'] - 100) < 2
+    indices = {name: entry['indices'] for name, entry in errors[TOPIC].items()}
+    assert indices == {
+        'black_frame': [3],
+        'saturated_frame': [7],
+        'blurry_frame': [11],
+        'brightness_outlier': [15],
+    }
+    assert errors[TOPIC]['black_frame']['acqtimes'] == [3 * 50000000]
@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Random access to frames of a synthetic bag returns the messages a sequential read does."""
+
+from isaac_ros_data_validation.cdr import header_stamp_ns
+from isaac_ros_data_validation.frame_server import FrameServer
+from isaac_ros_data_validation.synthetic_bag import Fault, generate_bag, nova_carter_sensors
+import pytest
+
+LEFT = '/front_stereo_camera/left/image_compressed'
+RIGHT = '/front_stereo_camera/right/image_compressed'
+
+
+@pytest.mark.parametrize('storage', ['mcap', 'db3'])
+def test_frame_server(tmp_path, storage):
+    from rosbags.rosbag2 import Reader
+
+    bag_dir = str(tmp_path / 'bag')
+    generate_bag(bag_dir, storage, duration_s=2.0, sensors=nova_carter_sensors(hawks=1, owls=0),
+                 faults=[Fault('drop', LEFT, 10, 2), Fault('backwards', RIGHT, 20)],
+                 camera_bytes=2000, cloud_points=100)
+    messages = {LEFT: [], RIGHT: []}
+    with Reader(bag_dir) as reader:
+        for connection, _, rawdata in reader.messages():
+            if connection.topic in messages:
+                messages[connection.topic].append(bytes(rawdata))
+
+    with FrameServer(bag_dir, storage) as server:
+        assert server.topics == [LEFT, RIGHT]
+        for topic, rawdata_list in messages.items():
+            assert server.num_frames(topic) == len(rawdata_list)
+            for index in (0, 9, 10, 19, 20, 21, len(rawdata_list) - 1):
+                assert server.get_message(topic, index) == rawdata_list[index]
+                stamp = header_stamp_ns(rawdata_list[index])
+                assert server.stamps(topic)[index] == stamp
+                assert server.frame_index(topic, stamp + 1000) == index
+            assert server.get_message(topic, -1) == rawdata_list[-1]
+
+        # The frame closest to a stamp inside the dropped frames
+        stamps = server.stamps(LEFT)
+        assert server.frame_index(LEFT, int(stamps[10]) - 1) == 10
+        assert server.get_message(LEFT, int(stamps[9]) + 1000) == messages[LEFT][9]
@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""H.264 bitstream checks on hand built frames."""
+
+import struct
+
+from isaac_ros_data_validation.h264 import H264Pass
+
+SPS = b'\x00\x00\x00\x01\x67\x64\x00\x28\xac\xd2\x01\xe0\x08\x9f\x96'
+SPS_CHANGED = b'\x00\x00\x00\x01\x67\x64\x00\x1f\xac\xd2\x01\xe0\x08\x9f\x96'
+PPS = b'\x00\x00\x00\x01\x68\xce\x06\xe2'
+# IDR slice with first_mb_in_slice 0 and slice_type 7 (I, all slices)
+IDR_SLICE = b'\x00\x00\x00\x01\x65\x88\x84\x21\xa0'
+# Non-IDR slice with first_mb_in_slice 0 and slice_type 0 (P)
+P_SLICE = b'\x00\x00\x00\x01\x41\xc0\x12\x34\x56'
+
+FRAMES = [
+    SPS + PPS + IDR_SLICE,
+    P_SLICE,
+    # Cut off after the parameter sets
+    SPS + PPS,
+    b'',
+    # No start code
+    b'\xff\xd8\xff\xe0',
+    SPS_CHANGED + PPS + IDR_SLICE,
+    SPS_CHANGED + PPS + IDR_SLICE,
+]
+
+
+def _compressed_image(stamp_ns, payload, image_format=b'h264'):
+    # Little endian CDR sensor_msgs/CompressedImage
+    body = struct.pack('<iI', *divmod(stamp_ns, 1000000000))
+    for string in (b'camera\0', image_format + b'\0'):
+        body += struct.pack('<I', len(string)) + string
+        body += bytes(-len(body) % 4)
+    return b'\x00\x01\x00\x00' + body + struct.pack('<I', len(payload)) + payload
+
+
+def test_h264_pass():
+    topic = '/front_stereo_camera/left/image_compressed'
+    h264_pass = H264Pass()
+    assert h264_pass.accepts(topic, 'sensor_msgs/msg/CompressedImage')
+    for index, payload in enumerate(FRAMES):
+        stamp_ns = 1000000000 + index * 33333333
+        h264_pass.process(topic, stamp_ns, _compressed_image(stamp_ns, payload))
+    stats, errors = h264_pass.results()
+
+    assert stats[topic]['frame_type_sequence'] == [('I', 1), ('P', 1), ('-', 3), ('I', 2)]
+    assert {name: entry['indices'] for name, entry in errors[topic].items()} == {
+        'empty_frame': [3],
+        'truncated_frame': [2],
+        'malformed_frame': [4],
+        # Only the P frame, the frames without slices are not counted twice
+        'non_idr_frame': [1],
+        'undersized_frame': [4],
+        'parameter_set_change': [5],
+    }
+
+
+def test_h264_pass_skips_other_formats():
+    topic = '/front_stereo_camera/left/image_jpeg'
+    h264_pass = H264Pass()
+    assert h264_pass.accepts(topic, 'sensor_msgs/msg/CompressedImage')
+    for index in range(5):
+        stamp_ns = 1000000000 + index * 33333333
+        h264_pass.process(topic, stamp_ns,
+                          _compressed_image(stamp_ns, b'\xff\xd8\xff\xe0\x00\x10JFIF', b'jpeg'))
+    assert h264_pass.results() == ({}, {})
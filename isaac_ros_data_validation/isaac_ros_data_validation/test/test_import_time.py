@@ -0,0 +1,66 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Cold start of the command line tools, which must not pay for the heavy imports."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+CLI_MODULES = [
+    'isaac_ros_data_validation.benchmark',
+    'isaac_ros_data_validation.frame_quality',
+    'isaac_ros_data_validation.summarize_bag',
+    'isaac_ros_data_validation.summarize_bandwidth',
+    'isaac_ros_data_validation.summarize_dir',
+    'isaac_ros_data_validation.summarize_timeline',
+    'isaac_ros_data_validation.synthetic_bag',
+]
+HEAVY_MODULES = [
+    'matplotlib', 'nav_msgs', 'numpy', 'pandas', 'rclpy', 'rosbag2_py', 'rosbags', 'sensor_msgs']
+# Seconds to import a command line tool in a fresh interpreter, a few times what it takes
+# without the heavy imports, and well below the seconds they add
+MAX_IMPORT_TIME_S = float(os.environ.get('MAX_IMPORT_TIME_S', 0.3))
+RUNS = 3
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed_s': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def _cold_import(module):
+    output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.mark.parametrize('module', CLI_MODULES)
+def test_import_time(module):
+    results = [_cold_import(module) for _ in range(RUNS)]
+    loaded = {name.split('.')[0] for name in results[0]['modules']}
+    assert not loaded & set(HEAVY_MODULES), \
+        f'{module} imports {sorted(loaded & set(HEAVY_MODULES))} at startup'
+    elapsed_s = min(result['elapsed_s'] for result in results)
+    assert elapsed_s < MAX_IMPORT_TIME_S, \
+        f'Importing {module} took {elapsed_s:.3f} s, more than {MAX_IMPORT_TIME_S} s'
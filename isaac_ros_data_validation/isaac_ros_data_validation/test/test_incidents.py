@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Events of several topics grouped into system wide incidents and isolated faults."""
+
+from isaac_ros_data_validation import bag_tools
+from isaac_ros_data_validation.incidents import Event, find_incidents, sweep_events
+from isaac_ros_data_validation.synthetic_bag import Fault, generate_bag, nova_carter_sensors
+from isaac_ros_data_validation.topics import pair_stereo_topics, stereo_sync_name
+
+LEFT = '/front_stereo_camera/left/image_compressed'
+RIGHT = '/front_stereo_camera/right/image_compressed'
+BACK = '/back_stereo_camera/left/image_compressed'
+IMU = '/front_stereo_imu/imu'
+MS = 1000000
+
+EVENTS = [
+    # A stall seen by three sensors, the intervals overlap
+    Event(LEFT, 'drop', 100 * MS, 200 * MS),
+    Event(IMU, 'latency_spike', 150 * MS, 260 * MS),
+    Event(BACK, 'drop', 250 * MS, 300 * MS),
+    # Both sides of one stereo camera, touching intervals, still a single sensor
+    Event(LEFT, 'desync', 1000 * MS, 1000 * MS),
+    Event(RIGHT, 'drop', 1000 * MS, 1030 * MS),
+    # Two sensors, 40 ms apart
+    Event(IMU, 'drop', 2000 * MS, 2000 * MS),
+    Event(BACK, 'drop', 2040 * MS, 2050 * MS),
+]
+
+
+def test_sweep_events():
+    clusters = sweep_events(reversed(EVENTS))
+    assert [len(cluster) for cluster in clusters] == [3, 2, 1, 1]
+    assert clusters[0] == EVENTS[:3]
+
+    # Padding merges the two events 40 ms apart, but not the clusters a second apart
+    clusters = sweep_events(EVENTS, padding_ns=50 * MS)
+    assert [len(cluster) for cluster in clusters] == [3, 2, 2]
+    assert sweep_events([]) == []
+
+
+def test_find_incidents():
+    incidents, isolated = find_incidents(EVENTS, padding_ms=50.0)
+
+    assert [(incident['start_ns'], incident['end_ns']) for incident in incidents] == [
+        (100 * MS, 300 * MS), (2000 * MS, 2050 * MS)]
+    assert incidents[0]['sensors'] == [
+        'back_stereo_camera', 'front_stereo_camera', 'front_stereo_imu']
+    assert incidents[0]['kinds'] == {'drop': 2, 'latency_spike': 1}
+
+    stereo, = isolated
+    assert stereo['topics'] == [LEFT, RIGHT]
+    assert stereo['sensors'] == ['front_stereo_camera']
+    assert stereo['kinds'] == {'desync': 1, 'drop': 1}
+
+    # Without padding the events 40 ms apart are two faults of one sensor each
+    incidents, isolated = find_incidents(EVENTS, padding_ms=0.0)
+    assert len(incidents) == 1
+    assert len(isolated) == 3
+
+
+def test_pair_stereo_topics():
+    topics = [LEFT, RIGHT, BACK, IMU, 'odom', '/front_stereo_camera/left/camera_info']
+    assert pair_stereo_topics(topics) == [(LEFT, RIGHT)]
+    assert stereo_sync_name(LEFT) == '/front_stereo_camera/image_compressed/sync'
+
+
+def test_lone_camera_drop(tmp_path):
+    # The chassis topics run at their own rates, none of their messages may count as a drop
+    bag_dir = str(tmp_path / 'bag')
+    generate_bag(bag_dir, 'db3', duration_s=20.0,
+                 sensors=nova_carter_sensors(hawks=1, owls=0, lidar=False),
+                 faults=[Fault('drop', LEFT, 300, 2)], camera_bytes=500)
+    dfs, complete = bag_tools.read_header_timestamps(bag_dir, 'db3')
+    assert complete
+    assert {'/chassis/battery_state', '/chassis/imu', '/chassis/odom'} <= dfs.keys()
+
+    incidents, isolated = find_incidents(bag_tools.collect_bag_events(dfs))
+    assert incidents == []
+    fault, = isolated
+    assert fault['topics'] == [LEFT]
+    assert fault['kinds'] == {'drop': 1}
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Structured validation results, their interval encoding and their JSON form."""
+
+import json
+
+from isaac_ros_data_validation.results import Intervals, ValidationResult
+import numpy as np
+
+LEFT = '/front_stereo_camera/left/image_compressed'
+ALL_STATS = {
+    LEFT: {
+        'total_frames_captured': 300,
+        'num_frames_dropped': 5,
+        'percent_frames_dropped': 1.6,
+        'mean_frequency_all': np.float64(29.9),
+        'mean_absolute_error_all_ms': float('nan'),
+    },
+    '/front_stereo_camera/sync': {
+        'topics': [LEFT, '/front_stereo_camera/right/image_compressed'],
+        'num_desynced_frames': 3,
+        'indices_desynced': [41, 40, 42, 40],
+    },
+    'incidents': {'num_system_incidents': 1, 'num_isolated_faults': 2},
+}
+ALL_ERRORS = {
+    LEFT: {
+        'frame_drop': {'num_errors': 5, 'indices': [7, 8, 9, 100, 250]},
+        'frame_backwards': {'num_errors': 0, 'indices': []},
+    },
+}
+Q_SCORES = {
+    'qscore_drops': '98.4',
+    'qscore_buckets': '100.0',
+    'qscore_intra_sync': '99.0',
+    'qscore_inter_sync': ZeroDivisionError('division by zero'),
+}
+
+
+def test_intervals():
+    indices = [9, 3, 4, 5, 5, 12, 10, 11, 0]
+    intervals = Intervals.from_indices(indices)
+
+    assert intervals.pairs() == [[0, 1], [3, 6], [9, 13]]
+    assert len(intervals) == 8
+    assert intervals.to_indices().tolist() == sorted(set(indices))
+    assert Intervals.from_indices([]).pairs() == []
+    assert Intervals.from_indices([]).to_indices().tolist() == []
+
+
+def test_write_json(tmp_path):
+    result = ValidationResult.from_validation(
+        '/data/bags/run_01/', ALL_STATS, ALL_ERRORS, Q_SCORES)
+    result.write(str(tmp_path / 'results.json'))
+    with open(tmp_path / 'results.json') as f:
+        data = json.load(f)
+
+    assert data['title'] == 'run_01'
+    assert data['q_scores'] == {
+        'drops': 98.4, 'buckets': 100.0, 'intra_sync': 99.0, 'inter_sync': None,
+        'failures': {'inter_sync': 'ZeroDivisionError: division by zero'}}
+    assert (data['num_system_incidents'], data['num_isolated_faults']) == (1, 2)
+
+    topic, = data['topics']
+    assert (topic['topic'], topic['kind'], topic['frames_dropped']) == (LEFT, 'camera', 5)
+    assert topic['mean_frequency_hz'] == 29.9
+    assert topic['jitter_ms'] is None
+    assert topic['errors']['frame_drop'] == {
+        'name': 'frame_drop', 'count': 5, 'intervals': [[7, 10], [100, 101], [250, 251]]}
+    assert topic['errors']['frame_backwards']['intervals'] == []
+
+    group, = data['sync_groups']
+    assert (group['kind'], group['num_desynced']) == ('intra', 3)
+    assert group['desynced'] == [[40, 43]]
+    assert Intervals(*zip(*group['desynced'])).to_indices().tolist() == [40, 41, 42]
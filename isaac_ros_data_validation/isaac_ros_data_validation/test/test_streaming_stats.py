@@ -0,0 +1,55 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Stereo sync counts on interleaved left / right stamp streams."""
+
+from isaac_ros_data_validation.streaming_stats import StereoSyncTracker
+
+PERIOD_NS = 33_333_333
+
+
+def _run(tracker, left, right):
+    # Interleave as a live subscriber would see them, left first on equal stamps
+    stamps = [(stamp, 0, 'left') for stamp in left] + [(stamp, 1, 'right') for stamp in right]
+    return [tracker.update(side, stamp) for stamp, _, side in sorted(stamps)]
+
+
+def test_single_drop():
+    stamps = [i * PERIOD_NS for i in range(1000)]
+    tracker = StereoSyncTracker(window=64, sync_tolerance_ns=1000)
+    desynced = _run(tracker, stamps[:500] + stamps[501:], stamps)
+
+    assert tracker.num_matched == 999
+    assert tracker.num_desynced == 1
+    # Counted when the next left stamp arrives, not when the window fills
+    assert desynced.index(1) == 2 * 500 + 1
+
+
+def test_constant_offset():
+    left = [i * PERIOD_NS for i in range(1000)]
+    right = [stamp + 5_000_000 for stamp in left]
+
+    tracker = StereoSyncTracker(window=64, sync_tolerance_ns=10_000_000)
+    _run(tracker, left, right)
+    assert (tracker.num_matched, tracker.num_desynced) == (1000, 0)
+
+    tracker = StereoSyncTracker(window=64, sync_tolerance_ns=1000)
+    desynced = _run(tracker, left, right)
+    # Every stamp is lost once the other side moves past it, the last right one is still pending
+    assert (tracker.num_matched, tracker.num_desynced) == (0, 1999)
+    assert tracker.percent_desynced == 100.0
+    assert desynced[:3] == [0, 1, 1]
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Synthetic bags read back with the injected faults where the ground truth says they are."""
+
+from collections import defaultdict
+
+from isaac_ros_data_validation.cdr import header_stamp_ns
+from isaac_ros_data_validation.frozen_frames import FrozenFramePass
+from isaac_ros_data_validation.h264 import H264Pass
+from isaac_ros_data_validation.synthetic_bag import Fault, generate_bag, nova_carter_sensors
+import pytest
+
+LEFT = '/front_stereo_camera/left/image_compressed'
+RIGHT = '/front_stereo_camera/right/image_compressed'
+FAULTS = [
+    Fault('drop', LEFT, 12, 2),
+    Fault('frozen', LEFT, 30, 2),
+    Fault('duplicate', RIGHT, 15),
+    Fault('backwards', RIGHT, 40),
+    Fault('desync', RIGHT, 50, 3),
+    Fault('drop', '/chassis/odom', 20),
+]
+
+
+def _read(bag_dir):
+    from rosbags.rosbag2 import Reader
+    from rosbags.typesys import get_typestore, Stores
+
+    typestore = get_typestore(Stores.ROS2_HUMBLE)
+    messages = defaultdict(list)
+    with Reader(bag_dir) as reader:
+        for connection, _, rawdata in reader.messages():
+            typestore.deserialize_cdr(rawdata, connection.msgtype)
+            messages[connection.topic].append(rawdata)
+    return messages
+
+
+@pytest.mark.parametrize('storage', ['mcap', 'db3'])
+def test_synthetic_bag(tmp_path, storage):
+    sensors = nova_carter_sensors(hawks=1, owls=0, lidar=True)
+    truth = generate_bag(str(tmp_path / 'bag'), storage, duration_s=3.0, sensors=sensors,
+                         faults=FAULTS, camera_bytes=2000, cloud_points=100)
+    messages = _read(str(tmp_path / 'bag'))
+
+    assert {topic: len(rawdata) for topic, rawdata in messages.items()} == {
+        topic: info['message_count'] for topic, info in truth['topics'].items()}
+    assert len(messages[LEFT]) == 88 and len(messages[RIGHT]) == 91
+
+    stamps = {topic: [header_stamp_ns(rawdata) for rawdata in rawdata_list]
+              for topic, rawdata_list in messages.items()}
+    period_ns = {topic: 1e9 / info['rate_hz'] for topic, info in truth['topics'].items()}
+    for fault in truth['faults']:
+        topic_stamps = stamps[fault['topic']]
+        index = fault['index']
+        assert topic_stamps[index] == fault['acqtime_ns']
+        step = topic_stamps[index] - topic_stamps[index - 1]
+        if fault['kind'] == 'drop':
+            assert step > (fault['count'] + 0.5) * period_ns[fault['topic']]
+        elif fault['kind'] == 'duplicate':
+            assert step == 0
+        elif fault['kind'] == 'backwards':
+            assert step < 0
+        elif fault['kind'] == 'desync':
+            # The left camera lost two frames before, the right one has a duplicate
+            assert topic_stamps[index] - stamps[LEFT][index - 3] == fault['offset_ns']
+
+    h264_pass = H264Pass()
+    frozen_pass = FrozenFramePass()
+    for topic in (LEFT, RIGHT):
+        h264_pass.accepts(topic, 'sensor_msgs/msg/CompressedImage')
+        frozen_pass.accepts(topic, 'sensor_msgs/msg/CompressedImage')
+        for rawdata in messages[topic]:
+            h264_pass.process(topic, 0, rawdata)
+            frozen_pass.process(topic, 0, rawdata)
+    _, h264_errors = h264_pass.results()
+    assert not any(entry['num_errors'] for errors in h264_errors.values()
+                   for entry in errors.values())
+    _, frozen_errors = frozen_pass.results()
+    assert frozen_errors[LEFT]['frozen_frame']['indices'] == [28, 29]
+    # The duplicate repeats its frame as well
+    assert frozen_errors[RIGHT]['frozen_frame']['indices'] == [16]
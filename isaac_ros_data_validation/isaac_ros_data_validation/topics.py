@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Naming conventions of the Nova sensor topics.
+
+Kept free of dependencies, so the offline checks of bag_tools, the incident index and the live
+recording_monitor can all share them without importing each other.
+"""
+
+
+def sensor_name(topic):
+    """Return the sensor a topic belongs to, i.e. its top level namespace."""
+    return topic.strip('/').split('/')[0]
+
+
+def stereo_sync_name(left_topic):
+    """Return the name the sync of a stereo pair is reported under, from its left topic."""
+    return ''.join(left_topic.split('left/')) + '/sync'
+
+
+def pair_stereo_topics(topics):
+    """
+    Pair left/right versions of topics.
+
+    Assumes topic names are of the form:
+    /some/arbitrary/topic/left/type
+    /some/arbitrary/topic/right/type
+
+    Args
+    ----
+        topics (list): List of topics to pair
+
+    Returns
+    -------
+        A list of (left_topic, right_topic) tuples.
+
+    """
+    paired = []
+    topics_dict = {}
+
+    # Create a dictionary with key as the base topic
+    for topic in topics:
+        parts = topic.split('/')
+        if len(parts) < 3:
+            continue
+        base_topic = '/'.join(parts[:-2])
+        side = parts[-2]
+        topic_type = parts[-1]
+        if base_topic not in topics_dict:
+            topics_dict[base_topic] = {}
+        if topic_type not in topics_dict[base_topic]:
+            topics_dict[base_topic][topic_type] = {
+                'left': None,
+                'right': None
+            }
+        topics_dict[base_topic][topic_type][side] = topic
+
+    # Pair the topics based on left and right parts for each type
+    for base_topic, types in topics_dict.items():
+        for topic_type, sides in types.items():
+            if sides['left'] and sides['right']:
+                paired.append((sides['left'], sides['right']))
+
+    return paired
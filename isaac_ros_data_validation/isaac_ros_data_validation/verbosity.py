@@ -0,0 +1,37 @@
+# SPDX-FileCopyrightText: NVIDIA CORPORATION & AFFILIATES
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Verbosity levels of the validation reports.
+
+Kept free of heavy imports, so the command line tools can parse their arguments before loading
+pandas and the ROS bag readers.
+"""
+
+VERBOSE_DUMP = 5
+VERBOSE_INFO = 4
+VERBOSE_WARNING = 3
+VERBOSE_COMPACT = 2
+VERBOSE_ERROR = 1
+
+VERBOSITY_MAP = {
+    'dump': VERBOSE_DUMP,
+    'error': VERBOSE_ERROR,
+    'info': VERBOSE_INFO,
+    'compact': VERBOSE_COMPACT,
+    'warning': VERBOSE_WARNING,
+}
@@ -36,6 +36,16 @@ setup(
     tests_require=['pytest'],
     entry_points={
         'console_scripts': [
+            'benchmark = isaac_ros_data_validation.benchmark:main',
+            'fake_sensor = isaac_ros_data_validation.fake_sensors:main',
+            'frame_quality = isaac_ros_data_validation.frame_quality:main',
+            'recording_monitor = isaac_ros_data_validation.recording_monitor:main',
+            'resource_sampler = isaac_ros_data_validation.resource_sampler:main',
+            'summarize_bag = isaac_ros_data_validation.summarize_bag:main',
+            'summarize_bandwidth = isaac_ros_data_validation.summarize_bandwidth:main',
+            'summarize_dir = isaac_ros_data_validation.summarize_dir:main',
+            'summarize_timeline = isaac_ros_data_validation.summarize_timeline:main',
+            'synthetic_bag = isaac_ros_data_validation.synthetic_bag:main',
         ],
     },
 )
@@ -21,17 +21,25 @@ import shlex
 import subprocess
 import time
 
+from isaac_ros_data_validation.pol_timing import check_stream_timing
 from isaac_ros_test import IsaacROSBaseTest
-from launch_ros.actions import ComposableNodeContainer
+from launch_ros.actions import ComposableNodeContainer, Node
 from launch_ros.descriptions import ComposableNode
 import launch_testing
 import pytest
 import rclpy
 
-from sensor_msgs.msg import CameraInfo, Image
+from sensor_msgs.msg import CameraInfo, CompressedImage, Image
 
 MODULE_ID = 0
 DEVICE_ID = MODULE_ID*2
+EXPECTED_FPS = 30
+# Duration of the timing test in seconds, set ISAAC_ROS_SOAK_DURATION_S=3600 for an hour
+# long soak run. Frames are checked as they arrive, so memory does not grow with the duration.
+SOAK_DURATION_S = float(os.environ.get('ISAAC_ROS_SOAK_DURATION_S', 10))
+# Set ISAAC_ROS_USE_FAKE_SENSORS=1 to test against the fake owl of
+# isaac_ros_data_validation when there is no camera
+USE_FAKE_SENSORS = os.environ.get('ISAAC_ROS_USE_FAKE_SENSORS', '0') == '1'
 
 
 @pytest.mark.rostest
@@ -72,6 +80,19 @@ def generate_test_description():
                 arguments=['--ros-args', '--log-level', 'info'],
             )
         ])
+    elif USE_FAKE_SENSORS:
+        IsaacOwlNodeTest.skip_test = False
+        IsaacOwlNodeTest.use_fake_sensors = True
+
+        # Publishes image_compressed instead of image_raw, with the same stamps
+        fake_owl_node = Node(
+            package='isaac_ros_data_validation',
+            executable='fake_sensor',
+            namespace=IsaacOwlNodeTest.generate_namespace(),
+            parameters=[{'sensor_type': 'owl', 'rate_hz': float(EXPECTED_FPS)}],
+            output='screen'
+        )
+        return IsaacOwlNodeTest.generate_test_description([fake_owl_node])
     else:
         IsaacOwlNodeTest.skip_test = True
         return IsaacOwlNodeTest.generate_test_description(
@@ -81,6 +102,7 @@ def generate_test_description():
 class IsaacOwlNodeTest(IsaacROSBaseTest):
     filepath = pathlib.Path(os.path.dirname(__file__))
     skip_test = False
+    use_fake_sensors = False
 
     def test_image_capture(self):
         """
@@ -93,9 +115,11 @@ class IsaacOwlNodeTest(IsaacROSBaseTest):
         else:
             TIMEOUT = 10
             received_messages = []
+            image_topic, image_type = ('image_compressed', CompressedImage) \
+                if self.use_fake_sensors else ('image_raw', Image)
 
             self.create_exact_time_sync_logging_subscribers(
-                [('left/image_raw', Image),
+                [('left/' + image_topic, image_type),
                  ('left/camera_info', CameraInfo)],
                 received_messages,
                 accept_multiple_messages=True)
@@ -113,3 +137,15 @@ class IsaacOwlNodeTest(IsaacROSBaseTest):
                 self.assertTrue(received_message[0].header.stamp ==
                                 received_message[1].header.stamp,
                                 'Time stamps of all images and camera infos are not equal')
+
+    def test_timing(self):
+        """
+        Test frame drops, jitter and drift of the owl fisheye camera over SOAK_DURATION_S.
+
+        Only the camera info stamps are checked, they are equal to the image stamps.
+        """
+        if self.skip_test:
+            self.skipTest('No camera detected! Skipping test.')
+        else:
+            topics = ['left/camera_info']
+            check_stream_timing(self, topics, CameraInfo, SOAK_DURATION_S, EXPECTED_FPS)